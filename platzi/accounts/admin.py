@@ -1,3 +1,22 @@
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from .models import RefreshToken
+
+
+@admin.register(RefreshToken)
+class RefreshTokenAdmin(admin.ModelAdmin):
+    list_display = ('user', 'family', 'created_at', 'expires_at', 'used_at', 'revoked_at')
+    list_filter = ('revoked_at',)
+    search_fields = ('user__username', 'family')
+    exclude = ('token_hash',)
+    readonly_fields = ('user', 'family', 'created_at', 'expires_at', 'used_at', 'revoked_at')
+    actions = ['revoke']
+
+    @admin.action(description='Revocar las sesiones seleccionadas')
+    def revoke(self, request, queryset):
+        # Revoca la familia entera: también los tokens de acceso ya emitidos
+        count = RefreshToken.objects.filter(
+            family__in=queryset.values('family'), revoked_at__isnull=True,
+        ).update(revoked_at=timezone.now())
+        self.message_user(request, f'{count} tokens revocados')
@@ -1,6 +1,19 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        # Con una caché por proceso cada worker cuenta los fallos por su cuenta:
+        # los umbrales de bloqueo se multiplican por el número de workers
+        backend = settings.CACHES['lockout']['BACKEND']
+        if not settings.DEBUG and backend.endswith('LocMemCache'):
+            logger.warning('La caché lockout es por proceso (%s): el bloqueo de logins '
+                           'no se comparte entre workers', backend)
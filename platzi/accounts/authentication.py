@@ -0,0 +1,58 @@
+"""
+Autenticación de la API con los tokens de acceso firmados (accounts/tokens.py).
+
+Cabecera: ``Authorization: Bearer <token de acceso>``. Se comprueba la
+firma y la caducidad sin consultar la base de datos; request.user es un
+TokenUser con los datos del token, que solo carga el usuario de la base de
+datos si la vista usa algún otro campo (p. ej. el perfil).
+"""
+from django.contrib.auth import get_user_model
+from rest_framework import authentication, exceptions
+
+from . import tokens
+
+
+class TokenUser:
+    """Usuario construido con los datos del token de acceso."""
+
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, claims):
+        self.pk = self.id = claims['uid']
+        self.username = claims['usr']
+        self.is_staff = claims['stf']
+
+    def __getattr__(self, name):
+        # Solo se llama con los atributos que no están en el token
+        if name.startswith('__') or name == '_user':
+            raise AttributeError(name)
+        if '_user' not in self.__dict__:
+            self._user = get_user_model().objects.get(pk=self.pk)
+        return getattr(self._user, name)
+
+    def __str__(self):
+        return self.username
+
+    def get_username(self):
+        return self.username
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Cabecera Authorization no válida')
+        try:
+            claims = tokens.verify_access(auth[1].decode())
+        except (tokens.InvalidToken, UnicodeError):
+            raise exceptions.AuthenticationFailed('Token no válido o caducado')
+        return TokenUser(claims), claims
+
+    def authenticate_header(self, request):
+        return self.keyword
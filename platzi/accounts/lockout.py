@@ -0,0 +1,88 @@
+"""
+Bloqueo de los intentos de login fallidos antes de calcular el hash.
+
+authenticate() calcula PBKDF2 (cientos de milisegundos de CPU) en cada
+intento, exista o no el usuario, así que una ráfaga de credential stuffing
+basta para saturar los workers. Antes de autenticar, login_view y
+login_api consultan dos contadores de fallos en la caché 'lockout':
+
+- por usuario (el nombre normalizado, resumido con sha256) y
+- por IP (la misma identificación que el throttling de DRF).
+
+Al llegar a LOCKOUT_USER_THRESHOLD / LOCKOUT_IP_THRESHOLD fallos en
+LOCKOUT_WINDOW segundos la clave se bloquea LOCKOUT_BASE segundos, el
+doble con cada fallo más (como mucho LOCKOUT_MAX). Mientras dura el bloqueo
+se responde 429 con ``Retry-After`` sin tocar la base de datos ni el hasher.
+
+La comprobación no consulta la base de datos y es igual para cualquier
+nombre, exista o no, así que ni el 429 ni su tiempo de respuesta delatan
+qué usuarios existen (en el resto de intentos el backend de Django ya
+calcula el hash también para usuarios inexistentes).
+
+Un login correcto reinicia el contador del usuario, pero no el de la IP:
+si no, un atacante con una cuenta válida podría vaciarlo entre ráfagas.
+"""
+import hashlib
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from platzi import metrics
+
+logger = logging.getLogger(__name__)
+
+cache = caches['lockout']
+
+
+def user_key(username):
+    digest = hashlib.sha256(username.strip().lower().encode()).hexdigest()[:32]
+    return f'lockout:user:{digest}'
+
+
+def ip_key(request):
+    return f'lockout:ip:{BaseThrottle().get_ident(request)}'
+
+
+def scopes(request, username):
+    """(ámbito, clave, umbral) de cada contador que afecta al intento."""
+    return [
+        ('user', user_key(username or ''), settings.LOCKOUT_USER_THRESHOLD),
+        ('ip', ip_key(request), settings.LOCKOUT_IP_THRESHOLD),
+    ]
+
+
+def retry_after(request, username):
+    """Segundos que quedan de bloqueo para este intento (0 si puede intentarlo)."""
+    keys = [f'{key}:until' for _, key, _ in scopes(request, username)]
+    until = max(cache.get_many(keys).values(), default=0)
+    return max(0, math.ceil(until - time.time()))
+
+
+def register_failure(request, username):
+    """Cuenta un intento fallido y bloquea las claves que superen su umbral."""
+    now = time.time()
+    for scope, key, threshold in scopes(request, username):
+        cache.add(key, 0, settings.LOCKOUT_WINDOW)
+        try:
+            failures = cache.incr(key)
+        except ValueError:  # Caducó entre add() e incr()
+            cache.set(key, 1, settings.LOCKOUT_WINDOW)
+            failures = 1
+        if failures < threshold:
+            continue
+        duration = min(settings.LOCKOUT_MAX, settings.LOCKOUT_BASE * 2 ** min(failures - threshold, 32))
+        cache.set(f'{key}:until', now + duration, duration)
+        # El contador sobrevive al bloqueo: el siguiente fallo lo duplica
+        cache.touch(key, duration + settings.LOCKOUT_WINDOW)
+        metrics.observe_login_lockout(scope)
+        logger.warning('Login bloqueado %s s tras %s fallos (%s)', duration, failures, scope)
+
+
+def reset(username):
+    """Login correcto: olvida los fallos del usuario."""
+    key = user_key(username or '')
+    cache.delete_many([key, f'{key}:until'])
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice para paginar los usuarios por fecha de alta (users_list_api):
+    auth_user pertenece a django.contrib.auth, así que se crea con SQL.
+    """
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_date_joined_id ON auth_user (date_joined, id)',
+            'DROP INDEX IF EXISTS auth_user_date_joined_id',
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # Crea las tablas de las cachés DatabaseCache que aún no existan (ninguna si 'lockout' usa Redis)
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+    """Tabla de la caché 'lockout' (accounts/lockout.py) cuando no se usa Redis."""
+
+    dependencies = [
+        ('accounts', '0002_user_date_joined_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,26 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class RefreshToken(models.Model):
+    """
+    Token de refresco de la API (accounts/tokens.py). Solo se guarda el
+    sha256 del token. Cada uso lo marca como usado y emite otro de la misma
+    familia (rotación); si se reutiliza uno ya usado se revoca la familia
+    entera, porque alguien más tiene una copia.
+    """
+
+    token_hash = models.CharField(max_length=64, primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='refresh_tokens')
+    # Sesión de la API: la comparten los tokens rotados y los de acceso que se emiten con ellos
+    family = models.UUIDField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    used_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'Refresh token de {self.user} ({self.family})'
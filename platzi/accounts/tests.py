@@ -1,3 +1,295 @@
-from django.test import TestCase
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from platzi.pagination import KeysetPagination
+
+from . import lockout, tokens
+from .models import RefreshToken
+
+
+def reset_denylist():
+    """La lista de familias revocadas vive en el proceso: cada test empieza de cero."""
+    tokens._denied = set()
+    tokens._revoked_here = {}
+    tokens._loaded_at = 0.0
+
+
+class TokenTests(TestCase):
+    """Tokens de acceso firmados y de refresco rotatorios (accounts/tokens.py)."""
+
+    def setUp(self):
+        cache.clear()  # Throttling de DRF
+        reset_denylist()
+        self.user = User.objects.create_user('ana', password='s3cret-pass')
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(
+            reverse('accounts:api_login'), {'username': 'ana', 'password': 's3cret-pass'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        # login_api también abre una sesión: los tests usan solo los tokens
+        self.client.cookies.clear()
+        return response.json()
+
+    def refresh(self, refresh):
+        return self.client.post(reverse('accounts:api_token_refresh'), {'refresh': refresh}, format='json')
+
+    def profile(self, access):
+        return self.client.get(reverse('accounts:api_profile'), HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_login_issues_token_pair(self):
+        data = self.login()
+
+        self.assertEqual(data['token_type'], 'Bearer')
+        self.assertEqual(self.profile(data['access']).json()['user']['username'], 'ana')
+        # Del token de refresco solo se guarda el hash
+        stored = RefreshToken.objects.get()
+        self.assertEqual(stored.token_hash, tokens.hash_token(data['refresh']))
+        self.assertEqual(stored.user, self.user)
+
+    def test_refresh_rotates_within_the_family(self):
+        first = self.login()
+
+        response = self.refresh(first['refresh'])
+
+        self.assertEqual(response.status_code, 200)
+        second = response.json()
+        self.assertNotEqual(second['refresh'], first['refresh'])
+        self.assertEqual(self.profile(second['access']).status_code, 200)
+        old, new = (RefreshToken.objects.get(token_hash=tokens.hash_token(data['refresh'])) for data in (first, second))
+        self.assertIsNotNone(old.used_at)
+        self.assertIsNone(new.used_at)
+        self.assertEqual(old.family, new.family)
+
+    def test_reused_refresh_token_revokes_the_family(self):
+        first = self.login()
+        second = self.refresh(first['refresh']).json()
+
+        # Alguien reutiliza el token ya consumido: se revoca la sesión entera
+        self.assertEqual(self.refresh(first['refresh']).status_code, 401)
+
+        self.assertEqual(self.refresh(second['refresh']).status_code, 401)
+        self.assertEqual(self.profile(second['access']).status_code, 401)
+        self.assertFalse(RefreshToken.objects.filter(revoked_at__isnull=True).exists())
+
+    def test_expired_access_token_is_rejected(self):
+        data = self.login()
+
+        with mock.patch('time.time', return_value=time.time() + settings.ACCESS_TOKEN_TTL + 5):
+            response = self.profile(data['access'])
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_expired_refresh_token_is_rejected(self):
+        data = self.login()
+        RefreshToken.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self.refresh(data['refresh']).status_code, 401)
+
+    def test_tampered_access_token_is_rejected(self):
+        data = self.login()
+
+        self.assertEqual(self.profile(data['access'][:-2] + 'xx').status_code, 401)
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        data = self.login()
+
+        response = self.client.post(reverse('accounts:api_logout'), HTTP_AUTHORIZATION=f"Bearer {data['access']}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.profile(data['access']).status_code, 401)
+        self.assertEqual(self.refresh(data['refresh']).status_code, 401)
+
+    def test_session_logout_without_tokens(self):
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse('accounts:api_logout'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+
+class DenylistTests(TestCase):
+    """Revocaciones hechas en otro proceso y en este (tokens.is_denied)."""
+
+    def setUp(self):
+        reset_denylist()
+        self.user = User.objects.create_user('ana', password='s3cret-pass')
+
+    def test_revocation_from_another_process_is_seen_after_reload(self):
+        data = tokens.issue(self.user)
+        family = RefreshToken.objects.get().family
+        tokens.verify_access(data['access'])  # Carga la lista
+
+        # Otro worker revoca la sesión: solo cambia la base de datos
+        RefreshToken.objects.update(revoked_at=timezone.now())
+        tokens.verify_access(data['access'])  # Aún no ha tocado releer
+
+        tokens._loaded_at = 0.0
+        with self.assertRaises(tokens.InvalidToken):
+            tokens.verify_access(data['access'])
+        self.assertTrue(tokens.is_denied(family.hex))
+
+    def test_reload_keeps_families_revoked_in_this_process(self):
+        # Una familia revocada aquí que la relectura no ve (p. ej. la consulta
+        # empezó antes de la revocación) sigue rechazada
+        family = uuid.uuid4()
+        tokens.revoke_family(family)
+
+        tokens._loaded_at = 0.0
+
+        self.assertTrue(tokens.is_denied(family.hex))
+
+    def test_old_revocations_leave_the_list(self):
+        data = tokens.issue(self.user)
+        RefreshToken.objects.update(
+            revoked_at=timezone.now() - timedelta(seconds=settings.ACCESS_TOKEN_TTL + 1),
+        )
+
+        # Sus tokens de acceso ya caducaron: no hace falta recordarla
+        self.assertFalse(tokens.is_denied(RefreshToken.objects.get().family.hex))
+        self.assertEqual(tokens.verify_access(data['access'])['usr'], 'ana')
+
+    def test_purge_expired(self):
+        tokens.issue(self.user)
+        tokens.issue(self.user)
+        RefreshToken.objects.filter(pk=RefreshToken.objects.first().pk).update(expires_at=timezone.now())
+
+        self.assertEqual(tokens.purge_expired(), 1)
+        self.assertEqual(RefreshToken.objects.count(), 1)
+
+
+@override_settings(
+    LOCKOUT_USER_THRESHOLD=3, LOCKOUT_IP_THRESHOLD=5, LOCKOUT_BASE=30,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class LockoutTests(TestCase):
+    """Bloqueo de los intentos de login fallidos (accounts/lockout.py)."""
+
+    def setUp(self):
+        cache.clear()
+        caches['lockout'].clear()
+        User.objects.create_user('ana', password='s3cret-pass')
+        self.client = APIClient()
+
+    def api_login(self, username='ana', password='wrong-pass'):
+        return self.client.post(
+            reverse('accounts:api_login'), {'username': username, 'password': password}, format='json',
+        )
+
+    def test_user_is_locked_after_threshold(self):
+        for _ in range(3):
+            self.assertEqual(self.api_login().status_code, 400)
+
+        # Bloqueado aunque la contraseña sea correcta, y sin calcular el hash
+        with mock.patch('accounts.serializers.authenticate') as authenticate:
+            response = self.api_login(password='s3cret-pass')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response['Retry-After']) <= 30)
+        authenticate.assert_not_called()
+
+    def test_lock_applies_to_the_web_form(self):
+        for _ in range(3):
+            self.api_login()
+
+        response = self.client.post(reverse('accounts:login'), {'username': 'ANA ', 'password': 's3cret-pass'})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_successful_login_resets_the_user_counter(self):
+        for _ in range(2):
+            self.api_login()
+        self.assertEqual(self.api_login(password='s3cret-pass').status_code, 200)
+
+        for _ in range(2):
+            self.assertEqual(self.api_login().status_code, 400)
+        self.assertEqual(self.api_login(password='s3cret-pass').status_code, 200)
+
+    def test_ip_is_locked_across_usernames(self):
+        for number in range(5):
+            self.api_login(username=f'user{number}')
+
+        # Otro usuario (que existe) desde la misma IP
+        self.assertEqual(self.api_login(password='s3cret-pass').status_code, 429)
+
+    def test_lock_doubles_with_each_failure(self):
+        for _ in range(3):
+            self.api_login()
+        key = lockout.user_key('ana')
+        first = caches['lockout'].get(f'{key}:until')
+
+        # Pasado el bloqueo, el siguiente fallo bloquea el doble
+        caches['lockout'].delete(f'{key}:until')
+        with mock.patch('accounts.lockout.time.time', return_value=first):
+            self.api_login()
+
+        self.assertAlmostEqual(caches['lockout'].get(f'{key}:until') - first, 60, delta=1)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UsersListPaginationTests(TestCase):
+    """Paginación por cursor de /api/users/ (platzi/pagination.py)."""
+
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create_user('admin', password='s3cret-pass', is_staff=True)
+        for number in range(22):
+            User.objects.create_user(f'user{number:02}')
+        # Muchos con la misma fecha: el desempate por id no debe repetir ni saltarse ninguno
+        same = timezone.now() - timedelta(days=1)
+        User.objects.filter(username__lt='user10').update(date_joined=same)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def pages(self, url):
+        while url:
+            data = self.client.get(url).json()
+            yield data
+            url = data['next']
+
+    def test_traversal_returns_every_user_once_in_order(self):
+        ids = [
+            user['id']
+            for page in self.pages(reverse('accounts:api_users') + '?page_size=5')
+            for user in page['results']
+        ]
+
+        expected = list(User.objects.order_by('-date_joined', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_the_same_page(self):
+        pages = list(self.pages(reverse('accounts:api_users') + '?page_size=5'))
+
+        previous = self.client.get(pages[2]['previous']).json()
+
+        self.assertEqual(previous['results'], pages[1]['results'])
+
+    def test_count_only_when_requested(self):
+        url = reverse('accounts:api_users')
+
+        self.assertNotIn('count', self.client.get(url).json())
+        self.assertEqual(self.client.get(url, {'count': '1'}).json()['count'], 23)
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(KeysetPagination, 'max_page_size', 10):
+            response = self.client.get(reverse('accounts:api_users'), {'page_size': 1000})
+
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_only_staff(self):
+        self.client.force_authenticate(User.objects.get(username='user00'))
+
+        self.assertEqual(self.client.get(reverse('accounts:api_users')).status_code, 403)
@@ -0,0 +1,148 @@
+"""
+Tokens de la API: de acceso firmados (sin base de datos) y de refresco rotatorios.
+
+- Token de acceso: los datos del usuario (id, nombre, is_staff) y la
+  familia, firmados con HMAC-SHA256 y la SECRET_KEY (django.core.signing)
+  con fecha. Dura ACCESS_TOKEN_TTL segundos y se comprueba sin consultar
+  la base de datos (accounts/authentication.py).
+- Token de refresco: aleatorio, guardado como sha256 en RefreshToken y
+  válido REFRESH_TOKEN_TTL segundos. Cada uso lo consume y emite un par
+  nuevo de la misma familia; reutilizar uno consumido revoca la familia.
+
+Cerrar sesión revoca la familia. Los tokens de acceso ya emitidos se
+rechazan mediante una lista de familias revocadas en los últimos
+ACCESS_TOKEN_TTL segundos (los anteriores ya caducaron), que cada proceso
+guarda en memoria y relee de la base de datos cada
+TOKEN_DENYLIST_REFRESH_INTERVAL segundos: una revocación tarda como mucho
+eso en verse en otros workers (en el propio, al instante).
+"""
+import hashlib
+import secrets
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from .models import RefreshToken
+
+SALT = 'accounts.tokens.access'
+
+
+class InvalidToken(Exception):
+    """Token ausente, mal formado, caducado o revocado."""
+
+
+def issue(user, family=None):
+    """Emite un par de tokens (acceso y refresco) para ``user``; devuelve el dict de la respuesta."""
+    family = family or uuid.uuid4()
+    refresh = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        token_hash=hash_token(refresh),
+        user=user,
+        family=family,
+        expires_at=timezone.now() + timedelta(seconds=settings.REFRESH_TOKEN_TTL),
+    )
+    return {
+        'access': access_token(user, family),
+        'refresh': refresh,
+        'token_type': 'Bearer',
+        'expires_in': settings.ACCESS_TOKEN_TTL,
+    }
+
+
+def access_token(user, family):
+    claims = {'uid': user.pk, 'usr': user.get_username(), 'stf': user.is_staff, 'fam': family.hex}
+    return signing.dumps(claims, salt=SALT, compress=False)
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def verify_access(token):
+    """Datos del token de acceso si es válido, está vigente y no está revocado."""
+    try:
+        claims = signing.loads(token, salt=SALT, max_age=settings.ACCESS_TOKEN_TTL)
+    except signing.BadSignature as error:  # Incluye SignatureExpired
+        raise InvalidToken(str(error)) from error
+    if is_denied(claims['fam']):
+        raise InvalidToken('Token revocado')
+    return claims
+
+
+def rotate(refresh):
+    """Consume el token de refresco y emite un par nuevo de la misma familia."""
+    now = timezone.now()
+    token = RefreshToken.objects.select_related('user').filter(token_hash=hash_token(refresh)).first()
+    if token is None or token.revoked_at or token.expires_at <= now or not token.user.is_active:
+        raise InvalidToken('Token de refresco no válido')
+    # Compare-and-set: de dos usos simultáneos solo uno consume el token
+    consumed = RefreshToken.objects.filter(pk=token.pk, used_at__isnull=True).update(used_at=now)
+    if not consumed:
+        revoke_family(token.family)
+        raise InvalidToken('Token de refresco reutilizado: sesión revocada')
+    return issue(token.user, token.family)
+
+
+def revoke_family(family):
+    """Revoca la sesión: sus tokens de refresco y los de acceso ya emitidos."""
+    family = uuid.UUID(str(family))
+    RefreshToken.objects.filter(family=family, revoked_at__isnull=True).update(revoked_at=timezone.now())
+    with _lock:
+        _denied.add(family.hex)
+        _revoked_here[family.hex] = time.monotonic()
+
+
+def revoke_access(token):
+    """Revoca la sesión del token de acceso ``token`` (aunque ya haya caducado)."""
+    try:
+        claims = signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        return False
+    revoke_family(claims['fam'])
+    return True
+
+
+def revoke_refresh(refresh):
+    """Revoca la sesión del token de refresco ``refresh``."""
+    family = RefreshToken.objects.filter(token_hash=hash_token(refresh)).values_list('family', flat=True).first()
+    if family is None:
+        return False
+    revoke_family(family)
+    return True
+
+
+# Familias revocadas recientemente (por proceso) y cuándo se releyeron
+_denied = set()
+_loaded_at = 0.0
+_lock = threading.Lock()
+# Familias revocadas en este proceso -> time.monotonic() de la revocación. Se
+# suman a cada relectura: la consulta puede haber empezado antes de revocarlas
+_revoked_here = {}
+
+
+def is_denied(family):
+    global _denied, _loaded_at
+    if time.monotonic() - _loaded_at >= settings.TOKEN_DENYLIST_REFRESH_INTERVAL:
+        since = timezone.now() - timedelta(seconds=settings.ACCESS_TOKEN_TTL)
+        families = RefreshToken.objects.filter(revoked_at__gte=since).values_list('family', flat=True).distinct()
+        denied = {family.hex for family in families}
+        with _lock:
+            now = time.monotonic()
+            for revoked, revoked_at in list(_revoked_here.items()):
+                # Pasado ACCESS_TOKEN_TTL sus tokens de acceso ya caducaron
+                if now - revoked_at > settings.ACCESS_TOKEN_TTL:
+                    del _revoked_here[revoked]
+            _denied = denied | _revoked_here.keys()
+            _loaded_at = now
+    return family in _denied
+
+
+def purge_expired():
+    """Borra los tokens de refresco caducados; devuelve cuántos."""
+    deleted, _ = RefreshToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -9,7 +9,9 @@ urlpatterns = [
     path('api/register/', views.register_api, name='api_register'),
     path('api/login/', views.login_api, name='api_login'),
     path('api/logout/', views.logout_api, name='api_logout'),
+    path('api/token/refresh/', views.token_refresh_api, name='api_token_refresh'),
     path('api/profile/', views.user_profile_api, name='api_profile'),
+    path('api/users/', views.users_list_api, name='api_users'),
     path('api/check-username/', views.check_username_api, name='api_check_username'),
     path('login/', views.login_view, name='login'),
     path('register/', views.register_view, name='register'),
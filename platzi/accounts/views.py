@@ -1,4 +1,4 @@
-import requests
+import logging
 import json
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
@@ -8,13 +8,14 @@ from django.urls import reverse
 from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_protect
 from django.conf import settings
+from platzi.pagination import KeysetPagination
+from . import lockout, tokens
 from .forms import UserRegistrationForm, UserLoginForm
 
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.authtoken.models import Token
 from django.contrib.auth import login, logout
 from django.contrib.auth.models import User
 from .serializers import (
@@ -23,9 +24,7 @@ from .serializers import (
     UserSerializer
 )
 
-
-# URL base de tu API (configurable desde settings)
-API_BASE_URL = "http://127.0.0.1:8000/api/"
+logger = logging.getLogger(__name__)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -54,16 +53,14 @@ def register_api(request):
         if serializer.is_valid():
             # Guardamos el nuevo usuario
             user = serializer.save()
+            logger.info('Usuario registrado por API', extra={'user_id': user.pk})
             
-            # Creamos o obtenemos el token de autenticación para el usuario
-            token, created = Token.objects.get_or_create(user=user)
-            
-            # Preparamos la respuesta con los datos del usuario y su token
+            # Preparamos la respuesta con los datos del usuario y sus tokens
             response_data = {
                 'success': True,
                 'message': 'Usuario registrado satisfactoriamente',
                 'user': UserSerializer(user).data,
-                'token': token.key
+                **tokens.issue(user)
             }
             
             return Response(response_data, status=status.HTTP_201_CREATED)
@@ -91,8 +88,19 @@ def login_api(request):
     Respuestas:
     - 200: Autenticación exitosa
     - 400: Error en credenciales
+    - 429: Demasiados intentos fallidos (ver cabecera Retry-After)
     """
     if request.method == 'POST':
+        # Antes de calcular el hash: ¿está bloqueado el usuario o la IP?
+        username = str(request.data.get('username', ''))
+        retry_after = lockout.retry_after(request, username)
+        if retry_after:
+            return Response({
+                'success': False,
+                'message': 'Demasiados intentos fallidos. Inténtalo más tarde.',
+                'retry_after': retry_after
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(retry_after)})
+
         # Creamos el serializer con los datos de login
         serializer = UserLoginSerializer(
             data=request.data,
@@ -104,22 +112,24 @@ def login_api(request):
             user = serializer.validated_data['user']
             
             # Iniciamos sesión en Django (opcional, para mantener sesión)
+            lockout.reset(username)
             login(request, user)
+            logger.info('Login por API', extra={'user_id': user.pk})
             
-            # Creamos o obtenemos el token de autenticación
-            token, created = Token.objects.get_or_create(user=user)
-            
-            # Preparamos la respuesta exitosa
+            # Preparamos la respuesta exitosa con un par de tokens nuevo
             response_data = {
                 'success': True,
                 'message': 'Autenticación satisfactoria',
                 'user': UserSerializer(user).data,
-                'token': token.key
+                **tokens.issue(user)
             }
             
             return Response(response_data, status=status.HTTP_200_OK)
         
         # Si hay errores de autenticación
+        logger.info('Login por API fallido')
+        if any(error.code == 'authentication' for error in serializer.errors.get('non_field_errors', [])):
+            lockout.register_failure(request, username)
         return Response({
             'success': False,
             'message': 'Error en la autenticación',
@@ -136,29 +146,67 @@ def logout_api(request):
     Endpoint: POST /api/logout/
     Requiere: Token de autenticación en headers
     
+    Parámetros opcionales:
+    - refresh: token de refresco de la sesión (si se autentica de otra forma)
+    
     Respuestas:
     - 200: Sesión cerrada exitosamente
     - 401: No autorizado (sin token válido)
     """
     if request.method == 'POST':
         try:
-            # Eliminamos el token del usuario
-            request.user.auth_token.delete()
-            
-            # Cerramos la sesión de Django
-            logout(request)
-            
-            return Response({
-                'success': True,
-                'message': 'Sesión cerrada exitosamente'
-            }, status=status.HTTP_200_OK)
-            
+            # Revocamos la sesión del token de acceso (y sus tokens de refresco)
+            if isinstance(request.auth, dict):
+                tokens.revoke_family(request.auth['fam'])
+            elif request.data.get('refresh'):
+                tokens.revoke_refresh(str(request.data['refresh']))
+            elif hasattr(request.user, 'auth_token'):
+                # Token antiguo de DRF (authtoken)
+                request.user.auth_token.delete()
         except Exception as e:
+            logger.warning('Error al cerrar sesión por API', exc_info=True)
+            # La sesión de Django se cierra igualmente
+            logout(request)
             return Response({
                 'success': False,
                 'message': 'Error al cerrar sesión',
                 'error': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Cerramos la sesión de Django (login_api también abre una)
+        logout(request)
+        
+        return Response({
+            'success': True,
+            'message': 'Sesión cerrada exitosamente'
+        }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def token_refresh_api(request):
+    """
+    Vista API para renovar el token de acceso.
+    
+    Endpoint: POST /api/token/refresh/
+    
+    Parámetros esperados:
+    - refresh: token de refresco (se consume y se devuelve uno nuevo)
+    
+    Respuestas:
+    - 200: Nuevo par de tokens
+    - 401: Token de refresco no válido, caducado o revocado
+    """
+    try:
+        response_data = tokens.rotate(str(request.data.get('refresh', '')))
+    except tokens.InvalidToken as error:
+        logger.info('Refresco de token rechazado: %s', error)
+        return Response({
+            'success': False,
+            'message': 'Token de refresco no válido'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    return Response({'success': True, **response_data}, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -184,6 +232,32 @@ def user_profile_api(request):
         }, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def users_list_api(request):
+    """
+    Vista API para listar los usuarios (solo staff), de más reciente a más antiguo.
+    
+    Endpoint: GET /api/users/
+    Requiere: Token de autenticación de un usuario staff
+    
+    Parámetros de query:
+    - cursor: cursor de la página (los enlaces next/previous de la respuesta)
+    - page_size: usuarios por página (máximo 100)
+    - count: 1 para incluir el total de usuarios
+    
+    Respuestas:
+    - 200: Página de usuarios
+    - 403: El usuario no es staff
+    """
+    paginator = KeysetPagination()
+    # El cursor filtra por date_joined (índice auth_user_date_joined_id, migración
+    # accounts 0002); id solo desempata las altas con la misma fecha
+    paginator.ordering = ('-date_joined', '-id')
+    page = paginator.paginate_queryset(User.objects.all(), request)
+    return paginator.get_paginated_response(UserSerializer(page, many=True).data)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def check_username_api(request):
@@ -262,10 +336,12 @@ def register_view(request):
                 last_name=last_name
             )
             
+            logger.info('Usuario registrado', extra={'user_id': user.pk})
             messages.success(request, '¡Cuenta creada exitosamente! Ya puedes iniciar sesión.')
             return redirect('platziapp:home')  # Redirigir al login después del registro exitoso
             
         except Exception as e:
+            logger.exception('Error al crear la cuenta')
             messages.error(request, 'Error al crear la cuenta. Inténtalo de nuevo.')
             return render(request, 'register.html')
     
@@ -285,15 +361,27 @@ def login_view(request):
             messages.error(request, 'Por favor, completa todos los campos.')
             return render(request, 'login.html')
         
+        # Antes de calcular el hash: ¿está bloqueado el usuario o la IP?
+        retry_after = lockout.retry_after(request, username)
+        if retry_after:
+            messages.error(request, 'Demasiados intentos fallidos. Inténtalo de nuevo más tarde.')
+            response = render(request, 'login.html', status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
+        
         # Autenticar usuario
         user = authenticate(request, username=username, password=password)
         
         if user is not None:
+            lockout.reset(username)
             login(request, user)
+            logger.info('Login', extra={'user_id': user.pk})
             messages.success(request, f'¡Bienvenido, {user.username}!')
             # Redirigir a la página deseada después del login
             return redirect('platziapp:home')
         else:
+            logger.info('Login fallido')
+            lockout.register_failure(request, username)
             messages.error(request, 'Credenciales incorrectas. Inténtalo de nuevo.')
             return render(request, 'login.html')
     
@@ -306,25 +394,10 @@ def logout_view(request):
     """
     username = request.user.username if request.user.is_authenticated else None
     
-    # Opcional: llamar al endpoint de logout de la API
+    # Revocar los tokens de la API si la sesión tiene alguno (logout() limpia la
+    # sesión). El login web no los emite: el navegador usa la API con la sesión
     if 'api_token' in request.session:
-        try:
-            requests.post(
-                f"{API_BASE_URL}logout/",
-                json={'refresh_token': request.session.get('refresh_token', '')},
-                headers={
-                    'Authorization': f'Bearer {request.session["api_token"]}',
-                    'Content-Type': 'application/json'
-                },
-                timeout=5
-            )
-        except:
-            pass  # Si falla, continuar con el logout local
-        
-        # Limpiar tokens de la sesión
-        del request.session['api_token']
-        if 'refresh_token' in request.session:
-            del request.session['refresh_token']
+        tokens.revoke_access(request.session['api_token'])
     
     # Cerrar sesión en Django
     logout(request)
@@ -0,0 +1,14 @@
+"""
+Suite de benchmarks de carga y rendimiento.
+
+Todo se ejecuta sin red en una sola máquina: un doble local de la API de
+productos (upstream_stub), la aplicación Django con la configuración de
+bench/settings.py y un generador de carga (run) que ejecuta los escenarios
+de bench/scenarios.py y guarda los resultados en JSON en bench/results/.
+
+Uso (desde el directorio que contiene manage.py):
+    python -m bench.run                        # todos los escenarios
+    python -m bench.run home product_detail -c 16 -d 30
+    python -m bench.run --compare bench/results/a.json bench/results/b.json
+    python -m bench.serialization              # renderers JSON (tiempo y memoria)
+"""
@@ -0,0 +1,277 @@
+"""
+Generador de carga: arranca el doble de la API y la aplicación, ejecuta los
+escenarios con concurrencia controlada y guarda los resultados en JSON.
+
+Uso (desde el directorio que contiene manage.py):
+    python -m bench.run                                   # todos los escenarios
+    python -m bench.run home product_detail -c 16 -d 30 --latency-ms 40
+    python -m bench.run --target http://127.0.0.1:8000    # servidor ya arrancado
+    python -m bench.run --compare bench/results/A.json bench/results/B.json
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / 'results'
+
+
+def percentile(sorted_values, pct):
+    """Percentil por rango más cercano sobre una lista ordenada."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f'Nada escucha en el puerto {port} tras {timeout:.0f}s')
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR, text=True, stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scenario(scenario, ctx, concurrency, duration, warmup):
+    """Ejecuta un escenario con ``concurrency`` hilos y devuelve sus estadísticas."""
+    from bench.scenarios import login
+
+    latencies = []
+    errors = []
+    setup_errors = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+    stop = threading.Event()
+    measuring = threading.Event()
+
+    def worker():
+        client = requests.Session()
+        try:
+            if scenario.login:
+                login(client, ctx)
+        except Exception as exc:
+            # Sin esto el resto de hilos (y el principal) esperarían en la barrera para siempre
+            setup_errors.append(exc)
+            start_barrier.abort()
+            return
+        try:
+            start_barrier.wait()
+        except threading.BrokenBarrierError:
+            return
+        local_latencies, local_errors = [], 0
+        while not stop.is_set():
+            began = time.perf_counter()
+            try:
+                response = scenario.func(client, ctx)
+                ok = response.status_code in scenario.expect
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - began
+            if measuring.is_set():
+                local_latencies.append(elapsed)
+                local_errors += not ok
+        with lock:
+            latencies.extend(local_latencies)
+            errors.append(local_errors)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    try:
+        start_barrier.wait()
+    except threading.BrokenBarrierError:
+        for thread in threads:
+            thread.join()
+        raise RuntimeError(f'El escenario {scenario.name} no pudo empezar: {setup_errors[0]}') from setup_errors[0]
+    time.sleep(warmup)
+    measuring.set()
+    measured_from = time.perf_counter()
+    time.sleep(duration)
+    measuring.clear()
+    elapsed = time.perf_counter() - measured_from
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    return {
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 3),
+        'requests': len(ms),
+        'errors': sum(errors),
+        'rps': round(len(ms) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': round(sum(ms) / len(ms), 2) if ms else 0.0,
+            'p50': round(percentile(ms, 50), 2),
+            'p95': round(percentile(ms, 95), 2),
+            'p99': round(percentile(ms, 99), 2),
+            'max': round(ms[-1], 2) if ms else 0.0,
+        },
+    }
+
+
+def start_processes(args, env):
+    """Arranca el doble de la API y la aplicación; devuelve los procesos."""
+    processes = []
+    stub = subprocess.Popen([
+        sys.executable, '-m', 'bench.upstream_stub',
+        '--port', str(args.stub_port),
+        '--products', str(args.products),
+        '--categories', str(args.categories),
+        '--latency-ms', str(args.latency_ms),
+        '--jitter-ms', str(args.jitter_ms),
+        '--error-rate', str(args.error_rate),
+        '--slow-rate', str(args.slow_rate),
+        '--slow-ms', str(args.slow_ms),
+    ], cwd=PROJECT_DIR, env=env, stdout=subprocess.DEVNULL)
+    processes.append(stub)
+    wait_for_port(args.stub_port)
+
+    server_log = tempfile.NamedTemporaryFile(prefix='bench-server-', suffix='.log', delete=False)
+    server = subprocess.Popen([
+        sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{args.port}', '--noreload',
+    ], cwd=PROJECT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=server_log)
+    processes.append(server)
+    try:
+        wait_for_port(args.port)
+    except RuntimeError:
+        raise RuntimeError(f'La aplicación no arrancó; ver {server_log.name}')
+    return processes
+
+
+def prepare_database():
+    """Aplica migraciones y crea el usuario del benchmark."""
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+
+    from bench.scenarios import BENCH_PASSWORD, BENCH_USERNAME
+
+    call_command('migrate', verbosity=0, interactive=False)
+    user, _ = User.objects.get_or_create(username=BENCH_USERNAME, defaults={'email': 'bench@example.com'})
+    user.set_password(BENCH_PASSWORD)
+    user.save()
+
+
+def print_results(results):
+    print(f"{'escenario':<16} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for name, stats in results['scenarios'].items():
+        latency = stats['latency_ms']
+        print(f"{name:<16} {stats['rps']:>9.1f} {latency['p50']:>9.1f} "
+              f"{latency['p95']:>9.1f} {latency['p99']:>9.1f} {stats['errors']:>8}")
+
+
+def compare(path_a, path_b):
+    """Muestra la variación de req/s y percentiles entre dos ejecuciones."""
+    a = json.loads(Path(path_a).read_text())
+    b = json.loads(Path(path_b).read_text())
+
+    def delta(old, new):
+        return f'{(new - old) / old * 100:+.1f}%' if old else 'n/a'
+
+    print(f"{'escenario':<16} {'req/s':>16} {'p50':>16} {'p95':>16} {'p99':>16}")
+    for name, new in b['scenarios'].items():
+        old = a['scenarios'].get(name)
+        if not old:
+            continue
+        cells = [f"{new['rps']:.1f} ({delta(old['rps'], new['rps'])})"]
+        for pct in ('p50', 'p95', 'p99'):
+            value_old, value_new = old['latency_ms'][pct], new['latency_ms'][pct]
+            cells.append(f'{value_new:.1f} ({delta(value_old, value_new)})')
+        print(f'{name:<16} ' + ' '.join(f'{cell:>16}' for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenarios', nargs='*', help='Escenarios a ejecutar (por defecto todos)')
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help='Hilos concurrentes por escenario')
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help='Segundos medidos por escenario')
+    parser.add_argument('--warmup', type=float, default=2.0, help='Segundos de calentamiento (no medidos)')
+    parser.add_argument('--port', type=int, default=8000, help='Puerto de la aplicación')
+    parser.add_argument('--target', help='URL de una aplicación ya arrancada (no arranca procesos)')
+    parser.add_argument('--output', help='Archivo JSON de resultados (por defecto bench/results/)')
+    parser.add_argument('--compare', nargs=2, metavar=('A', 'B'), help='Compara dos resultados y sale')
+    from bench.upstream_stub import add_arguments
+    add_arguments(parser.add_argument_group('doble de la API'), port_option='--stub-port')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': 'bench.settings',
+        'BENCH_UPSTREAM_URL': f'http://127.0.0.1:{args.stub_port}/api/v1/',
+        'PYTHONPATH': os.pathsep.join(filter(None, [str(PROJECT_DIR), os.environ.get('PYTHONPATH')])),
+    }
+    os.environ.update(env)
+    sys.path.insert(0, str(PROJECT_DIR))
+    import django
+    django.setup()
+
+    from bench.scenarios import SCENARIOS, Context
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(sorted(unknown))}")
+
+    prepare_database()
+    processes = [] if args.target else start_processes(args, env)
+    try:
+        ctx = Context(base_url=args.target or f'http://127.0.0.1:{args.port}', products=args.products)
+        results = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'git_commit': git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'args': {k: v for k, v in vars(args).items() if k != 'compare'},
+            },
+            'scenarios': {},
+        }
+        for name in names:
+            results['scenarios'][name] = run_scenario(
+                SCENARIOS[name], ctx, args.concurrency, args.duration, args.warmup,
+            )
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    print_results(results)
+    output = Path(args.output) if args.output else RESULTS_DIR / (
+        datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ') + f"-{results['meta']['git_commit'] or 'local'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f'Resultados guardados en {output}')
+
+
+if __name__ == '__main__':
+    main()
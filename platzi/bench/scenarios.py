@@ -0,0 +1,117 @@
+"""
+Escenarios de carga.
+
+Cada escenario es una función ``(client, ctx) -> requests.Response`` que hace
+una petición a la aplicación. ``client`` es una ``requests.Session`` propia
+de cada hilo (ya autenticada si el escenario lo requiere) y ``ctx`` es el
+Context compartido con la URL base y los datos del usuario de benchmark.
+"""
+import random
+from dataclasses import dataclass, field
+
+from django.urls import reverse
+
+from platziapp import views
+
+BENCH_USERNAME = 'bench'
+BENCH_PASSWORD = 'bench-password-123'
+
+
+@dataclass
+class Scenario:
+    name: str
+    func: object
+    login: bool = True
+    expect: tuple = (200,)
+
+
+SCENARIOS = {}
+
+
+def scenario(name, login=True, expect=(200,)):
+    """Registra un escenario con el nombre ``name``."""
+    def decorator(func):
+        SCENARIOS[name] = Scenario(name, func, login, expect)
+        return func
+    return decorator
+
+
+@dataclass
+class Context:
+    base_url: str
+    products: int
+    username: str = BENCH_USERNAME
+    password: str = BENCH_PASSWORD
+    rng: random.Random = field(default_factory=random.Random)
+
+    def url(self, view_name, *args):
+        return self.base_url.rstrip('/') + reverse(view_name, args=args)
+
+    def random_product_id(self):
+        return self.rng.randint(1, self.products)
+
+
+def login(client, ctx):
+    """Inicia sesión por el formulario web (cookie de sesión + CSRF)."""
+    login_url = ctx.url('accounts:login')
+    client.get(login_url)
+    response = client.post(login_url, data={
+        'username': ctx.username,
+        'password': ctx.password,
+        'csrfmiddlewaretoken': client.cookies.get('csrftoken', ''),
+    }, allow_redirects=False)
+    if response.status_code != 302:
+        raise RuntimeError(f'No se pudo iniciar sesión (HTTP {response.status_code})')
+
+
+@scenario('home')
+def home(client, ctx):
+    return client.get(ctx.url('platziapp:home'))
+
+
+@scenario('product_cards')
+def product_cards(client, ctx):
+    cursor = views.encode_cursor(ctx.rng.randrange(0, ctx.products, 24))
+    return client.get(ctx.url('platziapp:product_cards'), params={'cursor': cursor})
+
+
+@scenario('product_detail')
+def product_detail(client, ctx):
+    return client.get(ctx.url('platziapp:product_detail', ctx.random_product_id()))
+
+
+@scenario('create_product', expect=(302,))
+def create_product(client, ctx):
+    return client.post(ctx.url('platziapp:create_product'), data={
+        'title': f'Bench product {ctx.rng.randrange(10**6)}',
+        'price': '42',
+        'description': 'Producto creado por el benchmark',
+        'category_id': '1',
+    }, allow_redirects=False)
+
+
+@scenario('login_view', login=False, expect=(302,))
+def login_view(client, ctx):
+    login_url = ctx.url('accounts:login')
+    if 'csrftoken' not in client.cookies:
+        client.get(login_url)
+    return client.post(login_url, data={
+        'username': ctx.username,
+        'password': ctx.password,
+        'csrfmiddlewaretoken': client.cookies.get('csrftoken', ''),
+    }, allow_redirects=False)
+
+
+@scenario('login_api', login=False)
+def login_api(client, ctx):
+    # Sin cookies: con sesión abierta DRF exigiría el token CSRF
+    client.cookies.clear()
+    return client.post(ctx.url('accounts:api_login'), json={
+        'username': ctx.username,
+        'password': ctx.password,
+    })
+
+
+@scenario('profile_api')
+def profile_api(client, ctx):
+    return client.get(ctx.url('accounts:api_profile'), headers={'Accept': 'application/json'})
@@ -0,0 +1,74 @@
+"""
+Microbenchmark de serialización JSON de la API.
+
+Compara el JSONRenderer de DRF con platzi.renderers.FastJSONRenderer sobre
+listados de productos con el formato de la API real: tiempo por respuesta,
+memoria asignada (pico de tracemalloc) y bloques asignados. También mide el
+pico de memoria de iter_json_array (el array por trozos) frente a construir
+todo el cuerpo.
+
+Uso (desde el directorio que contiene manage.py):
+    python -m bench.serialization
+    python -m bench.serialization --products 5000 --repeat 20
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+
+def measure(func, repeat):
+    """Mediana del tiempo (ms) y pico/bloques de memoria de una llamada."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = func()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+    del result
+    return timings[len(timings) // 2], peak, blocks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=1000, help='Productos del listado')
+    parser.add_argument('--repeat', type=int, default=10, help='Repeticiones para medir el tiempo')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bench.settings')
+    import django
+    django.setup()
+
+    from rest_framework.renderers import JSONRenderer
+
+    from bench.upstream_stub import Catalog
+    from platzi import renderers
+
+    products = Catalog(args.products, 10, 'http://127.0.0.1:8765').list()
+    print(f'{args.products} productos, orjson {"disponible" if renderers.orjson else "no instalado"}')
+
+    print(f"{'renderer':<22} {'ms/resp':>9} {'pico KiB':>10} {'bloques':>9}")
+    for name, renderer in (('JSONRenderer', JSONRenderer()), ('FastJSONRenderer', renderers.FastJSONRenderer())):
+        ms, peak, blocks = measure(lambda: renderer.render(products, 'application/json', {}), args.repeat)
+        print(f'{name:<22} {ms:>9.2f} {peak / 1024:>10.1f} {blocks:>9}')
+
+    def consume_stream():
+        size = 0
+        for chunk in renderers.iter_json_array(iter(products)):
+            size += len(chunk)
+        return size
+
+    ms, peak, blocks = measure(consume_stream, args.repeat)
+    print(f"{'StreamingJSON':<22} {ms:>9.2f} {peak / 1024:>10.1f} {blocks:>9}")
+
+
+if __name__ == '__main__':
+    main()
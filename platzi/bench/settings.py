@@ -0,0 +1,37 @@
+"""
+Configuración de Django para los benchmarks.
+
+Parte de platzi/settings.py y solo cambia lo necesario para correr sin red:
+SQLite local en lugar de PostgreSQL en RDS y la API de productos apuntando
+al doble local (bench/upstream_stub.py).
+"""
+import os
+
+from platzi.settings import *  # noqa: F401,F403
+from platzi.settings import BASE_DIR, REST_FRAMEWORK
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('BENCH_DB_PATH', str(BASE_DIR / 'bench' / 'bench.sqlite3')),
+    }
+}
+
+# API de productos simulada (ver bench/upstream_stub.py)
+PLATZI_API_BASE_URL = os.getenv('BENCH_UPSTREAM_URL', 'http://127.0.0.1:8765/api/v1/')
+
+# Las imágenes las sirve el doble local (127.0.0.1)
+IMAGE_ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+IMAGE_ALLOW_PRIVATE_ADDRESSES = True
+
+# Sin throttling: el generador de carga hace miles de peticiones por minuto
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_CLASSES': [],
+    # Como en producción (DEBUG=False): sin BrowsableAPIRenderer
+    'DEFAULT_RENDERER_CLASSES': ['platzi.renderers.FastJSONRenderer'],
+}
+
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_SAMPLE_RATE', '0.1'))
@@ -0,0 +1,117 @@
+import threading
+
+import requests
+from django.test import SimpleTestCase
+
+from .run import percentile, run_scenario
+from .scenarios import Context, Scenario
+from .upstream_stub import make_server
+
+
+class StubServerMixin:
+    """Doble de la API en un puerto libre, en un hilo aparte."""
+
+    stub_options = {}
+
+    def setUp(self):
+        super().setUp()
+        server = make_server(port=0, products=12, categories=3, **self.stub_options)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.base_url = f'http://127.0.0.1:{server.server_address[1]}'
+        self.session = requests.Session()
+        self.addCleanup(self.session.close)
+
+    def api(self, method, path, **kwargs):
+        return self.session.request(method, f'{self.base_url}/api/v1/{path}', timeout=5, **kwargs)
+
+
+class UpstreamStubTests(StubServerMixin, SimpleTestCase):
+    """Doble local de la API de productos (bench/upstream_stub.py)."""
+
+    def test_pagination_and_category_filter(self):
+        first = self.api('GET', 'products', params={'offset': 0, 'limit': 5}).json()
+        rest = self.api('GET', 'products', params={'offset': 5, 'limit': 50}).json()
+        in_category = self.api('GET', 'products', params={'categoryId': 2}).json()
+
+        self.assertEqual([item['id'] for item in first + rest], list(range(1, 13)))
+        self.assertTrue(in_category)
+        self.assertTrue(all(item['category']['id'] == 2 for item in in_category))
+
+    def test_etag_revalidation(self):
+        response = self.api('GET', 'products/3')
+
+        revalidated = self.api('GET', 'products/3', headers={'If-None-Match': response.headers['ETag']})
+
+        self.assertTrue(response.headers['ETag'].startswith('W/"'))
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b'')
+
+    def test_create_update_and_delete(self):
+        created = self.api('POST', 'products', json={'title': 'Silla', 'price': 10, 'categoryId': 1}).json()
+        self.api('PUT', f"products/{created['id']}", json={'price': 20})
+
+        self.assertEqual(created['id'], 13)
+        self.assertEqual(self.api('GET', 'products/13').json()['price'], 20)
+        self.assertEqual(self.api('DELETE', 'products/13').json(), True)
+        # Como la API real: 400 para un producto que no existe
+        self.assertEqual(self.api('GET', 'products/13').status_code, 400)
+
+    def test_catalog_is_deterministic(self):
+        titles = [item['title'] for item in self.api('GET', 'products').json()]
+
+        other = make_server(port=0, products=12, categories=3)
+        self.addCleanup(other.server_close)
+        self.assertEqual(titles, [product['title'] for product in other.RequestHandlerClass.catalog.list()])
+
+
+class StubErrorsTests(StubServerMixin, SimpleTestCase):
+    """Errores simulados del doble."""
+
+    stub_options = {'error_rate': 1.0}
+
+    def test_error_rate(self):
+        response = self.api('GET', 'products')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['statusCode'], 500)
+
+
+class HarnessTests(StubServerMixin, SimpleTestCase):
+    """Generador de carga (bench/run.py)."""
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_run_scenario_counts_requests_and_errors(self):
+        def categories(client, ctx):
+            return client.get(f'{ctx.base_url}/api/v1/categories', timeout=5)
+
+        def missing(client, ctx):
+            return client.get(f'{ctx.base_url}/api/v1/products/999', timeout=5)
+
+        ctx = Context(base_url=self.base_url, products=12)
+        ok = run_scenario(Scenario('categories', categories, login=False), ctx, 2, 0.2, 0.05)
+        failing = run_scenario(Scenario('missing', missing, login=False), ctx, 2, 0.2, 0.05)
+
+        self.assertGreater(ok['requests'], 0)
+        self.assertEqual(ok['errors'], 0)
+        self.assertEqual(ok['concurrency'], 2)
+        latency = ok['latency_ms']
+        self.assertTrue(latency['p50'] <= latency['p95'] <= latency['p99'] <= latency['max'])
+        self.assertEqual(failing['errors'], failing['requests'])
+
+    def test_failed_login_aborts_instead_of_hanging(self):
+        # El doble no tiene /login/: ningún hilo puede iniciar sesión
+        scenario = Scenario('home', lambda client, ctx: None, login=True)
+        ctx = Context(base_url=self.base_url, products=12)
+
+        with self.assertRaisesMessage(RuntimeError, 'no pudo empezar'):
+            run_scenario(scenario, ctx, 3, 0.1, 0.0)
@@ -0,0 +1,291 @@
+"""
+Doble local de la API de productos (api.escuelajs.co/api/v1).
+
+Implementa los endpoints que usa la aplicación con un catálogo generado de
+forma determinista, latencia y tasa de error configurables:
+
+    GET    /api/v1/products[?offset=&limit=&categoryId=]
+    GET    /api/v1/products/<id>
+    POST   /api/v1/products
+    PUT    /api/v1/products/<id>
+    DELETE /api/v1/products/<id>
+    GET    /api/v1/categories
+    GET    /api/v1/categories/<id>/products
+    GET    /images/<id>.jpg
+
+Uso:
+    python -m bench.upstream_stub --port 8765 --products 200 --latency-ms 40 --error-rate 0.01
+    python -m bench.upstream_stub --latency-ms 10 --slow-rate 0.05 --slow-ms 800   # cola lenta (p99)
+"""
+import argparse
+import hashlib
+import io
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = '/api/v1/'
+
+WORDS = (
+    'classic', 'modern', 'wireless', 'leather', 'cotton', 'smart', 'vintage',
+    'portable', 'ergonomic', 'premium', 'compact', 'organic', 'sport', 'urban',
+    'shirt', 'sneakers', 'headphones', 'backpack', 'watch', 'lamp', 'chair',
+    'jacket', 'keyboard', 'bottle', 'speaker', 'camera', 'table', 'hoodie',
+)
+
+
+class Catalog:
+    """Catálogo en memoria con el mismo formato que la API real."""
+
+    def __init__(self, products, categories, base_url, seed=42):
+        rng = random.Random(seed)
+        epoch = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.lock = threading.Lock()
+        self.base_url = base_url
+        self.categories = [
+            {
+                'id': cid,
+                'name': f'Category {cid}',
+                'slug': f'category-{cid}',
+                'image': f'{base_url}/images/c{cid}.jpg',
+            }
+            for cid in range(1, categories + 1)
+        ]
+        self.products = {}
+        for pid in range(1, products + 1):
+            title = ' '.join(rng.choice(WORDS) for _ in range(3)).title()
+            updated = epoch + timedelta(minutes=rng.randrange(60 * 24 * 365))
+            self.products[pid] = {
+                'id': pid,
+                'title': f'{title} {pid}',
+                'slug': f'product-{pid}',
+                'price': rng.randrange(5, 500),
+                'description': ' '.join(rng.choice(WORDS) for _ in range(30)),
+                'category': self.categories[rng.randrange(categories)],
+                'images': [f'{base_url}/images/{pid}.jpg'],
+                'creationAt': epoch.isoformat().replace('+00:00', '.000Z'),
+                'updatedAt': updated.isoformat().replace('+00:00', '.000Z'),
+            }
+        self.next_id = products + 1
+
+    def list(self, offset=0, limit=None, category_id=None):
+        with self.lock:
+            products = list(self.products.values())
+        if category_id is not None:
+            products = [p for p in products if p['category']['id'] == category_id]
+        end = None if limit is None else offset + limit
+        return products[offset:end]
+
+    def save(self, data, pid=None):
+        category_id = int(data.get('categoryId') or 1)
+        category = self.categories[(category_id - 1) % len(self.categories)]
+        now = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+        with self.lock:
+            if pid is None:
+                pid = self.next_id
+                self.next_id += 1
+                product = {'id': pid, 'creationAt': now, 'slug': f'product-{pid}'}
+            else:
+                product = self.products[pid]
+            product.update({
+                'title': data.get('title', product.get('title', '')),
+                'price': data.get('price', product.get('price', 0)),
+                'description': data.get('description', product.get('description', '')),
+                'images': data.get('images', product.get('images', [])),
+                'category': category,
+                'updatedAt': now,
+            })
+            self.products[pid] = product
+        return product
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'PlatziUpstreamStub/1.0'
+
+    # Inyectados por make_server()
+    catalog = None
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    slow_rate = 0.0
+    slow = 0.0
+    image_cache = {}
+
+    def log_message(self, format, *args):
+        pass  # Sin logs por petición: distorsionan las mediciones
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        if self.command == 'GET' and status == 200:
+            # ETag débil como el de Express (la API real): permite revalidar con 304
+            etag = f'W/"{len(body):x}-{hashlib.sha1(body).hexdigest()[:27]}"'
+            if etag in self.headers.get('If-None-Match', ''):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header('ETag', etag)
+        else:
+            self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        """Cuerpo JSON de la petición, o None si no es JSON (p. ej. un formulario)."""
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return None
+
+    def simulate(self):
+        """Aplica la latencia simulada; devuelve False si toca simular un error."""
+        delay = self.latency + random.uniform(0, self.jitter)
+        if self.slow_rate and random.random() < self.slow_rate:
+            delay += self.slow  # Respuesta ocasional muy lenta (cola de latencia)
+        if delay:
+            time.sleep(delay)
+        if self.error_rate and random.random() < self.error_rate:
+            self.send_json(500, {'message': 'Simulated upstream error', 'statusCode': 500})
+            return False
+        return True
+
+    def route(self, method):
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        # Leer siempre el cuerpo: si se queda en el socket, corrompe la
+        # siguiente petición de la misma conexión keep-alive
+        payload = self.read_json() if method in ('POST', 'PUT') else None
+
+        if method == 'GET' and url.path.startswith('/images/'):
+            return self.send_image(url.path)
+        if not url.path.startswith(API_PREFIX):
+            return self.send_json(404, {'message': 'Not Found', 'statusCode': 404})
+        if not self.simulate():
+            return
+        if method in ('POST', 'PUT') and payload is None:
+            return self.send_json(400, {'message': 'Invalid JSON body', 'statusCode': 400})
+
+        path = url.path[len(API_PREFIX):].strip('/')
+        catalog = self.catalog
+
+        if path == 'products':
+            if method == 'GET':
+                category_id = query.get('categoryId')
+                products = catalog.list(
+                    offset=int(query.get('offset', 0)),
+                    limit=int(query['limit']) if 'limit' in query else None,
+                    category_id=int(category_id) if category_id else None,
+                )
+                return self.send_json(200, products)
+            if method == 'POST':
+                return self.send_json(201, catalog.save(payload))
+
+        match = re.fullmatch(r'products/(\d+)', path)
+        if match:
+            pid = int(match.group(1))
+            if pid not in catalog.products:
+                return self.send_json(400, {'message': 'Could not find any entity', 'statusCode': 400})
+            if method == 'GET':
+                return self.send_json(200, catalog.products[pid])
+            if method == 'PUT':
+                return self.send_json(200, catalog.save(payload, pid))
+            if method == 'DELETE':
+                with catalog.lock:
+                    catalog.products.pop(pid, None)
+                return self.send_json(200, True)
+
+        if path == 'categories' and method == 'GET':
+            return self.send_json(200, catalog.categories)
+
+        match = re.fullmatch(r'categories/(\d+)/products', path)
+        if match and method == 'GET':
+            return self.send_json(200, catalog.list(category_id=int(match.group(1))))
+
+        return self.send_json(404, {'message': 'Not Found', 'statusCode': 404})
+
+    def send_image(self, path):
+        """Imagen JPEG 640x480 generada con Pillow (una por color, cacheada)."""
+        key = sum(path.encode()) % 16
+        body = self.image_cache.get(key)
+        if body is None:
+            from PIL import Image
+
+            color = ((key * 53) % 256, (key * 97) % 256, (key * 31) % 256)
+            buffer = io.BytesIO()
+            Image.new('RGB', (640, 480), color).save(buffer, 'JPEG', quality=85)
+            body = self.image_cache[key] = buffer.getvalue()
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.route('GET')
+
+    def do_POST(self):
+        self.route('POST')
+
+    def do_PUT(self):
+        self.route('PUT')
+
+    def do_DELETE(self):
+        self.route('DELETE')
+
+
+def make_server(host='127.0.0.1', port=8765, products=200, categories=5,
+                latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, slow_rate=0.0, slow_ms=0.0):
+    """Crea el servidor del doble (sin arrancarlo)."""
+    handler = type('ConfiguredStubHandler', (StubHandler,), {
+        'catalog': Catalog(products, categories, f'http://{host}:{port}'),
+        'latency': latency_ms / 1000,
+        'jitter': jitter_ms / 1000,
+        'error_rate': error_rate,
+        'slow_rate': slow_rate,
+        'slow': slow_ms / 1000,
+        'image_cache': {},
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def add_arguments(parser, port_option='--port'):
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument(port_option, type=int, default=8765, help='Puerto del doble')
+    parser.add_argument('--products', type=int, default=200, help='Tamaño del catálogo')
+    parser.add_argument('--categories', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latencia base por petición')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Latencia extra aleatoria (uniforme)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fracción de respuestas 500')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='Fracción de respuestas lentas')
+    parser.add_argument('--slow-ms', type=float, default=0.0, help='Latencia extra de las respuestas lentas')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = make_server(
+        args.host, args.port, args.products, args.categories,
+        args.latency_ms, args.jitter_ms, args.error_rate, args.slow_rate, args.slow_ms,
+    )
+    print(f'Upstream stub escuchando en http://{args.host}:{args.port}{API_PREFIX}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
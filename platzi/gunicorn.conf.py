@@ -0,0 +1,16 @@
+"""
+Configuración de gunicorn (Procfile: ``gunicorn -c gunicorn.conf.py ...``).
+
+Con PROMETHEUS_MULTIPROC_DIR cada worker escribe sus métricas en archivos
+propios. Los gauges 'livesum' (concurrencia, peticiones en curso) solo deben
+sumar los workers vivos: al salir un worker (reinicio, max_requests, caída)
+se marcan como muertos sus archivos para que /metrics deje de contarlos.
+"""
+import os
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,202 @@
+"""
+Compresión de respuestas dinámicas (HTML de las plantillas, JSON de la API).
+
+CompressionMiddleware negocia Brotli o gzip según ``Accept-Encoding`` y solo
+comprime respuestas de los tipos de COMPRESSION_CONTENT_TYPES que superen
+COMPRESSION_MIN_SIZE bytes. Las respuestas en streaming se comprimen trozo a
+trozo sin acumularlas en memoria; si traen Content-Length (FileResponse) se
+les aplica también el umbral. Los tipos que ya van comprimidos (imágenes,
+archivos .gz, fuentes woff...) no se tocan aunque figuren en la lista.
+
+El resultado comprimido se guarda en la caché 'compression' indexado por el
+hash del cuerpo, así una página servida desde caché (cache_page) o un JSON
+que se repite no se vuelven a comprimir.
+
+BREACH: si la respuesta lleva un token CSRF (la plantilla usó {% csrf_token %}
+o get_token(), o es una página guardada que lo incluye) se usa siempre gzip con un nombre de archivo de longitud aleatoria en la
+cabecera (igual que GZipMiddleware de Django), que oculta la longitud exacta,
+y no se reutiliza el resultado. Django además enmascara el token en cada
+petición.
+"""
+import gzip
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+from platzi.staticfiles import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # Brotli es opcional: sin él solo se usa gzip
+    brotli = None
+
+# Relleno aleatorio máximo (bytes) contra BREACH, igual que GZipMiddleware
+MAX_RANDOM_BYTES = 100
+
+# Tipos que ya van comprimidos: volver a comprimirlos solo gasta CPU
+COMPRESSED_CONTENT_TYPES = {
+    'application/gzip',
+    'application/x-gzip',
+    'application/x-brotli',
+    'application/x-bzip2',
+    'application/x-xz',
+    'application/zstd',
+    'application/zip',
+    'application/pdf',
+    'font/woff',
+    'font/woff2',
+}
+COMPRESSED_PREFIXES = ('image/', 'audio/', 'video/')
+
+# Campo oculto que {% csrf_token %} deja en los formularios
+CSRF_FIELD = b'csrfmiddlewaretoken'
+
+
+def already_compressed(content_type):
+    if content_type == 'image/svg+xml':  # SVG es texto
+        return False
+    return content_type in COMPRESSED_CONTENT_TYPES or content_type.startswith(COMPRESSED_PREFIXES)
+
+
+def brotli_sequence(sequence, quality):
+    """Comprime un iterable de bytes con Brotli emitiendo cada trozo al llegar."""
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def gzip_sequence(sequence, level):
+    """Como django.utils.text.compress_sequence pero con nivel configurable."""
+    buffer = _StreamBuffer()
+    with gzip.GzipFile(mode='wb', compresslevel=level, fileobj=buffer, mtime=0) as stream:
+        for chunk in sequence:
+            stream.write(chunk)
+            stream.flush()
+            data = buffer.read()
+            if data:
+                yield data
+    yield buffer.read()
+
+
+class _StreamBuffer:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    def read(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+    def flush(self):
+        pass
+
+
+class CompressionMiddleware:
+    """
+    Compresión gzip/Brotli con umbral de tamaño y lista de tipos permitidos.
+
+    Debe ir al principio de MIDDLEWARE, antes de cualquier middleware que lea o
+    modifique el cuerpo. Si se usa la caché de páginas de Django, colocarlo
+    después de UpdateCacheMiddleware para que se guarde la versión comprimida.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+        self.content_types = set(settings.COMPRESSION_CONTENT_TYPES)
+        self.gzip_level = settings.COMPRESSION_GZIP_LEVEL
+        self.brotli_quality = settings.COMPRESSION_BROTLI_QUALITY
+        self.cache = caches['compression']
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in self.content_types or already_compressed(content_type):
+            return response
+        if self.body_length(response) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        breach_sensitive = self.contains_csrf_token(request, response, content_type)
+
+        if brotli is not None and 'br' in accepted and not breach_sensitive:
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+        else:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                response.streaming_content, encoding, breach_sensitive,
+            )
+            del response['Content-Length']
+        else:
+            compressed = self.compress(response.content, encoding, breach_sensitive)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # El cuerpo ya no es idéntico byte a byte: la ETag pasa a ser débil
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def body_length(response):
+        if not response.streaming:
+            return len(response.content)
+        try:
+            return int(response['Content-Length'])
+        except (KeyError, ValueError):
+            return float('inf')  # Longitud desconocida: se comprime
+
+    @staticmethod
+    def contains_csrf_token(request, response, content_type):
+        # get_token() marca la cookie CSRF para reenviarla; CsrfViewMiddleware
+        # la añade a la respuesta y quita la marca, así que se miran las dos
+        if settings.CSRF_COOKIE_NAME in response.cookies or request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+            return True
+        if content_type != 'text/html':
+            return False
+        # Una página servida desde caché (cache_page) trae el token incrustado
+        # sin volver a llamar a get_token(). El HTML en streaming no se puede
+        # inspeccionar y se trata como si lo llevara
+        return response.streaming or CSRF_FIELD in response.content
+
+    def compress(self, body, encoding, breach_sensitive):
+        if breach_sensitive:
+            return compress_string(body, max_random_bytes=MAX_RANDOM_BYTES)
+
+        key = f'{encoding}:{hashlib.sha1(body).hexdigest()}'
+        compressed = self.cache.get(key)
+        if compressed is None:
+            if encoding == 'br':
+                compressed = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+            self.cache.set(key, compressed)
+        return compressed
+
+    def compress_stream(self, sequence, encoding, breach_sensitive):
+        if breach_sensitive:
+            return compress_sequence(sequence, max_random_bytes=MAX_RANDOM_BYTES)
+        if encoding == 'br':
+            return brotli_sequence(sequence, self.brotli_quality)
+        return gzip_sequence(sequence, self.gzip_level)
@@ -0,0 +1,207 @@
+"""
+Límite de concurrencia adaptativo y descarte de carga (load shedding).
+
+Cuando la API de productos se vuelve lenta, las peticiones se acumulan en
+los hilos del worker hasta que el balanceador corta por timeout y nadie
+recibe respuesta. Este middleware limita las peticiones en curso por grupo
+de rutas (LOAD_SHEDDING_GROUPS) y rechaza las que sobran al momento con
+503 y ``Retry-After``, así las que sí entran terminan a tiempo.
+
+El límite de cada grupo se ajusta solo (AIMD):
+- Cada petición que termina por debajo de la latencia objetivo del grupo
+  (LOAD_SHEDDING_TARGET_LATENCY) con el límite en uso sube el límite en
+  1/límite (aproximadamente +1 por cada "ventana" de peticiones).
+- Una petición lenta o con 5xx lo multiplica por LOAD_SHEDDING_BACKOFF.
+
+Además, si la cabecera ``X-Request-Start`` del balanceador indica que la
+petición ya esperó más de LOAD_SHEDDING_MAX_QUEUE_TIME segundos en cola,
+se descarta sin ejecutarla: el cliente probablemente ya se rindió.
+
+Las vistas de LOAD_SHEDDING_CRITICAL_VIEWS (login, readiness, métricas)
+tienen prioridad: nunca se descartan ni ocupan sitio en los grupos.
+
+En las respuestas en streaming (p. ej. la exportación del catálogo) la
+petición ocupa su hueco hasta que se termina de enviar el cuerpo o el
+servidor lo cierra (cliente desconectado).
+
+Los límites son por proceso (cada worker de gunicorn tiene los suyos).
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.urls import Resolver404, resolve
+
+from platzi import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP = 'default'
+
+
+class AIMDLimiter:
+    """Límite de peticiones en curso con incremento aditivo y decremento multiplicativo."""
+
+    def __init__(self, name, initial, minimum, maximum, target_latency, backoff):
+        self.name = name
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.inflight = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Reserva un hueco; False si el grupo está al límite."""
+        with self._lock:
+            if self.inflight >= int(self.limit):
+                return False
+            self.inflight += 1
+            inflight = self.inflight
+        metrics.set_concurrency(self.name, inflight, self.limit)
+        return True
+
+    def release(self, latency, overloaded=False):
+        with self._lock:
+            # Se mide antes de liberar: ¿estaba el límite realmente en uso?
+            saturated = self.inflight * 2 >= self.limit
+            self.inflight -= 1
+            if overloaded or latency > self.target_latency:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+            elif saturated:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            inflight, limit = self.inflight, self.limit
+        metrics.set_concurrency(self.name, inflight, limit)
+
+
+class ReleasingStream:
+    """
+    Cuerpo en streaming que libera el hueco del limitador al agotarse o al
+    cerrarse. Es un iterador y no un generador porque el servidor puede
+    cerrar el cuerpo sin haberlo empezado a leer, y el ``finally`` de un
+    generador sin empezar nunca se ejecuta.
+    """
+
+    def __init__(self, content, release):
+        self.content = iter(content)
+        self.release = release
+        self.released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.content)
+        except StopIteration:
+            self.close()
+            raise
+        except BaseException:
+            self.close(overloaded=True)
+            raise
+
+    def close(self, overloaded=False):
+        if self.released:
+            return
+        self.released = True
+        try:
+            if hasattr(self.content, 'close'):
+                self.content.close()
+        finally:
+            self.release(overloaded)
+
+
+def queue_time(request):
+    """
+    Segundos que la petición esperó antes de llegar a Django, según
+    ``X-Request-Start`` (``t=<segundos|milisegundos|microsegundos>``), o None.
+    """
+    value = request.headers.get('X-Request-Start', '')
+    try:
+        started = float(value.removeprefix('t='))
+    except ValueError:
+        return None
+    # Cada proxy usa una unidad distinta: se deduce de la magnitud
+    while started > 1e11:
+        started /= 1000
+    return max(0.0, time.time() - started)
+
+
+class AdaptiveConcurrencyMiddleware:
+    """Limita la concurrencia por grupo de rutas y descarta el exceso con 503."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.critical = frozenset(settings.LOAD_SHEDDING_CRITICAL_VIEWS)
+        self.groups = {
+            view_name: group
+            for group, view_names in settings.LOAD_SHEDDING_GROUPS.items()
+            for view_name in view_names
+        }
+        targets = settings.LOAD_SHEDDING_TARGET_LATENCY
+        self.limiters = {
+            group: AIMDLimiter(
+                group,
+                initial=settings.LOAD_SHEDDING_INITIAL_LIMIT,
+                minimum=settings.LOAD_SHEDDING_MIN_LIMIT,
+                maximum=settings.LOAD_SHEDDING_MAX_LIMIT,
+                target_latency=targets.get(group, targets[DEFAULT_GROUP]),
+                backoff=settings.LOAD_SHEDDING_BACKOFF,
+            )
+            for group in [*settings.LOAD_SHEDDING_GROUPS, DEFAULT_GROUP]
+        }
+
+    def __call__(self, request):
+        if not settings.LOAD_SHEDDING_ENABLED:
+            return self.get_response(request)
+
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return self.get_response(request)
+        # Para que las métricas y los logs de una petición descartada lleven la vista
+        request.resolver_match = match
+        if match.view_name in self.critical:
+            return self.get_response(request)
+
+        group = self.groups.get(match.view_name, DEFAULT_GROUP)
+        waited = queue_time(request)
+        if waited is not None and waited > settings.LOAD_SHEDDING_MAX_QUEUE_TIME:
+            return self.shed(request, group, 'queue_time')
+
+        limiter = self.limiters[group]
+        if not limiter.acquire():
+            return self.shed(request, group, 'concurrency')
+
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            limiter.release(time.perf_counter() - start, overloaded=True)
+            raise
+        overloaded = response.status_code >= 500
+        if response.streaming:
+            # El cuerpo se genera después de la vista: el hueco se libera (y se
+            # mide la latencia) cuando se termina de enviar o el servidor lo cierra
+            response.streaming_content = ReleasingStream(
+                response.streaming_content,
+                lambda failed: limiter.release(time.perf_counter() - start, overloaded or failed),
+            )
+        else:
+            limiter.release(time.perf_counter() - start, overloaded)
+        return response
+
+    def shed(self, request, group, reason):
+        metrics.observe_shed(group, reason)
+        logger.info('Petición descartada por sobrecarga (%s, grupo %s)', reason, group)
+        message = 'El servicio está sobrecargado, inténtalo de nuevo en unos segundos'
+        if request.path_info.startswith('/api/'):
+            response = JsonResponse({'success': False, 'error': message}, status=503)
+        else:
+            response = HttpResponse(message, status=503, content_type='text/plain; charset=utf-8')
+        response['Retry-After'] = str(settings.LOAD_SHEDDING_RETRY_AFTER)
+        response['Cache-Control'] = 'no-store'
+        return response
@@ -0,0 +1,77 @@
+"""
+Plazo máximo (deadline) por petición para las llamadas a servicios externos.
+
+DeadlineMiddleware fija al llegar la petición un plazo de
+REQUEST_DEADLINE segundos (o el de la vista en REQUEST_DEADLINES) contado
+desde que el balanceador la recibió (cabecera ``X-Request-Start``, si
+viene). Cada llamada a la API usa como timeout lo que queda del plazo
+(timeout()), nunca más que su timeout propio, así que una página no puede
+sumar varios timeouts completos. Las partes opcionales (p. ej. los
+productos relacionados) se saltan si queda poco (has_budget()).
+
+El plazo vive en una ContextVar: lo ven también los hilos que reciben una
+copia del contexto (peticiones en paralelo y hedging de catalog). Fuera de
+una petición (comandos, worker) no hay plazo y se usan los timeouts de siempre.
+"""
+import contextvars
+import time
+
+import requests
+from django.conf import settings
+
+from platzi.concurrency import queue_time
+
+# Instante (time.monotonic) en que vence el plazo de la petición en curso
+_deadline = contextvars.ContextVar('request_deadline', default=None)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Se agotó el plazo de la petición antes de hacer la llamada."""
+
+
+def remaining():
+    """Segundos que quedan del plazo, o None si no hay plazo."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def timeout(default):
+    """
+    Timeout para la siguiente llamada: ``default`` recortado a lo que queda
+    del plazo. Lanza DeadlineExceeded si ya no queda nada.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded('Se agotó el plazo de la petición')
+    return min(default, left) if default is not None else left
+
+
+def has_budget(seconds):
+    """¿Quedan al menos ``seconds`` del plazo? (siempre True sin plazo)."""
+    left = remaining()
+    return left is None or left >= seconds
+
+
+class DeadlineMiddleware:
+    """Fija el plazo de la petición según la vista (REQUEST_DEADLINES)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Lo que ya esperó en la cola del balanceador cuenta como gastado
+        request._deadline_start = time.monotonic() - (queue_time(request) or 0.0)
+        token = _deadline.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            _deadline.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = settings.REQUEST_DEADLINES.get(request.resolver_match.view_name, settings.REQUEST_DEADLINE)
+        if budget is not None:
+            _deadline.set(request._deadline_start + budget)
@@ -0,0 +1,215 @@
+"""
+Logging sin bloqueos para las peticiones.
+
+Los loggers de la aplicación escriben en QueueHandler, que solo mete el
+registro en una cola en memoria; un hilo en segundo plano (QueueListener) lo
+formatea y lo escribe en los handlers reales (archivo, consola). Así una
+escritura lenta en disco o en stdout no frena el hilo que atiende la petición.
+Si la cola se llena, los registros se descartan en lugar de esperar.
+
+- RequestContextMiddleware: asigna un id a cada petición (o reutiliza la
+  cabecera X-Request-ID) y la guarda en un contextvar.
+- RequestContextFilter: añade a cada registro request_id, user_id, view y el
+  tiempo en la API de productos de la petición en curso.
+- SamplingFilter: deja pasar solo una fracción de los registros DEBUG/INFO.
+- JSONFormatter: una línea JSON por registro.
+- FileHandler: no toca el disco hasta el primer registro.
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from platzi import timing
+
+# Petición en curso (para añadir su contexto a los registros de log)
+_request = contextvars.ContextVar('log_request', default=None)
+
+# Ids de petición aceptados desde la cabecera X-Request-ID (p. ej. del balanceador)
+REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+# Atributos estándar de LogRecord: el resto son campos "extra" y van al JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def current_request_id():
+    request = _request.get()
+    return getattr(request, 'request_id', None)
+
+
+class RequestContextMiddleware:
+    """
+    Asigna un id a la petición y la deja disponible para los registros de log.
+
+    Debe ir el primero en MIDDLEWARE para que el contexto cubra también los
+    logs de los demás middlewares.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        request.request_id = request_id if REQUEST_ID.match(request_id) else uuid.uuid4().hex
+        token = _request.set(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request.reset(token)
+        response['X-Request-ID'] = request.request_id
+        return response
+
+
+class RequestContextFilter(logging.Filter):
+    """Añade el contexto de la petición en curso al registro."""
+
+    def filter(self, record):
+        request = _request.get()
+        if request is not None:
+            record.request_id = request.request_id
+            # Solo si la autenticación ya cargó el usuario: no lanzar una consulta
+            user = getattr(request, '_cached_user', None)
+            if user is not None and not hasattr(record, 'user_id'):
+                record.user_id = user.pk
+            match = getattr(request, 'resolver_match', None)
+            if match is not None and not hasattr(record, 'view'):
+                record.view = match.view_name
+
+        breakdown = timing._breakdown.get()
+        if breakdown is not None and 'upstream' in breakdown.durations and not hasattr(record, 'upstream_ms'):
+            record.upstream_ms = round(breakdown.durations['upstream'] * 1000, 1)
+            record.upstream_count = breakdown.counts['upstream']
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Deja pasar una fracción ``rate`` de los registros DEBUG/INFO.
+
+    WARNING y superiores pasan siempre, igual que los loggers de ``exempt``
+    (p. ej. 'platzi.timing', que ya viene muestreado).
+    """
+
+    def __init__(self, rate=1.0, exempt=()):
+        super().__init__()
+        self.rate = float(rate)
+        self.exempt = tuple(exempt)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        if self.exempt and record.name.startswith(self.exempt):
+            return True
+        return random.random() < self.rate
+
+
+class JSONFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los campos extra y de contexto."""
+
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc'] = record.exc_text
+        if record.stack_info:
+            payload['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class FileHandler(logging.FileHandler):
+    """FileHandler que abre el archivo (y crea su directorio) con el primer registro."""
+
+    def __init__(self, filename, mode='a', encoding='utf-8', delay=True, errors=None):
+        super().__init__(filename, mode, encoding, delay, errors)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Encola los registros para que los escriba el hilo de QueueListener.
+
+    ``handlers`` son los nombres de los handlers de LOGGING que hacen la
+    escritura real. dictConfig configura los handlers por orden alfabético,
+    así que su nombre debe ir antes que el de este handler (p. ej. 'queue').
+    El hilo se arranca con el primer registro (y de nuevo en cada proceso
+    hijo tras un fork, p. ej. con varios workers).
+    """
+
+    def __init__(self, handlers, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.targets = []
+        for name in handlers:
+            handler = _get_handler(name)
+            if handler is None:
+                raise ValueError(f'Handler {name!r} no configurado (debe ir antes que el de la cola)')
+            self.targets.append(handler)
+        self.listener = None
+        self.dropped = 0
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self.listener = logging.handlers.QueueListener(self.queue, *self.targets, respect_handler_level=True)
+            self.listener.start()
+            self._pid = os.getpid()
+            atexit.register(self.stop)
+
+    def stop(self):
+        # Vacía la cola antes de salir para no perder los últimos registros
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self._pid = None
+
+    def prepare(self, record):
+        # Lo mínimo en el hilo de la petición: el mensaje final y la traza
+        # (los objetos de la excepción no deben viajar a otro hilo)
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1  # Mejor perder un log que bloquear la petición
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self.start()
+        super().emit(record)
+
+
+def _get_handler(name):
+    get_handler = getattr(logging, 'getHandlerByName', None)  # Python 3.12+
+    if get_handler is not None:
+        return get_handler(name)
+    return logging._handlers.get(name)
@@ -0,0 +1,225 @@
+"""
+Métricas en formato de exposición de Prometheus (endpoint /metrics).
+
+Con varios workers (procesos) en la misma máquina cada proceso escribe sus
+valores en archivos dentro de PROMETHEUS_MULTIPROC_DIR y la vista /metrics
+los agrega al leerlos, de modo que el resultado es el total del host y no el
+del worker que atiende el scrape. Si la variable de entorno no está definida
+(por ejemplo con runserver) se usa el registro en memoria del proceso.
+
+Consultas útiles:
+- Latencia p95 por vista:
+    histogram_quantile(0.95, sum by (le, view) (rate(platzi_http_request_duration_seconds_bucket[5m])))
+- Tasa de error de la API externa por endpoint:
+    sum by (endpoint) (rate(platzi_upstream_requests_total{status=~"5..|error"}[5m]))
+      / sum by (endpoint) (rate(platzi_upstream_requests_total[5m]))
+- Hedging: fracción de peticiones cubiertas y de coberturas que ganan:
+    sum(rate(platzi_upstream_hedges_total[5m])) / sum(rate(platzi_upstream_requests_total{method="GET"}[5m]))
+    sum(rate(platzi_upstream_hedge_wins_total[5m])) / sum(rate(platzi_upstream_hedges_total[5m]))
+- Peticiones descartadas por sobrecarga (platzi/concurrency.py):
+    sum by (group, reason) (rate(platzi_shed_requests_total[5m]))
+- Bloqueos de login por fallos repetidos (accounts/lockout.py):
+    sum by (scope) (rate(platzi_login_lockouts_total[5m]))
+- Ratio de aciertos de caché:
+    sum by (cache) (rate(platzi_cache_requests_total{result="hit"}[5m]))
+      / sum by (cache) (rate(platzi_cache_requests_total[5m]))
+"""
+import os
+import re
+import time
+from contextlib import ExitStack
+
+# El directorio debe existir antes de importar prometheus_client en modo multiproceso
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from rest_framework.exceptions import Throttled
+from rest_framework.views import exception_handler as drf_exception_handler
+
+# Buckets de latencia (segundos) pensados para páginas que llaman a una API externa
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_LATENCY = Histogram(
+    'platzi_http_request_duration_seconds',
+    'Latencia de las peticiones HTTP por vista',
+    ['view', 'method'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    'platzi_http_requests_total',
+    'Peticiones HTTP por vista y código de estado',
+    ['view', 'method', 'status'],
+)
+UPSTREAM_LATENCY = Histogram(
+    'platzi_upstream_request_duration_seconds',
+    'Latencia de las llamadas a la API de productos por endpoint',
+    ['endpoint', 'method'],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_REQUESTS = Counter(
+    'platzi_upstream_requests_total',
+    'Llamadas a la API de productos por endpoint y resultado (código o "error")',
+    ['endpoint', 'method', 'status'],
+)
+CACHE_REQUESTS = Counter(
+    'platzi_cache_requests_total',
+    'Consultas a cachés de la aplicación por resultado (hit/miss)',
+    ['cache', 'result'],
+)
+DB_QUERIES = Counter(
+    'platzi_db_queries_total',
+    'Consultas a la base de datos por vista',
+    ['view'],
+)
+THROTTLED = Counter(
+    'platzi_throttled_requests_total',
+    'Peticiones rechazadas por throttling de DRF por vista',
+    ['view'],
+)
+UPSTREAM_HEDGES = Counter(
+    'platzi_upstream_hedges_total',
+    'Peticiones extra (hedging) enviadas a la API de productos por endpoint',
+    ['endpoint'],
+)
+UPSTREAM_HEDGE_WINS = Counter(
+    'platzi_upstream_hedge_wins_total',
+    'Peticiones extra (hedging) que respondieron antes que la original',
+    ['endpoint'],
+)
+SHED_REQUESTS = Counter(
+    'platzi_shed_requests_total',
+    'Peticiones descartadas por sobrecarga por grupo de rutas y motivo',
+    ['group', 'reason'],
+)
+LOGIN_LOCKOUTS = Counter(
+    'platzi_login_lockouts_total',
+    'Bloqueos de login por intentos fallidos por ámbito (user/ip)',
+    ['scope'],
+)
+# Por proceso; en modo multiproceso se suman los workers vivos (capacidad del host)
+CONCURRENCY_LIMIT = Gauge(
+    'platzi_concurrency_limit',
+    'Límite adaptativo de peticiones en curso por grupo de rutas',
+    ['group'],
+    multiprocess_mode='livesum',
+)
+CONCURRENCY_INFLIGHT = Gauge(
+    'platzi_concurrency_inflight',
+    'Peticiones en curso por grupo de rutas',
+    ['group'],
+    multiprocess_mode='livesum',
+)
+
+# Segmentos numéricos de la ruta (ids) que se agrupan en la etiqueta "endpoint"
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def endpoint_label(path):
+    """Normaliza una ruta de la API: 'products/12?limit=5' -> 'products/{id}'."""
+    path = '/' + path.split('?', 1)[0].strip('/')
+    return _ID_SEGMENT.sub('/{id}', path).lstrip('/')
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    # Sin vista resuelta (404) agrupamos para no disparar la cardinalidad
+    return match.view_name if match else 'unmatched'
+
+
+def observe_upstream(method, path, status, seconds):
+    """Registra una llamada a la API externa (status=None si hubo excepción)."""
+    endpoint = endpoint_label(path)
+    UPSTREAM_LATENCY.labels(endpoint, method).observe(seconds)
+    UPSTREAM_REQUESTS.labels(endpoint, method, str(status) if status else 'error').inc()
+
+
+def observe_hedge(endpoint):
+    UPSTREAM_HEDGES.labels(endpoint).inc()
+
+
+def observe_hedge_win(endpoint):
+    UPSTREAM_HEDGE_WINS.labels(endpoint).inc()
+
+
+def observe_cache(cache, hit):
+    """Registra un acierto o fallo de la caché ``cache``."""
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def observe_shed(group, reason):
+    """Registra una petición descartada por el límite de concurrencia."""
+    SHED_REQUESTS.labels(group, reason).inc()
+
+
+def observe_login_lockout(scope):
+    LOGIN_LOCKOUTS.labels(scope).inc()
+
+
+def set_concurrency(group, inflight, limit):
+    CONCURRENCY_INFLIGHT.labels(group).set(inflight)
+    CONCURRENCY_LIMIT.labels(group).set(limit)
+
+
+class MetricsMiddleware:
+    """Mide latencia, código de estado y consultas a la BD de cada petición."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_queries))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        view = view_label(request)
+        REQUEST_LATENCY.labels(view, request.method).observe(elapsed)
+        REQUESTS.labels(view, request.method, str(response.status_code)).inc()
+        if queries:
+            DB_QUERIES.labels(view).inc(queries)
+        return response
+
+
+def exception_handler(exc, context):
+    """EXCEPTION_HANDLER de DRF que además cuenta los rechazos por throttling."""
+    if isinstance(exc, Throttled):
+        THROTTLED.labels(view_label(context['request'])).inc()
+    return drf_exception_handler(exc, context)
+
+
+def metrics_view(request):
+    """Vista /metrics en formato de exposición de texto de Prometheus."""
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', None)
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        # Agregamos los archivos de todos los workers del host
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,56 @@
+"""
+Paginación por cursor para los listados de la API REST.
+
+PageNumberPagination hace un ``COUNT(*)`` y un ``OFFSET`` en cada página:
+cuanto más profunda la página, más filas lee la base de datos para
+descartarlas. Aquí cada página filtra a partir de la anterior
+(``WHERE id < ...``) sobre una columna indexada, así que la página 1000
+cuesta lo mismo que la primera.
+
+- Los cursores (``next`` / ``previous``) son opacos: el cliente los sigue
+  tal cual, no los construye.
+- El total solo se calcula si se pide con ``?count=1``.
+- ``?page_size=`` ajusta el tamaño de página (máximo MAX_PAGE_SIZE).
+
+Cómo es el cursor (CursorPagination de DRF): guarda un valor del primer
+campo de la ordenación y cuántas filas con ese valor hay que saltar. Con
+``('-date_joined', '-id')`` la página siguiente es
+``WHERE date_joined < <valor> ORDER BY date_joined DESC, id DESC OFFSET <n>``.
+No es una búsqueda por clave compuesta ``(date_joined, id) < (...)``: los
+campos siguientes solo fijan el orden entre empates, y los empates del
+primer campo se saltan con OFFSET. Por eso el primer campo debe estar
+indexado y tener pocos valores repetidos; por defecto, ``-id``.
+"""
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(CursorPagination):
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = {'count': self.count, **response.data}
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties'] = {
+            'count': {
+                'type': 'integer',
+                'example': 123,
+                'description': f'Solo con ?{self.count_query_param}=1',
+            },
+            **schema['properties'],
+        }
+        return schema
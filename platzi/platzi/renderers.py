@@ -0,0 +1,103 @@
+"""
+Renderer y parser JSON de la API REST.
+
+Usan orjson si está instalado (serializa directamente a bytes, varias veces
+más rápido y con muchas menos asignaciones que el módulo json) y, si no, el
+json de la librería estándar con el mismo resultado que los de DRF.
+
+Para listados grandes, iter_json_array emite el array por trozos en lugar
+de construir todo el documento en memoria (la exportación en JSON del
+catálogo, platziapp/export.py).
+"""
+import json
+
+from django.conf import settings
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa json
+    orjson = None
+
+# Elementos del array que se serializan por cada trozo emitido en streaming
+STREAM_CHUNK_SIZE = 100
+
+# Las fechas las formatea el encoder de DRF (milisegundos y "Z") para que la
+# salida sea idéntica con y sin orjson
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+_encoder = JSONEncoder()
+
+
+def dumps(data):
+    """Serializa ``data`` a bytes JSON compactos."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass  # p. ej. enteros de más de 64 bits: que lo intente json
+    return json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'), allow_nan=False,
+    ).encode()
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def iter_json_array(items, chunk_size=STREAM_CHUNK_SIZE):
+    """Genera un array JSON por trozos de ``chunk_size`` elementos."""
+    yield b'['
+    chunk = []
+    first = True
+    for item in items:
+        chunk.append(dumps(item))
+        if len(chunk) >= chunk_size:
+            yield (b'' if first else b',') + b','.join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield (b'' if first else b',') + b','.join(chunk)
+    yield b']'
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer que usa orjson cuando está disponible."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Sin orjson, o con indentación (p. ej. "Accept: application/json;
+        # indent=4", que es para depurar), se delega en DRF
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = dumps(data)
+        # Como DRF: escapar U+2028/U+2029 para poder incrustar el JSON en <script>.
+        # Buscar un solo byte (memchr) es casi gratis; replace() recorre todo el cuerpo
+        if b'\xe2' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(parsers.JSONParser):
+    """JSONParser que usa orjson cuando está disponible."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            data = stream.read()
+            if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -47,8 +47,23 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Id de petición y contexto para los logs (platzi/log.py); debe ir primero
+    'platzi.log.RequestContextMiddleware',
+    # Desglose de tiempos por petición (cabecera Server-Timing)
+    'platzi.timing.ServerTimingMiddleware',
+    # Métricas de Prometheus (latencia por vista, consultas a la BD)
+    'platzi.metrics.MetricsMiddleware',
+    # Límite de concurrencia adaptativo: descarta con 503 lo que no cabe (platzi/concurrency.py)
+    'platzi.concurrency.AdaptiveConcurrencyMiddleware',
+    # Plazo total de la petición para las llamadas a la API (platzi/deadline.py)
+    'platzi.deadline.DeadlineMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # Compresión gzip/Brotli de HTML y JSON; antes de cualquier middleware que toque el cuerpo
+    'platzi.compression.CompressionMiddleware',
+    # Estáticos precomprimidos desde STATIC_ROOT (solo con DEBUG=False); antes de la sesión
+    'platzi.staticfiles.StaticFilesMiddleware',
+    # SessionMiddleware con medición del guardado de la sesión
+    'platzi.timing.TimedSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -60,7 +75,8 @@ ROOT_URLCONF = 'platzi.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Backend de Django con medición de render() para Server-Timing
+        'BACKEND': 'platzi.timing.DjangoTemplates',
         'DIRS': [ BASE_DIR / 'products' / 'templates' ],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -87,7 +103,10 @@ DATABASES = {
         'USER': 'ilichuser',
         'PASSWORD': 'ilichpassword',
         'HOST': 'bd-platzi-store-ilich.cxmgi8ms0ig3.us-east-2.rds.amazonaws.com',
-        'PORT': '5432'
+        'PORT': '5432',
+        # Reutilizar la conexión entre peticiones en lugar de abrir una por petición
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -128,8 +147,143 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [
-    BASE_DIR  / 'products' / 'static',
+    BASE_DIR / 'static',
 ]
+# Destino de collectstatic (python manage.py build_static)
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    # Nombres con huella (hash) + variantes .gz/.br precomprimidas
+    'staticfiles': {
+        'BACKEND': 'platzi.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Dependencias de CDN que build_static descarga en static/ (ruta -> URL original).
+# Incluye los archivos a los que hacen referencia los CSS (fuentes, source maps).
+# Las páginas de editar y borrar producto siguen con las versiones que ya
+# usaban (Bootstrap 5.1.3, Font Awesome 6.0.0); el resto, con 5.3.0 y 6.4.0
+_CDNJS = 'https://cdnjs.cloudflare.com/ajax/libs'
+_JSDELIVR = 'https://cdn.jsdelivr.net/npm'
+STATIC_VENDOR_ASSETS = {
+    'vendor/bootstrap/5.3.0/css/bootstrap.min.css': f'{_CDNJS}/bootstrap/5.3.0/css/bootstrap.min.css',
+    'vendor/bootstrap/5.3.0/css/bootstrap.min.css.map': f'{_CDNJS}/bootstrap/5.3.0/css/bootstrap.min.css.map',
+    'vendor/bootstrap/5.3.0/js/bootstrap.bundle.min.js': f'{_CDNJS}/bootstrap/5.3.0/js/bootstrap.bundle.min.js',
+    'vendor/bootstrap/5.3.0/js/bootstrap.bundle.min.js.map': f'{_CDNJS}/bootstrap/5.3.0/js/bootstrap.bundle.min.js.map',
+    'vendor/bootstrap/5.1.3/css/bootstrap.min.css': f'{_JSDELIVR}/bootstrap@5.1.3/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/5.1.3/css/bootstrap.min.css.map': f'{_JSDELIVR}/bootstrap@5.1.3/dist/css/bootstrap.min.css.map',
+    'vendor/bootstrap/5.1.3/js/bootstrap.bundle.min.js': f'{_JSDELIVR}/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js',
+    'vendor/bootstrap/5.1.3/js/bootstrap.bundle.min.js.map': f'{_JSDELIVR}/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js.map',
+}
+for _version in ('6.4.0', '6.0.0'):
+    STATIC_VENDOR_ASSETS[f'vendor/font-awesome/{_version}/css/all.min.css'] = (
+        f'{_CDNJS}/font-awesome/{_version}/css/all.min.css'
+    )
+    for _font in ('fa-brands-400', 'fa-regular-400', 'fa-solid-900', 'fa-v4compatibility'):
+        for _extension in ('woff2', 'ttf'):
+            STATIC_VENDOR_ASSETS[f'vendor/font-awesome/{_version}/webfonts/{_font}.{_extension}'] = (
+                f'{_CDNJS}/font-awesome/{_version}/webfonts/{_font}.{_extension}'
+            )
+
+# Caché en disco del proxy de imágenes de producto (originales y miniaturas)
+IMAGE_CACHE_DIR = Path(os.getenv('IMAGE_CACHE_DIR', BASE_DIR / 'cache' / 'images'))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+# Hosts de los que el proxy descarga imágenes (como ALLOWED_HOSTS: '.dominio' incluye subdominios)
+IMAGE_ALLOWED_HOSTS = os.getenv(
+    'IMAGE_ALLOWED_HOSTS', 'i.imgur.com,api.escuelajs.co,placehold.co,picsum.photos,.placeimg.com',
+).split(',')
+# Solo para desarrollo y benchmarks (imágenes en localhost): acepta direcciones no públicas
+IMAGE_ALLOW_PRIVATE_ADDRESSES = False
+
+# Caché de la aplicación (páginas del catálogo, etc.)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'platzi',
+    },
+    # Respuestas ya comprimidas (platzi.compression), indexadas por el hash del cuerpo
+    'compression': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'platzi-compression',
+        'TIMEOUT': 600,
+        'OPTIONS': {'MAX_ENTRIES': 500},
+    },
+    # Contadores de logins fallidos (accounts/lockout.py): compartidos por todos
+    # los workers. Redis si se define LOCKOUT_REDIS_URL; si no, una tabla de la
+    # base de datos (la crea la migración accounts 0003)
+    'lockout': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('LOCKOUT_REDIS_URL'),
+    } if os.getenv('LOCKOUT_REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'accounts_lockout_cache',
+    },
+}
+
+# Segundos que se reutiliza una página del catálogo antes de volver a pedirla a la API
+CATALOG_CACHE_TIMEOUT = 60
+
+# Segundos que se reutiliza cada producto suelto (catalog.get_products). La caché
+# es por proceso: una edición en la API no la invalida en los workers web, así
+# que es corto para que un producto editado no se vea desactualizado mucho rato
+CATALOG_PRODUCT_CACHE_TIMEOUT = 15
+
+# Peticiones simultáneas a la API al pedir productos por lotes (/api/products/batch)
+CATALOG_BATCH_WORKERS = 8
+# Máximo de ids por petición de lote
+CATALOG_BATCH_MAX_IDS = 50
+
+# Instantánea compartida del catálogo (platziapp/snapshot.py, python manage.py sync_catalog)
+CATALOG_SNAPSHOT_PATH = Path(os.getenv('CATALOG_SNAPSHOT_PATH', BASE_DIR / 'cache' / 'catalog.snapshot'))
+CATALOG_SNAPSHOT_MAX_AGE = 3600          # segundos; una instantánea más antigua se ignora (se usa la API)
+CATALOG_SNAPSHOT_CHECK_INTERVAL = 5      # segundos entre comprobaciones de si hay una instantánea nueva
+CATALOG_SNAPSHOT_REFRESH_INTERVAL = 600  # segundos entre regeneraciones desde el worker (run_jobs)
+
+# Hedging de los GET a la API (platziapp/hedging.py): si una petición tarda más
+# que el p95 reciente del endpoint se lanza otra igual y gana la primera
+CATALOG_HEDGING_ENABLED = os.getenv('CATALOG_HEDGING_ENABLED', '1') == '1'
+CATALOG_HEDGE_WINDOW = 200       # latencias recientes por endpoint para el p95
+CATALOG_HEDGE_MIN_SAMPLES = 20   # sin estas muestras no se cubre
+CATALOG_HEDGE_MIN_DELAY = 0.05   # segundos mínimos de espera antes de cubrir
+CATALOG_HEDGE_BUDGET = 0.1       # como mucho un 10 % de peticiones extra...
+CATALOG_HEDGE_BURST = 10         # ...con ráfagas de hasta 10
+CATALOG_HEDGE_WORKERS = 32       # hilos para las peticiones cubiertas (por proceso)
+
+# Productos por lote en el grid de home (primer render y scroll infinito)
+HOME_PAGE_SIZE = 24
+
+# Páginas de home que se precargan en la caché al arrancar (platziapp/warmup.py)
+WARMUP_PAGES = 2
+
+# Cola de escrituras en la API (platziapp/jobs.py, python manage.py run_jobs)
+JOB_MAX_ATTEMPTS = 5
+JOB_BACKOFF_BASE = 2       # segundos antes del primer reintento (se duplica en cada intento)
+JOB_BACKOFF_MAX = 300      # segundos máximos entre reintentos
+JOB_LOCK_TIMEOUT = 120     # segundos tras los que un trabajo 'running' se da por abandonado
+JOB_POLL_INTERVAL = 1.0    # segundos de espera del worker con la cola vacía
+
+# Claves de idempotencia de las vistas de escritura (platziapp/idempotency.py)
+IDEMPOTENCY_TTL = 86400    # segundos que se guarda la respuesta de cada clave
+IDEMPOTENCY_WAIT = 5       # segundos que espera un envío duplicado a que termine el original
+IDEMPOTENCY_LEASE = 60     # segundos tras los que una clave 'en curso' se da por abandonada
+
+# Productos por petición a la API al exportar el catálogo (platziapp/export.py)
+EXPORT_PAGE_SIZE = 100
+
+# Estadísticas del catálogo (platziapp/analytics.py)
+ANALYTICS_RELOAD_INTERVAL = 3600   # segundos entre recargas completas del catálogo
+ANALYTICS_SYNC_OVERLAP = 300       # segundos que se vuelven a revisar en cada sincronización
+ANALYTICS_HISTOGRAM_BINS = 20
+
+# Índice de similitud para los productos relacionados (platziapp/similarity.py)
+SIMILARITY_INDEX_PATH = Path(os.getenv('SIMILARITY_INDEX_PATH', BASE_DIR / 'cache' / 'similarity.npz'))
+SIMILARITY_DIMENSIONS = 4096       # posiciones del vector (hashing trick)
+SIMILARITY_TOP_K = 4               # productos relacionados por producto
+SIMILARITY_BLOCK_ROWS = 512        # filas por bloque al calcular los vecinos
+SIMILARITY_UPDATE_INTERVAL = 60    # segundos entre actualizaciones incrementales del worker
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -139,11 +293,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # API Configuration
 PLATZI_API_BASE_URL = 'https://api.escuelajs.co/api/v1/'
 
+# Transporte de la API de productos (ver platziapp/transport.py):
+# 'live', 'record', 'replay' (tests), 'fallthrough' (staging) o 'snapshot' (API caída)
+CATALOG_TRANSPORT_MODE = os.getenv('CATALOG_TRANSPORT_MODE', 'live')
+CATALOG_RECORDINGS_PATH = Path(os.getenv('CATALOG_RECORDINGS_PATH', BASE_DIR / 'recordings' / 'catalog.sqlite3'))
+
+# Caché HTTP (RFC 9111) de las respuestas de la API (ver platziapp/httpcache.py)
+CATALOG_HTTP_CACHE_ENABLED = os.getenv('CATALOG_HTTP_CACHE_ENABLED', '1') == '1'
+CATALOG_HTTP_CACHE_DIR = Path(os.getenv('CATALOG_HTTP_CACHE_DIR', BASE_DIR / 'cache' / 'http'))
+CATALOG_HTTP_CACHE_MAX_BYTES = int(os.getenv('CATALOG_HTTP_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+# Frescura máxima (segundos) estimada a partir de Last-Modified cuando la API no indica ninguna
+CATALOG_HTTP_CACHE_HEURISTIC_MAX = 300
+
 # Configuración de Django REST Framework
 REST_FRAMEWORK = {
     # Configuración de autenticación por defecto
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.SignedTokenAuthentication',  # Bearer, sin consultar la base de datos
+        'rest_framework.authentication.TokenAuthentication',  # Tokens antiguos ("Token <clave>")
         'rest_framework.authentication.SessionAuthentication',
     ],
     
@@ -152,19 +319,20 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     
-    # Configuración de paginación
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Configuración de paginación (por cursor, sin COUNT ni OFFSET: ver platzi/pagination.py)
+    'DEFAULT_PAGINATION_CLASS': 'platzi.pagination.KeysetPagination',
     'PAGE_SIZE': 10,
     
-    # Formato de respuesta por defecto
+    # Formato de respuesta por defecto (JSON con orjson si está instalado, ver platzi/renderers.py)
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',  # Para interfaz web de la API
-    ],
+        'platzi.renderers.FastJSONRenderer',
+    ] + ([
+        'rest_framework.renderers.BrowsableAPIRenderer',  # Interfaz web de la API, solo en desarrollo
+    ] if DEBUG else []),
     
     # Formato de parseo de datos
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'platzi.renderers.FastJSONParser',
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
@@ -177,7 +345,10 @@ REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',  # Para usuarios anónimos
         'user': '1000/hour'   # Para usuarios autenticados
-    }
+    },
+
+    # Manejador de excepciones que además cuenta los rechazos por throttling
+    'EXCEPTION_HANDLER': 'platzi.metrics.exception_handler',
 }
 
 # Configuración de CORS (Cross-Origin Resource Sharing)
@@ -216,6 +387,18 @@ LOGIN_URL = 'accounts:login'          # URL a la que redirige @login_required
 LOGIN_REDIRECT_URL = 'platziapp:inicio'  # Después de login exitoso
 LOGOUT_REDIRECT_URL = 'accounts:login'         # Después de logout
 
+# Bloqueo de logins tras fallos repetidos, antes de calcular el hash (accounts/lockout.py)
+LOCKOUT_USER_THRESHOLD = 5   # fallos por usuario antes del primer bloqueo
+LOCKOUT_IP_THRESHOLD = 20    # fallos por IP antes del primer bloqueo
+LOCKOUT_WINDOW = 900         # segundos en los que se acumulan los fallos
+LOCKOUT_BASE = 30            # segundos del primer bloqueo (se duplica con cada fallo más)
+LOCKOUT_MAX = 3600           # segundos máximos de bloqueo
+
+# Tokens de la API (accounts/tokens.py)
+ACCESS_TOKEN_TTL = 300                    # segundos de validez del token de acceso firmado
+REFRESH_TOKEN_TTL = 14 * 24 * 3600        # segundos de validez del token de refresco
+TOKEN_DENYLIST_REFRESH_INTERVAL = 5       # segundos entre relecturas de las sesiones revocadas
+
 # Configuración de mensajes de Django
 from django.contrib.messages import constants as messages
 MESSAGE_TAGS = {
@@ -244,10 +427,131 @@ CUSTOM_API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000/api/auth/
 # Configuración de timeouts para requests
 API_TIMEOUT = 10  # segundos
 
+# Plazo total de cada petición para las llamadas a la API (platzi/deadline.py):
+# cada llamada usa como timeout lo que queda, como mucho API_TIMEOUT
+REQUEST_DEADLINE = float(os.getenv('REQUEST_DEADLINE', '8'))
+
+# Plazo por vista (None = sin plazo); el resto usa REQUEST_DEADLINE
+REQUEST_DEADLINES = {
+    'platziapp:image_proxy': 5,
+    'platziapp:products_batch': 5,
+    'platziapp:catalog_analytics': 60,
+    'platziapp:export_products': None,  # Se genera en streaming después de la vista
+}
+
+# Segundos de plazo por debajo de los cuales se omiten las partes opcionales
+# de la página (p. ej. productos relacionados)
+REQUEST_DEADLINE_OPTIONAL_MIN = 1.5
+
+# ============================================================================
+# CONFIGURACIÓN DE COMPRESIÓN
+# ============================================================================
+
+# Respuestas más pequeñas (bytes) se envían sin comprimir
+COMPRESSION_MIN_SIZE = 1024
+
+# Tipos de contenido que se comprimen (las imágenes ya van comprimidas)
+COMPRESSION_CONTENT_TYPES = [
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/csv',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'application/x-ndjson',
+    'image/svg+xml',
+]
+
+# Nivel de gzip (1-9) y calidad de Brotli (0-11): más alto = más pequeño pero más CPU
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '5'))
+
+# ============================================================================
+# CONFIGURACIÓN DE SERVER-TIMING
+# ============================================================================
+
+# Fracción de peticiones que se miden (1.0 = todas). En producción basta con
+# una muestra para ver dónde se va el tiempo sin pagar el coste en cada petición.
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_SAMPLE_RATE', '1.0' if DEBUG else '0.1'))
+
+# ============================================================================
+# CONFIGURACIÓN DE LÍMITE DE CONCURRENCIA (LOAD SHEDDING)
+# ============================================================================
+
+# Ver platzi/concurrency.py. Los límites son por proceso de gunicorn.
+LOAD_SHEDDING_ENABLED = os.getenv('LOAD_SHEDDING_ENABLED', '1') == '1'
+
+# Vistas que nunca se descartan (y no ocupan sitio en los grupos)
+LOAD_SHEDDING_CRITICAL_VIEWS = [
+    'accounts:login',
+    'accounts:api_login',
+    'platziapp:readyz',
+    'metrics',
+]
+
+# Grupos de rutas con límite propio; el resto va al grupo 'default'
+LOAD_SHEDDING_GROUPS = {
+    # Vistas que esperan a la API de productos
+    'catalog': [
+        'platziapp:home',
+        'platziapp:product_cards',
+        'platziapp:product_detail',
+        'platziapp:products_list',
+        'platziapp:products_batch',
+        'platziapp:image_proxy',
+        'platziapp:create_product',
+        'platziapp:edit_product',
+        'platziapp:delete_product',
+    ],
+    # Exportación y estadísticas: largas, pocas a la vez
+    'reports': [
+        'platziapp:export_products',
+        'platziapp:catalog_analytics',
+    ],
+}
+
+# Latencia (segundos) por encima de la cual el grupo reduce su límite
+LOAD_SHEDDING_TARGET_LATENCY = {
+    'catalog': 2.0,
+    'reports': 30.0,
+    'default': 1.0,
+}
+
+LOAD_SHEDDING_INITIAL_LIMIT = 8
+LOAD_SHEDDING_MIN_LIMIT = 1
+LOAD_SHEDDING_MAX_LIMIT = 64
+LOAD_SHEDDING_BACKOFF = 0.9        # factor del decremento multiplicativo
+
+# Peticiones que ya esperaron más que esto en la cola del balanceador (X-Request-Start) se descartan
+LOAD_SHEDDING_MAX_QUEUE_TIME = 10.0
+LOAD_SHEDDING_RETRY_AFTER = 2      # segundos (cabecera Retry-After de los 503)
+
+# ============================================================================
+# CONFIGURACIÓN DE MÉTRICAS (PROMETHEUS)
+# ============================================================================
+
+# Con varios workers definir la variable de entorno PROMETHEUS_MULTIPROC_DIR
+# (un directorio vacío al arrancar) para que /metrics agregue todos los procesos;
+# gunicorn.conf.py descarta los gauges de los workers que terminan.
+
+# Token opcional para proteger /metrics (cabecera "Authorization: Bearer <token>")
+METRICS_AUTH_TOKEN = os.getenv('METRICS_AUTH_TOKEN')
+
 # ============================================================================
 # CONFIGURACIÓN DE LOGGING (Opcional)
 # ============================================================================
 
+# Los loggers escriben en 'queue' (solo encola, sin E/S en el hilo de la
+# petición); un hilo en segundo plano pasa los registros a 'file' y 'console'.
+# Ver platzi/log.py.
+
+# Fracción de los registros DEBUG/INFO que se conservan (WARNING+ siempre)
+LOG_INFO_SAMPLE_RATE = float(os.getenv('LOG_INFO_SAMPLE_RATE', '1.0'))
+
+# Directorio de logs: lo crea el handler con la primera escritura, no al importar settings
+LOGS_DIR = BASE_DIR / 'logs'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -260,37 +564,70 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        # Una línea JSON con request_id, user_id, view, upstream_ms y campos extra
+        'json': {
+            '()': 'platzi.log.JSONFormatter',
+        },
+    },
+    'filters': {
+        'request_context': {
+            '()': 'platzi.log.RequestContextFilter',
+        },
+        'sample_info': {
+            '()': 'platzi.log.SamplingFilter',
+            'rate': LOG_INFO_SAMPLE_RATE,
+            'exempt': ['platzi.timing'],  # Ya muestreado con SERVER_TIMING_SAMPLE_RATE
+        },
     },
     'handlers': {
         'file': {
             'level': 'ERROR',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs' / 'django_errors.log',
-            'formatter': 'verbose',
+            'class': 'platzi.log.FileHandler',
+            'filename': LOGS_DIR / 'django_errors.log',
+            'formatter': 'json',
         },
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
-            'formatter': 'simple',
+            'formatter': 'json',
+        },
+        'queue': {
+            '()': 'platzi.log.QueueHandler',
+            'handlers': ['file', 'console'],
+            'filters': ['sample_info', 'request_context'],
         },
     },
     'loggers': {
         'accounts': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'platziapp': {
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'products': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        # Línea estructurada con el desglose de tiempos de cada petición
+        'platzi.timing': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        # Peticiones descartadas por sobrecarga (muestreadas con LOG_INFO_SAMPLE_RATE)
+        'platzi.concurrency': {
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
     },
 }
 
-# Crear directorio de logs si no existe
-LOGS_DIR = BASE_DIR / 'logs'
-LOGS_DIR.mkdir(exist_ok=True)
 
 # ============================================================================
 # CONFIGURACIÓN DE DESARROLLO/PRODUCCIÓN
@@ -0,0 +1,165 @@
+"""
+Archivos estáticos precomprimidos con nombres con huella (hash).
+
+- CompressedManifestStaticFilesStorage: tras ``collectstatic`` escribe junto a
+  cada archivo comprimible sus versiones ``.gz`` y ``.br`` (Brotli si está
+  instalado), así no se comprime nada en tiempo de ejecución.
+- StaticFilesMiddleware: sirve STATIC_ROOT desde la propia aplicación,
+  eligiendo la variante según ``Accept-Encoding`` y con cabeceras de caché
+  ``immutable`` para los archivos con huella. Solo se activa con DEBUG=False
+  (en desarrollo runserver ya sirve los estáticos).
+"""
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotAllowed
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # Brotli es opcional: sin él solo se generan .gz
+    brotli = None
+
+# Extensiones que vale la pena comprimir (las imágenes y woff2 ya lo están)
+COMPRESSIBLE_EXTENSIONS = {
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ttf', '.eot', '.otf', '.ico',
+}
+# Por debajo de este tamaño la compresión no compensa
+MIN_COMPRESS_SIZE = 256
+
+# Nombre con huella de ManifestStaticFilesStorage: "app.3f2a9c1b7e4d.css"
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+
+# Content-Encoding -> extensión de la variante, en orden de preferencia
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    """Codificaciones aceptadas (q > 0) según la cabecera Accept-Encoding."""
+    accepted = set()
+    for item in header.split(','):
+        encoding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if encoding:
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+def compress_file(path):
+    """Escribe las variantes .gz y .br de ``path`` si reducen su tamaño."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+
+    written = []
+    for extension, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + extension, 'wb') as target:
+                target.write(compressed)
+            written.append(path + extension)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage que además precomprime lo que recopila."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for root, _, files in os.walk(self.location):
+            for name in files:
+                if os.path.splitext(name)[1] in COMPRESSIBLE_EXTENSIONS:
+                    path = os.path.join(root, name)
+                    for compressed in compress_file(path):
+                        yield os.path.relpath(compressed, self.location), compressed, True
+
+
+class StaticFile:
+    __slots__ = ('path', 'content_type', 'cache_control', 'variants')
+
+    def __init__(self, path, content_type, cache_control):
+        self.path = path
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.variants = {}  # Content-Encoding -> ruta del archivo precomprimido
+
+
+class StaticFilesMiddleware:
+    """
+    Sirve STATIC_ROOT negociando la variante precomprimida.
+
+    Debe ir al principio de MIDDLEWARE (antes de la sesión) para que las
+    peticiones de estáticos no carguen ni guarden la sesión.
+    """
+
+    def __init__(self, get_response):
+        if settings.DEBUG or not settings.STATIC_ROOT or not os.path.isdir(settings.STATIC_ROOT):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.files = self.build_index(settings.STATIC_ROOT)
+
+    def build_index(self, root):
+        """Índice URL -> StaticFile de todo STATIC_ROOT (se construye una vez)."""
+        files = {}
+        compressed_extensions = tuple(extension for _, extension in ENCODINGS)
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(compressed_extensions):
+                    continue
+                path = os.path.join(directory, name)
+                url = self.prefix + os.path.relpath(path, root).replace(os.sep, '/')
+                content_type, _ = mimetypes.guess_type(name)
+                if HASHED_NAME.search(name):
+                    cache_control = 'public, max-age=31536000, immutable'
+                else:
+                    cache_control = 'public, max-age=60'
+                static_file = StaticFile(path, content_type or 'application/octet-stream', cache_control)
+                for encoding, extension in ENCODINGS:
+                    if os.path.exists(path + extension):
+                        static_file.variants[encoding] = path + extension
+                files[url] = static_file
+        return files
+
+    def __call__(self, request):
+        if request.path.startswith(self.prefix):
+            static_file = self.files.get(request.path)
+            if static_file is not None:
+                return self.serve(request, static_file)
+        return self.get_response(request)
+
+    def serve(self, request, static_file):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        path, encoding = static_file.path, None
+        for candidate, variant in static_file.variants.items():
+            if candidate in accepted:
+                path, encoding = variant, candidate
+                break
+
+        response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if static_file.variants:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        response['Cache-Control'] = static_file.cache_control
+        return response
@@ -0,0 +1,612 @@
+import contextvars
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+import brotli
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from platziapp import catalog
+
+from . import deadline, log, renderers, timing
+from .compression import CompressionMiddleware
+from .concurrency import AdaptiveConcurrencyMiddleware, AIMDLimiter
+from .metrics import metrics_view
+from .renderers import FastJSONParser, FastJSONRenderer
+
+BODY = b'{"products": [' + b'{"title": "Camiseta"},' * 200 + b'{}]}'
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Compresión gzip/Brotli de las respuestas (platzi/compression.py)."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, accept='gzip, deflate, br', view=None):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept)
+        middleware = CompressionMiddleware(view or (lambda request: response))
+        return middleware(request)
+
+    def test_prefers_brotli(self):
+        response = self.process(HttpResponse(BODY, content_type='application/json'))
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), BODY)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_gzip_when_brotli_is_not_accepted(self):
+        response = self.process(HttpResponse(BODY, content_type='application/json'), accept='gzip;q=1, br;q=0')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_identity_when_nothing_is_accepted(self):
+        response = self.process(HttpResponse(BODY, content_type='application/json'), accept='identity')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, BODY)
+        # La respuesta depende de Accept-Encoding aunque esta vez no se comprima
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_small_bodies_are_not_compressed(self):
+        response = self.process(HttpResponse(b'{"ok": true}', content_type='application/json'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+
+    def test_other_content_types_are_not_compressed(self):
+        response = self.process(HttpResponse(BODY, content_type='image/png'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(COMPRESSION_CONTENT_TYPES=['application/json', 'application/gzip'])
+    def test_already_compressed_types_are_skipped_even_if_listed(self):
+        response = self.process(HttpResponse(gzip.compress(BODY), content_type='application/gzip'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_is_compressed_chunk_by_chunk(self):
+        chunks = [BODY[:1000], BODY[1000:]]
+
+        response = self.process(StreamingHttpResponse(iter(chunks), content_type='application/x-ndjson'))
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(brotli.decompress(b''.join(response.streaming_content)), BODY)
+
+    def test_small_file_response_is_not_compressed(self):
+        file = io.BytesIO(b'id,title\n1,Camiseta\n')
+        file.name = 'products.csv'
+
+        response = self.process(FileResponse(file, content_type='text/csv'))
+
+        self.assertEqual(response['Content-Length'], '20')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_gzip_file_response_is_not_compressed_again(self):
+        file = io.BytesIO(gzip.compress(BODY))
+        file.name = 'products.json.gz'
+
+        response = self.process(FileResponse(file))
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_weak_etag_after_compression(self):
+        response = HttpResponse(BODY, content_type='application/json')
+        response['ETag'] = '"abc"'
+
+        self.assertEqual(self.process(response)['ETag'], 'W/"abc"')
+
+    def test_csrf_cookie_forces_randomized_gzip(self):
+        response = HttpResponse(BODY, content_type='text/html')
+        response.set_cookie('csrftoken', 'secret')
+
+        first = self.process(response)
+
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(first.content), BODY)
+
+    def test_get_token_forces_gzip(self):
+        def view(request):
+            get_token(request)  # Sin CsrfViewMiddleware la marca sigue puesta
+            return HttpResponse(BODY, content_type='text/html')
+
+        response = self.process(None, view=view)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_embedded_token_without_cookie_forces_randomized_gzip(self):
+        # Una página guardada con cache_page: el token va en el HTML pero la
+        # respuesta no pone la cookie
+        page = b'<form><input name="csrfmiddlewaretoken" value="x"></form>' + b' ' * 2000
+
+        lengths = {len(self.process(HttpResponse(page, content_type='text/html')).content) for _ in range(20)}
+
+        self.assertGreater(len(lengths), 1)
+
+    def test_html_without_token_can_use_brotli(self):
+        page = b'<p>Camiseta</p>' * 200
+
+        response = self.process(HttpResponse(page, content_type='text/html'))
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+
+class AIMDLimiterTests(SimpleTestCase):
+    """Ajuste del límite de concurrencia (platzi/concurrency.py)."""
+
+    def limiter(self, initial=4):
+        return AIMDLimiter('test', initial=initial, minimum=1, maximum=6, target_latency=1.0, backoff=0.5)
+
+    def test_acquire_stops_at_the_limit(self):
+        limiter = self.limiter()
+
+        self.assertEqual([limiter.acquire() for _ in range(5)], [True, True, True, True, False])
+        self.assertEqual(limiter.inflight, 4)
+
+    def test_fast_requests_grow_the_limit_while_it_is_in_use(self):
+        limiter = self.limiter()
+        for _ in range(4):
+            limiter.acquire()
+
+        limiter.release(0.1)
+
+        self.assertAlmostEqual(limiter.limit, 4.25)
+
+    def test_fast_requests_do_not_grow_an_idle_limit(self):
+        limiter = self.limiter()
+        limiter.acquire()
+
+        limiter.release(0.1)
+
+        self.assertEqual(limiter.limit, 4)
+
+    def test_growth_stops_at_the_maximum(self):
+        limiter = self.limiter(initial=6)
+        for _ in range(100):
+            limiter.acquire()
+            limiter.acquire()
+            limiter.acquire()
+            for _ in range(3):
+                limiter.release(0.1)
+
+        self.assertEqual(limiter.limit, 6)
+
+    def test_slow_or_failed_requests_back_off(self):
+        limiter = self.limiter()
+
+        limiter.acquire()
+        limiter.release(2.0)
+        self.assertEqual(limiter.limit, 2)
+        limiter.acquire()
+        limiter.release(0.1, overloaded=True)
+        self.assertEqual(limiter.limit, 1)
+        limiter.acquire()
+        limiter.release(0.1, overloaded=True)
+        self.assertEqual(limiter.limit, 1)  # Nunca por debajo del mínimo
+
+
+@override_settings(
+    LOAD_SHEDDING_ENABLED=True, LOAD_SHEDDING_INITIAL_LIMIT=1, LOAD_SHEDDING_MIN_LIMIT=1,
+    LOAD_SHEDDING_MAX_QUEUE_TIME=10.0, LOAD_SHEDDING_RETRY_AFTER=2,
+)
+class AdaptiveConcurrencyMiddlewareTests(SimpleTestCase):
+    """Descarte de carga con 503 y Retry-After (platzi/concurrency.py)."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.view = mock.Mock(return_value=HttpResponse('ok'))
+        self.middleware = AdaptiveConcurrencyMiddleware(self.view)
+
+    def get(self, name, **extra):
+        return self.middleware(self.factory.get(reverse(name), **extra))
+
+    def occupy(self, group):
+        self.assertTrue(self.middleware.limiters[group].acquire())
+
+    def test_request_over_the_limit_is_shed(self):
+        self.occupy('catalog')
+
+        response = self.get('platziapp:product_cards')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        self.view.assert_not_called()
+
+    def test_api_requests_get_json(self):
+        self.occupy('default')
+
+        response = self.get('accounts:api_profile')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(json.loads(response.content)['success'], False)
+
+    def test_groups_have_separate_limits(self):
+        self.occupy('reports')
+
+        self.assertEqual(self.get('platziapp:product_cards').status_code, 200)
+
+    def test_critical_views_are_never_shed(self):
+        for group in self.middleware.limiters:
+            self.occupy(group)
+
+        self.assertEqual(self.get('platziapp:readyz').status_code, 200)
+
+    def test_slot_is_released_after_the_response(self):
+        self.assertEqual(self.get('platziapp:product_cards').status_code, 200)
+
+        self.assertEqual(self.middleware.limiters['catalog'].inflight, 0)
+
+    def test_long_queue_time_is_shed(self):
+        started = f't={(time.time() - 30) * 1000:.0f}'
+
+        response = self.get('platziapp:product_cards', HTTP_X_REQUEST_START=started)
+
+        self.assertEqual(response.status_code, 503)
+        self.view.assert_not_called()
+
+    def test_streaming_holds_the_slot_until_the_body_is_sent(self):
+        self.view.return_value = StreamingHttpResponse(iter([b'a', b'b']))
+        limiter = self.middleware.limiters['reports']
+
+        response = self.get('platziapp:export_products')
+
+        self.assertEqual(limiter.inflight, 1)
+        self.assertEqual(b''.join(response.streaming_content), b'ab')
+        self.assertEqual(limiter.inflight, 0)
+        response.close()
+        self.assertEqual(limiter.inflight, 0)  # Solo se libera una vez
+
+    def test_closing_an_unread_stream_releases_the_slot(self):
+        # El cliente se desconecta antes de que se empiece a enviar el cuerpo
+        self.view.return_value = StreamingHttpResponse(iter([b'a']))
+        limiter = self.middleware.limiters['reports']
+
+        self.get('platziapp:export_products').close()
+
+        self.assertEqual(limiter.inflight, 0)
+
+    def test_failing_stream_backs_off(self):
+        def body():
+            yield b'a'
+            raise ConnectionError
+        self.view.return_value = StreamingHttpResponse(body())
+        limiter = self.middleware.limiters['reports']
+        limiter.limit = 4.0
+
+        response = self.get('platziapp:export_products')
+        with self.assertRaises(ConnectionError):
+            list(response.streaming_content)
+
+        self.assertEqual(limiter.inflight, 0)
+        self.assertLess(limiter.limit, 4.0)
+
+
+class MetricsViewTests(SimpleTestCase):
+    """Vista /metrics (platzi/metrics.py)."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get(self, **extra):
+        return metrics_view(self.factory.get('/metrics', **extra))
+
+    @override_settings(METRICS_AUTH_TOKEN=None)
+    def test_open_without_token(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'platzi_http_request_duration_seconds', response.content)
+
+    @override_settings(METRICS_AUTH_TOKEN='s3cret')
+    def test_token_is_required(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='s3cret').status_code, 403)
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+
+    @override_settings(METRICS_AUTH_TOKEN=None)
+    def test_multiprocess_values_are_aggregated(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        # Dos "workers" que registran cada uno una petición descartada
+        script = (
+            'import django; django.setup(); from platzi import metrics; '
+            "metrics.observe_shed('catalog', 'concurrency')"
+        )
+        for _ in range(2):
+            subprocess.run(
+                [sys.executable, '-c', script], cwd=settings.BASE_DIR, check=True, capture_output=True,
+                env={**os.environ, 'PROMETHEUS_MULTIPROC_DIR': directory},
+            )
+
+        with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}):
+            response = self.get()
+
+        self.assertIn(b'platzi_shed_requests_total{group="catalog",reason="concurrency"} 2.0', response.content)
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    """Cabecera Server-Timing con el desglose de la petición (platzi/timing.py)."""
+
+    def process(self, view):
+        return timing.ServerTimingMiddleware(view)(RequestFactory().get('/'))
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1.0)
+    def test_header_lists_the_measured_components_and_the_total(self):
+        def view(request):
+            User.objects.count()
+            User.objects.count()
+            with timing.timed('upstream'):
+                pass
+            return HttpResponse('ok')
+
+        header = self.process(view)['Server-Timing']
+
+        self.assertRegex(header, r'^upstream;dur=\d+\.\d, db;dur=\d+\.\d, total;dur=\d+\.\d$')
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1.0)
+    def test_total_covers_the_components(self):
+        def view(request):
+            timing.record('upstream', 0.25)
+            return HttpResponse('ok')
+
+        header = self.process(view)['Server-Timing']
+
+        durations = dict(re.findall(r'(\w+);dur=([\d.]+)', header))
+        self.assertEqual(durations['upstream'], '250.0')
+        self.assertLess(float(durations['total']), 250.0)  # record() no consume tiempo real
+        self.assertIsNone(timing.current())  # El desglose no sale de la petición
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_measured(self):
+        def view(request):
+            self.assertIsNone(timing.current())
+            return HttpResponse('ok')
+
+        self.assertFalse(self.process(view).has_header('Server-Timing'))
+
+
+class RenderersTests(SimpleTestCase):
+    """Renderer y parser JSON de la API (platzi/renderers.py)."""
+
+    data = {
+        'id': 7,
+        'title': 'Camiseta de algodón\u2028\u2029“edición” 🧵',
+        'price': Decimal('19.90'),
+        'rating': 4.5,
+        'active': True,
+        'discount': None,
+        'updated_at': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        'released': date(2024, 5, 1),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'label': gettext_lazy('Products'),
+        'stock': {1: 3, 2: 0},
+        'views': 2 ** 70,  # Más de 64 bits: orjson no puede
+        'images': ['https://i.imgur.com/1.jpeg', 'https://i.imgur.com/2.jpeg'],
+    }
+
+    def test_output_matches_drf(self):
+        expected = JSONRenderer().render(self.data, 'application/json')
+
+        fast = FastJSONRenderer().render(self.data, 'application/json')
+        with mock.patch.object(renderers, 'orjson', None):
+            fallback = FastJSONRenderer().render(self.data, 'application/json')
+
+        self.assertIsNotNone(renderers.orjson)
+        self.assertEqual(fast, expected)
+        self.assertEqual(fallback, expected)
+        self.assertIn(b'\\u2028', fast)
+
+    def test_indent_is_delegated_to_drf(self):
+        media_type = 'application/json; indent=4'
+
+        rendered = FastJSONRenderer().render(self.data, media_type)
+
+        self.assertEqual(rendered, JSONRenderer().render(self.data, media_type))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_streamed_array_matches_the_whole_document(self):
+        for count in (0, 1, 2, 5):
+            with self.subTest(count=count):
+                items = [{'id': number, 'title': f'Producto {number}'} for number in range(count)]
+
+                chunks = list(renderers.iter_json_array(iter(items), chunk_size=2))
+
+                self.assertEqual(b''.join(chunks), JSONRenderer().render(items))
+                self.assertLessEqual(len(chunks), count // 2 + 3)
+
+    def test_parser(self):
+        parser = FastJSONParser()
+        body = JSONRenderer().render({'title': 'Camiseta de algodón', 'price': 10})
+
+        self.assertEqual(parser.parse(io.BytesIO(body)), {'title': 'Camiseta de algodón', 'price': 10})
+        latin1 = parser.parse(
+            io.BytesIO('{"title": "Camión"}'.encode('latin-1')), parser_context={'encoding': 'latin-1'},
+        )
+        self.assertEqual(latin1, {'title': 'Camión'})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"title": '))
+
+
+class ListHandler(logging.Handler):
+    """Handler que guarda los registros en ``self.records``."""
+
+    def __init__(self, name):
+        super().__init__()
+        self.records = []
+        self.set_name(name)  # Registrado para que QueueHandler lo encuentre por nombre
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class LoggingTests(SimpleTestCase):
+    """Logging sin bloqueos y con el contexto de la petición (platzi/log.py)."""
+
+    def record(self, message='Producto %s actualizado', args=(7,), level=logging.INFO, name='platziapp', **extra):
+        record = logging.LogRecord(name, level, __file__, 1, message, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def queue_handler(self, queue_size):
+        target = ListHandler('test-target')
+        self.addCleanup(target.close)
+        handler = log.QueueHandler(['test-target'], queue_size=queue_size)
+        self.addCleanup(handler.stop)
+        return handler, target
+
+    def test_full_queue_drops_records_instead_of_blocking(self):
+        handler, target = self.queue_handler(queue_size=2)
+        handler._pid = os.getpid()  # Sin hilo escritor: la cola no se vacía
+
+        started = time.monotonic()
+        for number in range(5):
+            handler.emit(self.record(args=(number,)))
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+        self.assertEqual(target.records, [])
+
+    def test_listener_writes_the_records_on_stop(self):
+        handler, target = self.queue_handler(queue_size=10)
+
+        handler.emit(self.record())
+        try:
+            raise ValueError('precio negativo')
+        except ValueError:
+            handler.emit(self.record('Fallo', (), logging.ERROR, exc_info=sys.exc_info()))
+        handler.stop()
+
+        self.assertEqual([record.getMessage() for record in target.records], ['Producto 7 actualizado', 'Fallo'])
+        failed = target.records[1]
+        self.assertIsNone(failed.exc_info)  # La excepción no viaja al otro hilo, solo su traza
+        self.assertIn('ValueError: precio negativo', failed.exc_text)
+
+    def test_unknown_target_handler(self):
+        with self.assertRaisesMessage(ValueError, "Handler 'no-such-handler' no configurado"):
+            log.QueueHandler(['no-such-handler'])
+
+    def test_request_context(self):
+        factory = RequestFactory()
+        seen = []
+
+        def view(request):
+            record = self.record()
+            log.RequestContextFilter().filter(record)
+            seen.append(record.request_id)
+            return HttpResponse('ok')
+
+        middleware = log.RequestContextMiddleware(view)
+        reused = middleware(factory.get('/', HTTP_X_REQUEST_ID='lb-1234'))
+        replaced = middleware(factory.get('/', HTTP_X_REQUEST_ID='no válido\n'))
+
+        self.assertEqual(reused['X-Request-ID'], 'lb-1234')
+        self.assertRegex(replaced['X-Request-ID'], r'^[0-9a-f]{32}$')
+        self.assertEqual(seen, [reused['X-Request-ID'], replaced['X-Request-ID']])
+        self.assertIsNone(log.current_request_id())
+
+    def test_json_formatter_includes_extra_fields(self):
+        line = log.JSONFormatter().format(self.record(request_id='lb-1234', product_id=7))
+
+        payload = json.loads(line)
+        self.assertEqual(payload['message'], 'Producto 7 actualizado')
+        self.assertEqual(payload['level'], 'INFO')
+        self.assertEqual((payload['request_id'], payload['product_id']), ('lb-1234', 7))
+        self.assertNotIn('args', payload)
+
+    def test_sampling_keeps_warnings_and_exempt_loggers(self):
+        sampling = log.SamplingFilter(rate=0.0, exempt=['platzi.timing'])
+
+        self.assertFalse(sampling.filter(self.record()))
+        self.assertTrue(sampling.filter(self.record(level=logging.WARNING)))
+        self.assertTrue(sampling.filter(self.record(name='platzi.timing')))
+
+
+@override_settings(REQUEST_DEADLINE=8, REQUEST_DEADLINES={'platziapp:products_batch': 5, 'platziapp:export': None})
+class DeadlineTests(SimpleTestCase):
+    """Plazo de la petición para las llamadas a la API (platzi/deadline.py)."""
+
+    def process(self, view, view_name='platziapp:home', **headers):
+        request = RequestFactory().get('/', **headers)
+        request.resolver_match = mock.Mock(view_name=view_name)
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = deadline.DeadlineMiddleware(get_response)
+        return middleware(request)
+
+    def remaining_in_view(self, **kwargs):
+        left = []
+        self.process(lambda request: left.append(deadline.remaining()) or HttpResponse('ok'), **kwargs)
+        return left[0]
+
+    def test_budget_per_view(self):
+        self.assertAlmostEqual(self.remaining_in_view(), 8, delta=0.5)
+        self.assertAlmostEqual(self.remaining_in_view(view_name='platziapp:products_batch'), 5, delta=0.5)
+        self.assertIsNone(self.remaining_in_view(view_name='platziapp:export'))
+        self.assertIsNone(deadline.remaining())  # Fuera de la petición no hay plazo
+
+    def test_time_queued_at_the_load_balancer_counts(self):
+        left = self.remaining_in_view(HTTP_X_REQUEST_START=f't={(time.time() - 3) * 1000:.0f}')
+
+        self.assertAlmostEqual(left, 5, delta=0.5)
+
+    def test_upstream_timeout_is_capped_by_what_is_left(self):
+        def view(request):
+            catalog.request('GET', 'products/1', timeout=30)
+            with mock.patch.object(deadline.time, 'monotonic', return_value=time.monotonic() + 10):
+                self.assertFalse(deadline.has_budget(0.1))
+                with self.assertRaises(requests.exceptions.Timeout):  # Las vistas ya la tratan
+                    catalog.request('GET', 'products/1')
+            return HttpResponse('ok')
+
+        with mock.patch('platziapp.catalog.session.request') as session_request:
+            self.process(view, view_name='platziapp:products_batch')
+
+        session_request.assert_called_once()
+        self.assertTrue(4.5 < session_request.call_args.kwargs['timeout'] <= 5)
+        self.assertEqual(deadline.timeout(30), 30)
+
+    def test_threads_with_a_copy_of_the_context_see_the_deadline(self):
+        def view(request):
+            with ThreadPoolExecutor(1) as executor:
+                left = executor.submit(contextvars.copy_context().run, deadline.remaining).result()
+                bare = executor.submit(deadline.remaining).result()
+            return JsonResponse({'left': left, 'bare': bare})
+
+        data = json.loads(self.process(view).content)
+
+        self.assertAlmostEqual(data['left'], 8, delta=0.5)
+        self.assertIsNone(data['bare'])
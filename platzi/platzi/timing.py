@@ -0,0 +1,191 @@
+"""
+Desglose del tiempo de cada petición por componente.
+
+Mide cuánto tiempo se va en la API de productos (api.escuelajs.co), en las
+consultas a la base de datos, en el renderizado de plantillas y en el guardado
+de la sesión. El resultado se envía en la cabecera ``Server-Timing`` y en una
+línea de log en JSON por petición.
+
+Configuración (settings.py):
+- SERVER_TIMING_SAMPLE_RATE: fracción de peticiones medidas (0.0 - 1.0)
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.db import connections
+from django.template.backends import django as django_backend
+
+logger = logging.getLogger(__name__)
+
+# Desglose de la petición en curso (None si la petición no fue muestreada)
+_breakdown = contextvars.ContextVar('server_timing_breakdown', default=None)
+
+# Orden en el que se emiten las métricas en la cabecera
+COMPONENTS = ('upstream', 'db', 'render', 'session')
+
+
+class Breakdown:
+    """
+    Acumula duraciones (en segundos) y número de llamadas por componente.
+
+    Pueden sumar a la vez varios hilos de la misma petición (p. ej. las
+    peticiones en paralelo de catalog.get_products), de ahí el lock.
+    """
+
+    __slots__ = ('durations', 'counts', '_lock')
+
+    def __init__(self):
+        self.durations = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, count=1):
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + count
+
+    def merge(self, other):
+        """Suma el desglose ``other`` a este."""
+        for name, seconds in other.durations.items():
+            self.add(name, seconds, other.counts[name])
+
+
+def record(name, seconds):
+    """Suma ``seconds`` al componente ``name`` de la petición actual."""
+    breakdown = _breakdown.get()
+    if breakdown is not None:
+        breakdown.add(name, seconds)
+
+
+def current():
+    """Desglose de la petición actual (None si no se mide)."""
+    return _breakdown.get()
+
+
+def run_into(breakdown, func, *args):
+    """
+    Ejecuta ``func(*args)`` sumando sus mediciones a ``breakdown`` en lugar
+    de a la petición: así se puede decidir después si cuentan (hedging.py
+    solo suma el intento que gana).
+    """
+    token = _breakdown.set(breakdown)
+    try:
+        return func(*args)
+    finally:
+        _breakdown.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """Mide el bloque y lo suma al componente ``name``."""
+    if _breakdown.get() is None:
+        # Petición no muestreada: no medimos nada
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    with timed('db'):
+        return execute(sql, params, many, context)
+
+
+def _header_value(breakdown, total):
+    parts = []
+    for name in COMPONENTS:
+        if name in breakdown.durations:
+            parts.append(f'{name};dur={breakdown.durations[name] * 1000:.1f}')
+    parts.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(parts)
+
+
+class ServerTimingMiddleware:
+    """
+    Mide cada petición muestreada y añade la cabecera Server-Timing.
+
+    Debe ir al principio de MIDDLEWARE (justo después del contexto de log)
+    para que el total incluya el resto de middlewares (sesión, autenticación,
+    mensajes...).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'SERVER_TIMING_SAMPLE_RATE', 1.0)
+
+    def __call__(self, request):
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        breakdown = Breakdown()
+        token = _breakdown.set(breakdown)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                # Las conexiones son perezosas: esto no abre ninguna conexión
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _breakdown.reset(token)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = _header_value(breakdown, total)
+        self.log(request, response, breakdown, total)
+        return response
+
+    def log(self, request, response, breakdown, total):
+        match = getattr(request, 'resolver_match', None)
+        payload = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+        }
+        for name, seconds in breakdown.durations.items():
+            payload[f'{name}_ms'] = round(seconds * 1000, 1)
+            payload[f'{name}_count'] = breakdown.counts[name]
+        # Los campos van como "extra": JSONFormatter los incluye en la línea
+        logger.info('%s %s %s', request.method, request.path, response.status_code, extra=payload)
+
+
+class TimedSessionMiddleware(SessionMiddleware):
+    """SessionMiddleware que mide el guardado de la sesión."""
+
+    def process_response(self, request, response):
+        with timed('session'):
+            return super().process_response(request, response)
+
+
+class TimedTemplate:
+    """Envuelve una plantilla del backend de Django para medir render()."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with timed('render'):
+            return self.template.render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Backend de plantillas de Django con medición del renderizado."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
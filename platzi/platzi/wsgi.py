@@ -12,5 +12,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'platzi.settings')
+# Calentar el worker al arrancar (ver platziapp/warmup.py y la vista readyz)
+os.environ.setdefault('PLATZI_WARMUP', '1')
 
 application = get_wsgi_application()
@@ -1,3 +1,29 @@
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from .models import IdempotencyKey, ProductJob
+
+
+@admin.register(ProductJob)
+class ProductJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'action', 'product_id', 'status', 'attempts', 'run_at', 'user', 'created_at')
+    list_filter = ('status', 'action')
+    search_fields = ('product_id', 'last_error')
+    readonly_fields = ('created_at', 'updated_at', 'locked_at', 'locked_by')
+    actions = ['retry']
+
+    @admin.action(description='Reintentar los trabajos seleccionados')
+    def retry(self, request, queryset):
+        # Saca los trabajos de dead-letter y los vuelve a poner en cola
+        count = queryset.exclude(status=ProductJob.STATUS_SUCCEEDED).update(
+            status=ProductJob.STATUS_PENDING, attempts=0, run_at=timezone.now(), last_error='',
+        )
+        self.message_user(request, f'{count} trabajos reencolados')
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'user', 'status', 'response_status', 'created_at', 'expires_at')
+    list_filter = ('status',)
+    search_fields = ('key',)
+    exclude = ('response_body',)
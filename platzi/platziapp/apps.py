@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class PlatziappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'platziapp'
+
+    def ready(self):
+        from . import warmup
+
+        # Solo en los procesos que sirven la aplicación (platzi/wsgi.py activa
+        # PLATZI_WARMUP); no en migrate, collectstatic ni el resto de comandos
+        if warmup.enabled():
+            warmup.start()
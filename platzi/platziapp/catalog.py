@@ -0,0 +1,220 @@
+"""
+Cliente HTTP para la API de productos de Platzi (api.escuelajs.co).
+
+Todas las llamadas a la API pasan por este módulo: así se reutilizan las
+conexiones entre peticiones y se mide el tiempo invertido en la API externa
+(cabecera Server-Timing y métricas de Prometheus).
+
+Uso:
+    response = catalog.get('products')
+    response = catalog.post('products', json=product_data)
+    found, errors = catalog.get_products([1, 2, 3])
+
+Dentro de una petición, el timeout de cada llamada se recorta a lo que
+queda del plazo de la petición (platzi/deadline.py). Las respuestas GET
+pasan por la caché HTTP del transporte (platziapp/httpcache.py).
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from platzi import deadline, metrics, timing
+
+from . import hedging, httpcache, snapshot, transport
+
+# URL base de la API (configurable desde settings)
+API_BASE_URL = settings.PLATZI_API_BASE_URL
+
+# Sesión compartida: reutiliza conexiones TCP/TLS con la API
+session = requests.Session()
+# Transporte con grabación/reproducción según CATALOG_TRANSPORT_MODE,
+# detrás de la caché HTTP (RFC 9111)
+session.mount(API_BASE_URL, httpcache.build_adapter(transport.build_adapter()))
+
+
+def build_url(path):
+    """Construye la URL absoluta de un recurso de la API."""
+    return f"{API_BASE_URL.rstrip('/')}/{path.lstrip('/')}"
+
+
+def request(method, path, **kwargs):
+    """Hace una petición a la API midiendo su duración."""
+    kwargs['timeout'] = deadline.timeout(kwargs.get('timeout', settings.API_TIMEOUT))
+    status = None
+    from_cache = False
+    start = time.perf_counter()
+    try:
+        response = session.request(method, build_url(path), **kwargs)
+        status = response.status_code
+        from_cache = getattr(response, 'from_cache', False)
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        timing.record('upstream', elapsed)
+        metrics.observe_upstream(method, path, status, elapsed)
+        # Un acierto de la caché HTTP no dice nada de la latencia de la API
+        if method == 'GET' and status is not None and not from_cache:
+            hedging.tracker(metrics.endpoint_label(path)).add(elapsed)
+
+
+def get(path, **kwargs):
+    """GET con hedging (platziapp/hedging.py) salvo en descargas en streaming."""
+    if not settings.CATALOG_HEDGING_ENABLED or kwargs.get('stream'):
+        return request('GET', path, **kwargs)
+    return hedging.hedged(metrics.endpoint_label(path), lambda: request('GET', path, **kwargs))
+
+
+def post(path, **kwargs):
+    return request('POST', path, **kwargs)
+
+
+def put(path, **kwargs):
+    return request('PUT', path, **kwargs)
+
+
+def delete(path, **kwargs):
+    return request('DELETE', path, **kwargs)
+
+
+def get_products_page(offset, limit):
+    """
+    Devuelve una página del listado de productos (lista de dicts).
+
+    Si hay una instantánea del catálogo (platziapp/snapshot.py) se lee de
+    ahí; si no, las páginas se guardan en la caché de Django durante
+    CATALOG_CACHE_TIMEOUT segundos. Lanza requests.exceptions.RequestException
+    si la API falla.
+    """
+    catalog_snapshot = snapshot.current()
+    if catalog_snapshot is not None:
+        return catalog_snapshot.page(offset, limit)
+
+    key = f'catalog:products:{offset}:{limit}'
+    products = cache.get(key)
+    metrics.observe_cache('catalog', products is not None)
+    if products is None:
+        response = get('products', params={'offset': offset, 'limit': limit})
+        response.raise_for_status()
+        products = response.json()
+        cache.set(key, products, settings.CATALOG_CACHE_TIMEOUT)
+    return products
+
+
+def get_categories():
+    """
+    Devuelve la lista de categorías (lista de dicts), guardada en la caché de
+    Django durante CATALOG_CACHE_TIMEOUT segundos.
+
+    Lanza requests.exceptions.RequestException si la API falla.
+    """
+    key = 'catalog:categories'
+    categories = cache.get(key)
+    metrics.observe_cache('catalog', categories is not None)
+    if categories is None:
+        response = get('categories')
+        response.raise_for_status()
+        categories = response.json()
+        cache.set(key, categories, settings.CATALOG_CACHE_TIMEOUT)
+    return categories
+
+
+def product_cache_key(product_id):
+    return f'catalog:product:{product_id}'
+
+
+def fetch_product(product_id):
+    """
+    Pide un producto a la API. Devuelve (producto, None) o (None, error) con
+    error = 'not_found', 'upstream_error' o 'connection_error'.
+    """
+    try:
+        response = get(f'products/{product_id}')
+    except requests.exceptions.RequestException:
+        return None, 'connection_error'
+    if response.status_code == 200:
+        try:
+            return response.json(), None
+        except ValueError:
+            return None, 'upstream_error'
+    # La API responde 400 (no 404) cuando el id no existe
+    if response.status_code in (400, 404):
+        return None, 'not_found'
+    return None, 'upstream_error'
+
+
+# Pool compartido para pedir productos en paralelo: limita las conexiones
+# simultáneas con la API aunque haya varias peticiones de lote a la vez
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.CATALOG_BATCH_WORKERS, thread_name_prefix='catalog-batch',
+                )
+    return _executor
+
+
+def get_products(product_ids, fresh=False):
+    """
+    Devuelve varios productos por id: ``(encontrados, errores)``, dos dicts
+    indexados por id (errores con los códigos de fetch_product).
+
+    Los que están en la instantánea del catálogo o en la caché de Django no
+    se piden; el resto se pide a la API en paralelo y se guarda en la caché
+    durante CATALOG_PRODUCT_CACHE_TIMEOUT. Con ``fresh=True`` se piden todos
+    a la API: la instantánea y la caché pueden ser anteriores a una escritura.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    found = {}
+    catalog_snapshot = None if fresh else snapshot.current()
+    if catalog_snapshot is not None:
+        for product_id in product_ids:
+            product = catalog_snapshot.get(product_id)
+            if product is not None:
+                found[product_id] = product
+    if not fresh:
+        keys = {product_cache_key(product_id): product_id for product_id in product_ids if product_id not in found}
+        cached = cache.get_many(keys)
+        found.update((keys[key], product) for key, product in cached.items())
+        for product_id in product_ids:
+            metrics.observe_cache('catalog', product_id in found)
+
+    missing = [product_id for product_id in product_ids if product_id not in found]
+    errors = {}
+    if not missing:
+        return found, errors
+
+    if len(missing) == 1:
+        results = [fetch_product(missing[0])]
+    else:
+        # Cada hilo con una copia del contexto de la petición (Server-Timing, request_id)
+        executor = get_executor()
+        futures = [
+            executor.submit(contextvars.copy_context().run, fetch_product, product_id)
+            for product_id in missing
+        ]
+        results = [future.result() for future in futures]
+
+    fetched = {}
+    for product_id, (product, error) in zip(missing, results):
+        if error:
+            errors[product_id] = error
+        else:
+            fetched[product_id] = product
+    if fetched:
+        cache.set_many(
+            {product_cache_key(product_id): product for product_id, product in fetched.items()},
+            settings.CATALOG_PRODUCT_CACHE_TIMEOUT,
+        )
+    found.update(fetched)
+    return found, errors
@@ -0,0 +1,111 @@
+"""
+Caché en disco con tamaño máximo y expulsión LRU.
+
+Cada entrada es un archivo; la fecha de modificación hace de "último uso"
+(se actualiza en cada acierto) y al superar el tamaño máximo se borran las
+entradas más antiguas. Las escrituras son atómicas (archivo temporal +
+os.replace), así que varios workers pueden compartir el mismo directorio.
+
+El tamaño total se lleva en un contador por proceso, que no ve lo que
+escriben o expulsan los demás workers: se recalcula recorriendo el
+directorio cada RESCAN_INTERVAL segundos.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+class DiskLRUCache:
+    # Al expulsar, se baja hasta esta fracción del máximo para no expulsar en cada escritura
+    LOW_WATER = 0.9
+    # Segundos entre recálculos del tamaño total recorriendo el directorio
+    RESCAN_INTERVAL = 300
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._size = None  # Tamaño estimado; se calcula al primer uso
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.directory / digest[:2] / digest
+
+    def get(self, key):
+        """Devuelve el contenido de ``key`` o None si no está en la caché."""
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # Marca la entrada como usada recientemente
+        except FileNotFoundError:
+            pass  # Expulsada por otro worker mientras la leíamos
+        return data
+
+    def set(self, key, data):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            replaced = path.stat().st_size  # Al sobrescribir, el tamaño anterior deja de contar
+        except FileNotFoundError:
+            replaced = 0
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        with self._lock:
+            if self._size is None or time.monotonic() - self._scanned_at > self.RESCAN_INTERVAL:
+                self._size = self._scan_size()
+                self._scanned_at = time.monotonic()
+            else:
+                self._size += len(data) - replaced
+            over_limit = self._size > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def delete(self, key):
+        try:
+            self.path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _entries(self):
+        for entry in self.directory.glob('*/*'):
+            if entry.name.startswith('.tmp-'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            yield stat.st_mtime, stat.st_size, entry
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Borra las entradas menos usadas hasta quedar por debajo del límite."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * self.LOW_WATER
+        for _, size, entry in entries:
+            if total <= target:
+                break
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._size = total
+            self._scanned_at = time.monotonic()
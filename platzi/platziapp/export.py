@@ -0,0 +1,152 @@
+"""
+Exportación del catálogo completo en CSV, NDJSON o JSON.
+
+Los productos se piden a la API página a página (EXPORT_PAGE_SIZE) y se
+convierten a texto a medida que llegan, así que nunca hay más de una página
+en memoria. Lo usan la vista export_products (solo staff) y el comando
+``python manage.py export_catalog``.
+
+La API no permite filtrar por fecha de modificación: el filtro
+``updated_since`` se aplica aquí sobre el campo ``updatedAt``. Los
+productos sin fecha (o con una que no es válida) se incluyen siempre.
+
+En CSV, el texto que empieza como una fórmula (=, +, -, @) se escribe con
+un apóstrofo delante: el archivo se abre en hojas de cálculo y los datos
+los escribe cualquiera que pueda crear productos.
+"""
+import csv
+import io
+from datetime import datetime, time, timezone
+
+from django.conf import settings
+from django.utils.dateparse import parse_date, parse_datetime
+
+from platzi.renderers import dumps, iter_json_array
+
+from . import catalog
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+CSV_FIELDS = (
+    'id', 'title', 'slug', 'price', 'category_id', 'category',
+    'description', 'image', 'creationAt', 'updatedAt',
+)
+
+# Inicios de celda que una hoja de cálculo interpreta como fórmula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def parse_updated_since(value):
+    """Convierte '2025-01-31' o un datetime ISO 8601 en un datetime con zona."""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValueError(f'Fecha no válida: {value!r}')
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def iter_pages(category_id=None, page_size=None):
+    """Genera las páginas (listas de productos) del catálogo una a una."""
+    page_size = page_size or settings.EXPORT_PAGE_SIZE
+    params = {'limit': page_size}
+    if category_id is not None:
+        params['categoryId'] = category_id
+
+    offset = 0
+    while True:
+        response = catalog.get('products', params={**params, 'offset': offset})
+        response.raise_for_status()
+        page = response.json()
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+
+def updated_at(product):
+    """``updatedAt`` del producto como datetime con zona, o None si falta o no es válido."""
+    value = product.get('updatedAt')
+    if not isinstance(value, str):
+        return None
+    try:
+        moment = parse_datetime(value)
+    except ValueError:
+        # Bien formado pero imposible (p. ej. mes 13): la respuesta ya se está
+        # enviando y una excepción dejaría el archivo a medias
+        return None
+    if moment is not None and moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def iter_products(category_id=None, updated_since=None, page_size=None):
+    """Genera las páginas del catálogo ya filtradas por ``updated_since``."""
+    for page in iter_pages(category_id, page_size):
+        if updated_since is not None:
+            page = [product for product in page if (updated_at(product) or updated_since) >= updated_since]
+        if page:
+            yield page
+
+
+def csv_cell(value):
+    """Neutraliza el texto que una hoja de cálculo ejecutaría como fórmula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_row(product):
+    category = product.get('category') or {}
+    images = product.get('images') or ['']
+    return tuple(csv_cell(value) for value in (
+        product.get('id'), product.get('title'), product.get('slug'), product.get('price'),
+        category.get('id'), category.get('name'), product.get('description'),
+        images[0], product.get('creationAt'), product.get('updatedAt'),
+    ))
+
+
+def iter_csv(pages):
+    """Convierte las páginas en trozos de CSV (un trozo por página)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    for page in pages:
+        writer.writerows(csv_row(product) for product in page)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()  # Solo la cabecera: catálogo vacío
+
+
+def iter_ndjson(pages):
+    """Convierte las páginas en trozos de NDJSON (un producto por línea)."""
+    for page in pages:
+        yield b''.join(dumps(product) + b'\n' for product in page)
+
+
+def iter_json(pages):
+    """Convierte las páginas en trozos de un único array JSON."""
+    return iter_json_array(product for page in pages for product in page)
+
+
+def export(fmt, category_id=None, updated_since=None):
+    """Genera el catálogo en ``fmt`` ('csv', 'ndjson' o 'json') como trozos de bytes."""
+    pages = iter_products(category_id, updated_since)
+    if fmt == 'csv':
+        return iter_csv(pages)
+    if fmt == 'json':
+        return iter_json(pages)
+    return iter_ndjson(pages)
@@ -1,5 +1,6 @@
 from django import forms
 import requests
+from . import catalog
 
 
 class ProductForm(forms.Form):
@@ -67,12 +68,10 @@ class ProductForm(forms.Form):
     def get_category_choices(self):
         """Obtiene las categorías disponibles desde la API"""
         try:
-            response = requests.get('https://api.escuelajs.co/api/v1/categories', timeout=10)
-            if response.status_code == 200:
-                categories = response.json()
-                choices = [('', 'Selecciona una categoría')]
-                choices.extend([(cat['id'], cat['name']) for cat in categories])
-                return choices
+            categories = catalog.get_categories()
+            choices = [('', 'Selecciona una categoría')]
+            choices.extend([(cat['id'], cat['name']) for cat in categories])
+            return choices
         except requests.exceptions.RequestException:
             pass
         
@@ -0,0 +1,164 @@
+"""
+Peticiones "cubiertas" (hedged requests) a la API de productos.
+
+La latencia media de la API es buena, pero de vez en cuando una respuesta
+tarda mucho más y eso marca el p99 de product_detail. Para las peticiones
+GET (idempotentes) de catalog.get:
+
+1. Se lanza la petición y se espera hasta el umbral del endpoint: el p95
+   de las últimas CATALOG_HEDGE_WINDOW latencias (mínimo
+   CATALOG_HEDGE_MIN_DELAY).
+2. Si no ha respondido, se lanza una segunda petición igual y gana la
+   primera que responda; la otra se descarta al terminar.
+
+El coste extra está acotado por un presupuesto: cada petición suma
+CATALOG_HEDGE_BUDGET fichas (máximo CATALOG_HEDGE_BURST) y cada petición
+extra gasta una, así que como mucho se cubre esa fracción de las
+peticiones. Métricas: platzi_upstream_hedges_total (enviadas) y
+platzi_upstream_hedge_wins_total (las que respondieron antes).
+
+En Server-Timing (platzi/timing.py) solo cuenta el intento que gana: cada
+uno mide en su propio desglose y al terminar se suma el del ganador.
+"""
+import contextvars
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from platzi import metrics, timing
+
+
+class LatencyTracker:
+    """Ventana de las últimas latencias de un endpoint y su p95."""
+
+    # Cada cuántas muestras se recalcula el p95 (ordenar la ventana entera cada vez no compensa)
+    REFRESH_EVERY = 10
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self.p95 = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+            self._pending += 1
+            if self._pending >= self.REFRESH_EVERY and len(self.samples) >= settings.CATALOG_HEDGE_MIN_SAMPLES:
+                ordered = sorted(self.samples)
+                self.p95 = ordered[int(0.95 * (len(ordered) - 1))]
+                self._pending = 0
+
+    def threshold(self):
+        """Segundos a esperar antes de cubrir, o None si aún no hay muestras suficientes."""
+        if self.p95 is None:
+            return None
+        return max(settings.CATALOG_HEDGE_MIN_DELAY, self.p95)
+
+
+class HedgeBudget:
+    """Fichas para peticiones extra: se gana una fracción por petición y se gasta una por cobertura."""
+
+    def __init__(self):
+        self.tokens = 0.0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(settings.CATALOG_HEDGE_BURST, self.tokens + settings.CATALOG_HEDGE_BUDGET)
+
+    def withdraw(self):
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+budget = HedgeBudget()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def tracker(endpoint):
+    try:
+        return _trackers[endpoint]
+    except KeyError:
+        with _trackers_lock:
+            return _trackers.setdefault(endpoint, LatencyTracker(settings.CATALOG_HEDGE_WINDOW))
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.CATALOG_HEDGE_WORKERS, thread_name_prefix='catalog-hedge',
+                )
+    return _executor
+
+
+def close_when_done(future):
+    """La respuesta que perdió se cierra para devolver la conexión al pool."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def submit(executor, send):
+    """Lanza ``send()`` en el pool con el contexto de la petición y un desglose propio."""
+    breakdown = timing.Breakdown() if timing.current() is not None else None
+    # Cada hilo con una copia del contexto de la petición (Server-Timing, request_id)
+    future = executor.submit(contextvars.copy_context().run, timing.run_into, breakdown, send)
+    future.breakdown = breakdown
+    return future
+
+
+def result(future):
+    """Resultado del intento, sumando sus mediciones a las de la petición."""
+    try:
+        return future.result()
+    finally:
+        # Ya ha terminado: su desglose no cambia más
+        parent = timing.current()
+        if parent is not None and future.breakdown is not None:
+            parent.merge(future.breakdown)
+
+
+def hedged(endpoint, send):
+    """
+    Ejecuta ``send()`` (una petición GET) y, si tarda más que el umbral del
+    endpoint y queda presupuesto, una segunda en paralelo. Devuelve la
+    primera respuesta que llegue (o lanza la excepción si fallan las dos).
+    """
+    budget.deposit()
+    endpoint_tracker = tracker(endpoint)
+    threshold = endpoint_tracker.threshold()
+    if threshold is None:
+        return send()  # Sin datos todavía: petición normal
+
+    executor = get_executor()
+    primary = submit(executor, send)
+    done, _ = wait([primary], timeout=threshold)
+    if done or not budget.withdraw():
+        return result(primary)
+
+    metrics.observe_hedge(endpoint)
+    hedge = submit(executor, send)
+    pending = {primary, hedge}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        winner = next((future for future in done if future.exception() is None), None)
+        if winner is not None:
+            for future in pending | (done - {winner}):
+                future.add_done_callback(close_when_done)
+            if winner is hedge:
+                metrics.observe_hedge_win(endpoint)
+            return result(winner)
+    # Fallaron las dos: la excepción de la original
+    return result(primary)
@@ -0,0 +1,293 @@
+"""
+Caché HTTP (RFC 9111) en el transporte del cliente del catálogo.
+
+Independiente de la caché de Django (páginas y productos ya procesados),
+este adaptador se monta delante del transporte de ``catalog`` y guarda en
+disco las respuestas GET de ``products``, ``products/{id}`` y
+``categories`` respetando la semántica HTTP:
+
+- Frescura según ``Cache-Control: max-age`` o ``Expires`` (o, sin ellas,
+  el 10% del tiempo desde ``Last-Modified``, como mucho
+  CATALOG_HTTP_CACHE_HEURISTIC_MAX segundos), descontando la edad
+  (``Age``, ``Date``). Una respuesta fresca se sirve sin llamar a la API.
+- Una respuesta caducada (o con ``no-cache``) se revalida con
+  ``If-None-Match`` / ``If-Modified-Since``: si la API contesta 304 se
+  sirve el cuerpo guardado con las cabeceras actualizadas.
+- No se guardan respuestas con ``no-store`` ni ``Vary: *``; las de otras
+  cabeceras ``Vary`` solo se sirven si la petición coincide.
+- Un POST/PUT/DELETE correcto invalida la URL afectada (y su ``Location``).
+
+Cada entrada es una línea JSON con los metadatos seguida del cuerpo tal
+cual: el formato no depende de la versión de Python (sin marshal ni
+pickle) y un archivo dañado o truncado es solo un fallo de caché. En un
+acierto ``response.json()`` parsea el cuerpo con orjson. El almacén es una
+DiskLRUCache en CATALOG_HTTP_CACHE_DIR con un máximo de
+CATALOG_HTTP_CACHE_MAX_BYTES, compartida por todos los workers. Cada
+respuesta lleva la cabecera ``Cache-Status`` (RFC 9211) con el resultado.
+"""
+import re
+import time
+from datetime import timedelta
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from django.conf import settings
+from django.utils.http import parse_http_date_safe
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from platzi import metrics
+from platzi.renderers import dumps, loads
+
+from .diskcache import DiskLRUCache
+from .transport import SKIPPED_HEADERS
+
+# Versión del formato de las entradas: al cambiarla, las antiguas se ignoran
+FORMAT = 2
+
+# Recursos de la API que se guardan (ruta relativa a PLATZI_API_BASE_URL)
+CACHEABLE_PATHS = re.compile(r'products(/\d+)?|categories')
+
+# Respuestas que se guardan: solo las completas y correctas
+CACHEABLE_STATUS = {200}
+
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS', 'TRACE'}
+
+CACHE_STATUS_NAME = 'platzi'
+
+
+class CachedResponse(requests.Response):
+    """Respuesta construida desde la caché: json() parsea el cuerpo con orjson si es UTF-8."""
+
+    from_cache = False
+
+    def json(self, **kwargs):
+        if kwargs or (self.encoding or 'utf-8').lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().json(**kwargs)
+        try:
+            return loads(self.content)
+        except ValueError as exc:
+            raise requests.exceptions.JSONDecodeError(str(exc), '', 0) from exc
+
+
+def cache_control(headers):
+    """Directivas de ``Cache-Control`` como dict (nombre en minúsculas -> valor o None)."""
+    directives = {}
+    for part in headers.get('Cache-Control', '').split(','):
+        name, _, value = part.strip().partition('=')
+        if name:
+            directives.setdefault(name.lower(), value.strip('"') or None)
+    return directives
+
+
+def seconds(value):
+    """Valor delta-seconds (``max-age``, ``Age``) o None si no es válido."""
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers, response_time):
+    """Segundos que la respuesta es fresca desde que se generó (RFC 9111 §4.2.1)."""
+    directives = cache_control(headers)
+    if 'max-age' in directives:
+        return seconds(directives['max-age']) or 0
+    date = parse_http_date_safe(headers.get('Date', '')) or response_time
+    if 'Expires' in headers:
+        # Un Expires no válido (p. ej. "0") significa "ya caducada"
+        expires = parse_http_date_safe(headers['Expires'])
+        return max(0, expires - date) if expires else 0
+    last_modified = parse_http_date_safe(headers.get('Last-Modified', ''))
+    if last_modified and last_modified < date:
+        return min(0.1 * (date - last_modified), settings.CATALOG_HTTP_CACHE_HEURISTIC_MAX)
+    return 0
+
+
+def current_age(headers, request_time, response_time, now):
+    """Edad de la respuesta guardada (RFC 9111 §4.2.3)."""
+    date = parse_http_date_safe(headers.get('Date', ''))
+    apparent_age = max(0, response_time - date) if date else 0
+    age_value = seconds(headers.get('Age')) or 0
+    corrected_initial_age = max(apparent_age, age_value + (response_time - request_time))
+    return corrected_initial_age + (now - response_time)
+
+
+def stored_headers(headers):
+    return {name: value for name, value in headers.items() if name.lower() not in SKIPPED_HEADERS}
+
+
+class HTTPCacheAdapter(BaseAdapter):
+    """Adaptador de requests que sirve y revalida respuestas guardadas delante de ``inner``."""
+
+    def __init__(self, inner, store, base_url):
+        super().__init__()
+        self.inner = inner
+        self.store = store
+        self.base_url = base_url
+
+    def close(self):
+        self.inner.close()
+
+    def is_cacheable_url(self, url):
+        if not url.startswith(self.base_url):
+            return False
+        path = urlsplit(url[len(self.base_url):]).path.strip('/')
+        return CACHEABLE_PATHS.fullmatch(path) is not None
+
+    def send(self, request, stream=False, **kwargs):
+        if request.method not in SAFE_METHODS:
+            response = self.inner.send(request, stream=stream, **kwargs)
+            if 200 <= response.status_code < 400:
+                self.invalidate(request, response)
+            return response
+
+        request_directives = cache_control(request.headers)
+        if (
+            request.method != 'GET' or stream or 'no-store' in request_directives
+            or not self.is_cacheable_url(request.url)
+            # Peticiones ya condicionales o con credenciales: no son nuestras
+            or 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers
+            or 'Authorization' in request.headers
+        ):
+            return self.inner.send(request, stream=stream, **kwargs)
+
+        entry = self.lookup(request)
+        if entry is not None:
+            now = time.time()
+            headers = entry['headers']
+            age = current_age(headers, entry['request_time'], entry['response_time'], now)
+            lifetime = freshness_lifetime(headers, entry['response_time'])
+            max_age = seconds(request_directives.get('max-age'))
+            fresh = (
+                age < lifetime
+                and 'no-cache' not in cache_control(headers)
+                and 'no-cache' not in request_directives
+                and (max_age is None or age <= max_age)
+            )
+            if fresh:
+                metrics.observe_cache('http', True)
+                response = self.build_response(request, entry, 'hit', age=age)
+                response.from_cache = True
+                return response
+            if 'ETag' in headers:
+                request.headers['If-None-Match'] = headers['ETag']
+            if 'Last-Modified' in headers:
+                request.headers['If-Modified-Since'] = headers['Last-Modified']
+
+        request_time = time.time()
+        response = self.inner.send(request, stream=stream, **kwargs)
+        response_time = time.time()
+
+        if entry is not None and response.status_code == 304:
+            # Sigue valiendo: cabeceras nuevas (Date, ETag, Cache-Control...) sobre el cuerpo guardado
+            metrics.observe_cache('http', True)
+            entry['headers'].update(stored_headers(response.headers))
+            entry['request_time'], entry['response_time'] = request_time, response_time
+            self.save(request, entry)
+            response.close()
+            return self.build_response(request, entry, 'fwd=stale; fwd-status=304')
+
+        metrics.observe_cache('http', False)
+        forward = 'fwd=stale' if entry is not None else 'fwd=uri-miss'
+        if not self.is_storable(response):
+            response.headers['Cache-Status'] = f'{CACHE_STATUS_NAME}; {forward}; fwd-status={response.status_code}'
+            return response
+
+        entry = {
+            'format': FORMAT,
+            'vary': {name: request.headers.get(name) for name in self.vary_names(response.headers)},
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': stored_headers(response.headers),
+            'body': response.content,
+            'request_time': request_time,
+            'response_time': response_time,
+        }
+        self.save(request, entry)
+        return self.build_response(request, entry, f'{forward}; fwd-status={response.status_code}; stored')
+
+    def lookup(self, request):
+        """Entrada guardada para ``request`` (si coinciden las cabeceras de Vary), o None."""
+        data = self.store.get(request.url)
+        if data is None:
+            return None
+        entry = decode(data)
+        if entry is None:
+            return None
+        if any(request.headers.get(name) != value for name, value in entry['vary'].items()):
+            return None
+        return entry
+
+    def save(self, request, entry):
+        self.store.set(request.url, encode(entry))
+
+    def invalidate(self, request, response):
+        """Un método no seguro con éxito invalida la URL y su Location (RFC 9111 §4.4)."""
+        urls = {request.url}
+        for header in ('Location', 'Content-Location'):
+            if header in response.headers:
+                urls.add(urljoin(request.url, response.headers[header]))
+        for url in urls:
+            if url.startswith(self.base_url):
+                self.store.delete(url)
+
+    def is_storable(self, response):
+        """¿Se puede guardar la respuesta? (RFC 9111 §3)"""
+        if response.status_code not in CACHEABLE_STATUS:
+            return False
+        if 'no-store' in cache_control(response.headers):
+            return False
+        return '*' not in self.vary_names(response.headers)
+
+    @staticmethod
+    def vary_names(headers):
+        return [name.strip() for name in headers.get('Vary', '').split(',') if name.strip()]
+
+    @staticmethod
+    def build_response(request, entry, cache_status, age=None):
+        response = CachedResponse()
+        response.status_code = entry['status']
+        response.reason = entry['reason']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.headers['Cache-Status'] = f'{CACHE_STATUS_NAME}; {cache_status}'
+        if age is not None:
+            response.headers['Age'] = str(int(age))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = entry['body']
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(0)
+        return response
+
+
+def encode(entry):
+    """Metadatos en una línea JSON (sin saltos de línea) y el cuerpo detrás."""
+    meta = {name: value for name, value in entry.items() if name != 'body'}
+    meta['length'] = len(entry['body'])
+    return dumps(meta) + b'\n' + entry['body']
+
+
+def decode(data):
+    """Entrada guardada, o None si está dañada o es de otro formato."""
+    meta, separator, body = data.partition(b'\n')
+    try:
+        entry = loads(meta)
+    except ValueError:
+        return None
+    if not separator or not isinstance(entry, dict) or entry.get('format') != FORMAT:
+        return None
+    # Cuerpo truncado
+    if entry.pop('length', None) != len(body):
+        return None
+    entry['body'] = body
+    return entry
+
+
+def build_adapter(inner):
+    """Envuelve el adaptador ``inner`` con la caché HTTP si está activada."""
+    if not settings.CATALOG_HTTP_CACHE_ENABLED:
+        return inner
+    store = DiskLRUCache(settings.CATALOG_HTTP_CACHE_DIR, settings.CATALOG_HTTP_CACHE_MAX_BYTES)
+    return HTTPCacheAdapter(inner, store, settings.PLATZI_API_BASE_URL)
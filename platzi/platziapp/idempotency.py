@@ -0,0 +1,226 @@
+"""
+Claves de idempotencia para las vistas de escritura.
+
+Con el decorador ``@idempotent``, una petición POST/PUT/PATCH/DELETE que
+trae una clave (cabecera ``Idempotency-Key`` o campo ``idempotency_key`` del
+formulario, ver el tag ``{% idempotency_key_input %}``) se ejecuta una sola
+vez por usuario y clave. Los reintentos (doble clic, reenvío del navegador o
+de un proxy) reciben la respuesta registrada sin volver a ejecutar la vista.
+
+- La respuesta se guarda en la tabla IdempotencyKey durante IDEMPOTENCY_TTL
+  segundos y en la caché de Django, que es donde se consulta primero.
+- Dos envíos simultáneos: solo uno consigue insertar la clave (restricción
+  única); el otro espera hasta IDEMPOTENCY_WAIT segundos a que termine y
+  devuelve la misma respuesta, o 409 si sigue en curso.
+- La misma clave con otros datos devuelve 422.
+- Si la vista responde 5xx o lanza una excepción, la clave se libera para que
+  se pueda reintentar. Si el proceso muere a mitad, la clave queda en curso
+  hasta que vence su reserva (IDEMPOTENCY_LEASE) y entonces un reintento se
+  queda con ella.
+- Las claves caducadas las borra el worker (``run_jobs``) con purge_expired().
+"""
+import hashlib
+import re
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse, QueryDict
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+FORM_FIELD = 'idempotency_key'
+VALID_KEY = re.compile(r'^[A-Za-z0-9_.:-]{8,255}$')
+
+# Campos del formulario que no forman parte de los datos de la petición
+IGNORED_FIELDS = {'csrfmiddlewaretoken', FORM_FIELD}
+
+# Cabeceras de la respuesta que se guardan y se devuelven en los reintentos
+REPLAYED_HEADERS = ('Content-Type', 'Location')
+
+# Respuestas más grandes no se guardan (solo el código y las cabeceras)
+MAX_BODY_BYTES = 64 * 1024
+
+# Cada cuánto se vuelve a mirar una clave en curso mientras se espera
+POLL_INTERVAL = 0.1
+
+
+def get_key(request):
+    return request.headers.get(HEADER) or request.POST.get(FORM_FIELD)
+
+
+def fingerprint(request):
+    """Hash del método, la ruta y los datos enviados."""
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    if request.content_type == 'application/x-www-form-urlencoded':
+        # Del cuerpo y no de request.POST, que Django solo rellena en los POST
+        fields = QueryDict(request.body, encoding=request.encoding)
+    elif request.content_type == 'multipart/form-data' and request.method == 'POST':
+        # Django ya consumió el cuerpo al leer el formulario (get_key)
+        fields = request.POST.copy()
+        for name, files in request.FILES.lists():
+            fields.setlist(name, [f'{upload.name}:{upload.size}' for upload in files])
+    elif request.content_type == 'multipart/form-data':
+        # El separador cambia en cada envío del navegador
+        boundary = request.content_params.get('boundary', '').encode()
+        digest.update(request.body.replace(boundary, b'') if boundary else request.body)
+        return digest.hexdigest()
+    else:
+        digest.update(request.body)
+        return digest.hexdigest()
+    for name, values in sorted(fields.lists()):
+        if name not in IGNORED_FIELDS:
+            digest.update(f'{name}={values!r}\n'.encode())
+    return digest.hexdigest()
+
+
+def cache_key(user_id, key):
+    return f'idempotency:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def replay(entry):
+    """Reconstruye la respuesta registrada (dict de la caché)."""
+    response = HttpResponse(entry['body'], status=entry['status'])
+    for name, value in entry['headers'].items():
+        response[name] = value
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def as_entry(record):
+    return {
+        'fingerprint': record.fingerprint,
+        'status': record.response_status,
+        'headers': record.response_headers,
+        'body': bytes(record.response_body),
+    }
+
+
+def find_completed(user, key, fingerprint_value):
+    """
+    Espera a que termine la petición que tiene la clave.
+
+    Devuelve la respuesta a enviar, o None si la clave ya no existe (caducó,
+    se liberó por un error o venció la reserva de una petición que murió a
+    mitad) y hay que ejecutar la vista.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+    while True:
+        record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if record is None:
+            return None
+        now = timezone.now()
+        if record.expires_at <= now:
+            record.delete()
+            return None
+        if record.fingerprint != fingerprint_value:
+            return mismatch()
+        if record.status == IdempotencyKey.STATUS_COMPLETED:
+            return replay(as_entry(record))
+        # Las claves de antes de existir locked_until reservan desde su creación
+        lease_end = record.locked_until or record.created_at + timedelta(seconds=settings.IDEMPOTENCY_LEASE)
+        if lease_end <= now:
+            # Solo si sigue abandonada: otro reintento pudo quedársela antes
+            IdempotencyKey.objects.filter(
+                pk=record.pk, status=IdempotencyKey.STATUS_IN_PROGRESS, locked_until=record.locked_until,
+            ).delete()
+            return None
+        if time.monotonic() >= deadline:
+            return conflict()
+        time.sleep(POLL_INTERVAL)
+
+
+def conflict():
+    response = JsonResponse(
+        {'success': False, 'error': 'Hay una petición con esta clave de idempotencia en curso'},
+        status=409,
+    )
+    response['Retry-After'] = '1'
+    return response
+
+
+def mismatch():
+    return JsonResponse(
+        {'success': False, 'error': 'La clave de idempotencia ya se usó con otros datos'},
+        status=422,
+    )
+
+
+def idempotent(view):
+    """Ejecuta la vista una sola vez por usuario y clave de idempotencia."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('POST', 'PUT', 'PATCH', 'DELETE'):
+            return view(request, *args, **kwargs)
+        key = get_key(request)
+        if not key:
+            return view(request, *args, **kwargs)
+        if not VALID_KEY.match(key):
+            return JsonResponse({'success': False, 'error': 'Clave de idempotencia no válida'}, status=400)
+
+        user = request.user if request.user.is_authenticated else None
+        fingerprint_value = fingerprint(request)
+        ckey = cache_key(user.pk if user else None, key)
+
+        entry = cache.get(ckey)
+        if entry is not None:
+            return replay(entry) if entry['fingerprint'] == fingerprint_value else mismatch()
+
+        # Reservar la clave. Si otra petición ya la tiene, esperar su respuesta
+        # (un segundo intento por si la clave caducó o se liberó mientras tanto)
+        for _ in range(2):
+            try:
+                now = timezone.now()
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=user, key=key, fingerprint=fingerprint_value,
+                        locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LEASE),
+                        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL),
+                    )
+                break
+            except IntegrityError:
+                response = find_completed(user, key, fingerprint_value)
+                if response is not None:
+                    return response
+        else:
+            return conflict()
+
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                response.render()  # Respuestas de DRF o TemplateResponse
+        except BaseException:
+            record.delete()
+            raise
+        if response.status_code >= 500:
+            record.delete()
+            return response
+
+        record.status = IdempotencyKey.STATUS_COMPLETED
+        record.response_status = response.status_code
+        record.response_headers = {name: response[name] for name in REPLAYED_HEADERS if response.has_header(name)}
+        if not response.streaming and len(response.content) <= MAX_BODY_BYTES:
+            record.response_body = response.content
+        # Con update() y no save(): si la vista tardó más que la reserva, otro
+        # reintento pudo quedarse con la clave y esta fila ya no existe
+        updated = IdempotencyKey.objects.filter(pk=record.pk).update(
+            status=record.status, response_status=record.response_status,
+            response_headers=record.response_headers, response_body=record.response_body, locked_until=None,
+        )
+        if updated:
+            cache.set(ckey, as_entry(record), settings.IDEMPOTENCY_TTL)
+        return response
+
+    return wrapper
+
+
+def purge_expired():
+    """Borra las claves caducadas; devuelve cuántas."""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
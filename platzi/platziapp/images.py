@@ -0,0 +1,210 @@
+"""
+Proxy de imágenes de producto con miniaturas generadas al vuelo.
+
+La imagen original se descarga una sola vez y de ella se generan variantes
+en WebP y JPEG con anchos fijos (WIDTHS). Originales y variantes se guardan
+en una caché en disco con tamaño máximo (settings.IMAGE_CACHE_DIR y
+settings.IMAGE_CACHE_MAX_BYTES). Las URLs del proxy van firmadas para que
+no se pueda usar como proxy abierto hacia cualquier URL.
+
+La firma solo prueba que la URL viene de los datos de un producto, y esos
+los escribe cualquiera que pueda crear productos. Por eso solo se
+descargan imágenes de los hosts de IMAGE_ALLOWED_HOSTS, cuyas direcciones
+(tras resolver el DNS) deben ser públicas: nada de loopback, redes
+privadas ni link-local (p. ej. el servicio de metadatos de la nube). Las
+redirecciones se siguen a mano y se comprueba cada salto. La conexión se
+hace a la dirección comprobada (PinnedAddressAdapter): si se dejara a
+urllib3 resolver el nombre otra vez, un DNS que cambia de respuesta entre
+las dos consultas (DNS rebinding) se saltaría la comprobación.
+"""
+import io
+import ipaddress
+import socket
+from urllib.parse import urlencode, urljoin, urlsplit
+
+import requests
+from django.conf import settings
+from django.core.signing import Signer
+from django.http.request import validate_host
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from requests.adapters import HTTPAdapter
+
+from platzi import deadline, metrics, timing
+
+from .diskcache import DiskLRUCache
+
+# Anchos (px) de las variantes disponibles
+WIDTHS = (160, 320, 640, 960)
+
+# Formato de la URL -> (formato de Pillow, Content-Type)
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+
+# Tamaño máximo de la imagen original que aceptamos descargar
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+
+# Redirecciones que se siguen al descargar una imagen
+MAX_REDIRECTS = 3
+
+_signer = Signer(salt='platziapp.images')
+cache = DiskLRUCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_BYTES)
+
+
+class ImageError(Exception):
+    """La imagen original no se pudo descargar o procesar."""
+
+
+class PinnedAddressAdapter(HTTPAdapter):
+    """
+    Adaptador para peticiones cuya URL ya lleva la IP comprobada y la
+    cabecera Host el nombre original (ver pinned_request). En HTTPS el nombre
+    se usa también para el SNI y para verificar el certificado.
+    """
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        hostname = urlsplit(f"//{request.headers.get('Host', '')}").hostname
+        if host_params['scheme'] == 'https' and hostname:
+            pool_kwargs['server_hostname'] = hostname
+        return host_params, pool_kwargs
+
+
+_session = requests.Session()
+_session.mount('http://', PinnedAddressAdapter())
+_session.mount('https://', PinnedAddressAdapter())
+
+
+def sign(source_url):
+    return _signer.signature(source_url)
+
+
+def is_valid_signature(source_url, signature):
+    return constant_time_compare(sign(source_url), signature)
+
+
+def is_allowed_url(source_url):
+    """¿Es una URL http(s) de un host de IMAGE_ALLOWED_HOSTS?"""
+    if not isinstance(source_url, str):
+        return False
+    try:
+        parts = urlsplit(source_url)
+        parts.port  # Lanza ValueError si el puerto no es válido
+    except ValueError:
+        return False
+    return (
+        parts.scheme in ('http', 'https') and bool(parts.hostname)
+        and validate_host(parts.hostname, settings.IMAGE_ALLOWED_HOSTS)
+    )
+
+
+def check_address(source_url):
+    """
+    Devuelve la dirección a la que conectar para ``source_url`` (None si se
+    permiten direcciones privadas y no se comprueba). Lanza ImageError si el
+    host no está permitido o alguna de sus direcciones no es pública.
+    """
+    if not is_allowed_url(source_url):
+        raise ImageError(f'Host de imagen no permitido: {source_url}')
+    if settings.IMAGE_ALLOW_PRIVATE_ADDRESSES:
+        return None
+    parts = urlsplit(source_url)
+    try:
+        addresses = socket.getaddrinfo(parts.hostname, parts.port or 443, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError) as exc:
+        raise ImageError(f'No se pudo resolver {parts.hostname}: {exc}')
+    checked = []
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split('%', 1)[0])
+        if not address.is_global:
+            raise ImageError(f'Dirección no pública para {parts.hostname}: {address}')
+        checked.append(address)
+    if not checked:
+        raise ImageError(f'No se pudo resolver {parts.hostname}')
+    return checked[0]
+
+
+def pinned_request(url, address):
+    """
+    URL y cabeceras para pedir ``url`` conectando a ``address`` sin volver a
+    resolver el nombre.
+    """
+    if address is None:
+        return url, {}
+    parts = urlsplit(url)
+    host = parts.hostname if parts.port is None else f'{parts.hostname}:{parts.port}'
+    ip = f'[{address}]' if address.version == 6 else str(address)
+    netloc = ip if parts.port is None else f'{ip}:{parts.port}'
+    return parts._replace(netloc=netloc).geturl(), {'Host': host}
+
+
+def proxy_url(source_url, width, fmt):
+    """URL del proxy para la variante ``width``/``fmt`` de ``source_url``."""
+    query = urlencode({'src': source_url, 'sig': sign(source_url)})
+    return f"{reverse('platziapp:image_proxy', args=[width, fmt])}?{query}"
+
+
+def fetch_source(source_url):
+    """Descarga la imagen original (o la lee de la caché)."""
+    key = f'src:{source_url}'
+    data = cache.get(key)
+    metrics.observe_cache('image_source', data is not None)
+    if data is not None:
+        return data
+
+    url = source_url
+    try:
+        with timing.timed('upstream'):
+            for _ in range(MAX_REDIRECTS + 1):
+                pinned_url, headers = pinned_request(url, check_address(url))
+                with _session.get(
+                    pinned_url, headers=headers, timeout=deadline.timeout(settings.API_TIMEOUT),
+                    stream=True, allow_redirects=False,
+                ) as response:
+                    if response.is_redirect:
+                        url = urljoin(url, response.headers['Location'])
+                        continue
+                    response.raise_for_status()
+                    data = response.raw.read(MAX_SOURCE_BYTES + 1, decode_content=True)
+                    break
+            else:
+                raise ImageError(f'Demasiadas redirecciones: {source_url}')
+    except requests.exceptions.RequestException as exc:
+        raise ImageError(f'No se pudo descargar {source_url}: {exc}')
+    if len(data) > MAX_SOURCE_BYTES:
+        raise ImageError(f'Imagen demasiado grande: {source_url}')
+    cache.set(key, data)
+    return data
+
+
+def resize(data, width, fmt):
+    """Redimensiona la imagen a ``width`` px de ancho y la codifica en ``fmt``."""
+    from PIL import Image, UnidentifiedImageError  # Import perezoso: solo lo usa el proxy
+
+    pil_format, _ = FORMATS[fmt]
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width > width:
+                height = round(image.height * width / image.width)
+                image = image.resize((width, height), Image.LANCZOS)
+            if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            output = io.BytesIO()
+            image.save(output, pil_format, quality=80, optimize=True)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as exc:
+        # DecompressionBombError: dimensiones enormes (p. ej. un PNG pequeño de 50000x50000 px)
+        raise ImageError(f'Imagen no válida: {exc}')
+    return output.getvalue()
+
+
+def get_variant(source_url, width, fmt):
+    """Devuelve los bytes de la variante, generándola si no está en la caché."""
+    key = f'{width}.{fmt}:{source_url}'
+    data = cache.get(key)
+    metrics.observe_cache('image_variant', data is not None)
+    if data is None:
+        data = resize(fetch_source(source_url), width, fmt)
+        cache.set(key, data)
+    return data
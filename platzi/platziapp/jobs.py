@@ -0,0 +1,195 @@
+"""
+Cola de trabajos en PostgreSQL para las escrituras en la API de productos.
+
+Las vistas de crear, editar y borrar llaman a enqueue() y responden al
+momento; el comando ``python manage.py run_jobs`` (uno o varios procesos)
+reclama los trabajos con ``SELECT ... FOR UPDATE SKIP LOCKED``, así dos
+workers nunca ejecutan el mismo trabajo, y llama a la API.
+
+- Éxito: el trabajo pasa a 'succeeded' y guarda la respuesta en ``result``.
+- Error de conexión, timeout, 5xx, 408 o 429: se reintenta con backoff
+  exponencial (JOB_BACKOFF_BASE * 2^intento, máximo JOB_BACKOFF_MAX, con jitter).
+- Otro 4xx, o agotados los JOB_MAX_ATTEMPTS intentos: pasa a 'dead'
+  (dead-letter) y queda para revisión manual (admin).
+- Un trabajo 'running' cuyo worker murió se vuelve a reclamar pasados
+  JOB_LOCK_TIMEOUT segundos.
+
+Crear no es idempotente (la API no admite claves de idempotencia): si el
+POST llegó a la API, repetirlo duplicaría el producto. Por eso un 'create'
+solo se reintenta cuando es seguro que no se procesó (no se pudo conectar,
+429 o 503); cualquier otro fallo, o un 'create' que se quedó en 'running'
+al morir su worker, pasa a 'dead' para revisarlo a mano.
+"""
+import logging
+import random
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from urllib3.exceptions import NewConnectionError
+
+from . import catalog
+from .models import ProductJob
+
+logger = logging.getLogger(__name__)
+
+# Códigos de la API que merece la pena reintentar
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Los únicos con los que un 'create' seguro que no se procesó
+CREATE_RETRYABLE_STATUS = {429, 503}
+
+# Acción -> (método, código de éxito)
+ACTIONS = {
+    ProductJob.ACTION_CREATE: ('POST', 201),
+    ProductJob.ACTION_UPDATE: ('PUT', 200),
+    ProductJob.ACTION_DELETE: ('DELETE', 200),
+}
+
+
+class PermanentError(Exception):
+    """La API rechazó la petición: reintentarla no va a servir."""
+
+
+def enqueue(action, payload=None, product_id=None, user=None):
+    """Encola una escritura y devuelve el ProductJob creado."""
+    job = ProductJob.objects.create(
+        action=action,
+        payload=payload or {},
+        product_id=product_id,
+        user=user if user is not None and user.is_authenticated else None,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+    logger.info('Trabajo %s encolado', job.pk, extra={'job_action': action, 'product_id': product_id})
+    return job
+
+
+def claim(worker_id):
+    """Reclama el siguiente trabajo listo para ejecutarse (o None)."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    with transaction.atomic():
+        while True:
+            job = (
+                ProductJob.objects
+                .select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=ProductJob.STATUS_PENDING, run_at__lte=now)
+                    | Q(status=ProductJob.STATUS_RUNNING, locked_at__lt=stale)
+                )
+                .order_by('run_at')
+                .first()
+            )
+            if job is None:
+                return None
+            if job.status == ProductJob.STATUS_RUNNING and job.action == ProductJob.ACTION_CREATE:
+                # Su worker murió con el POST quizá ya enviado: repetirlo a ciegas podría duplicarlo
+                fail(job, 'Worker interrumpido durante la creación: comprobar si el producto '
+                          'ya existe antes de reintentar', retry=False)
+                continue
+            break
+        ProductJob.objects.filter(pk=job.pk).update(
+            status=ProductJob.STATUS_RUNNING,
+            attempts=F('attempts') + 1,
+            locked_at=now,
+            locked_by=worker_id,
+        )
+    job.refresh_from_db()
+    return job
+
+
+def backoff(attempts):
+    """Segundos hasta el siguiente intento (exponencial con jitter)."""
+    delay = min(settings.JOB_BACKOFF_MAX, settings.JOB_BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.5)
+
+
+def call_api(job):
+    """Hace la petición a la API; devuelve el JSON de la respuesta."""
+    method, expected = ACTIONS[job.action]
+    path = 'products' if job.action == ProductJob.ACTION_CREATE else f'products/{job.product_id}'
+    payload = None if job.action == ProductJob.ACTION_DELETE else job.payload
+    response = catalog.request(method, path, json=payload)
+
+    if response.status_code == expected:
+        try:
+            return response.json()
+        except ValueError:
+            return None
+    message = f'HTTP {response.status_code}: {response.text[:500]}'
+    if response.status_code in RETRYABLE_STATUS:
+        raise requests.exceptions.HTTPError(message, response=response)
+    raise PermanentError(message)
+
+
+def not_sent(exc):
+    """¿Falló la petición sin llegar a enviarse? (no se pudo conectar)"""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+    return isinstance(exc, requests.exceptions.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+def is_retryable(job, exc):
+    """¿Se puede repetir la petición sin riesgo? Los 'create' solo si seguro que no se procesó."""
+    if job.action != ProductJob.ACTION_CREATE:
+        return True
+    response = getattr(exc, 'response', None)
+    if response is not None:
+        return response.status_code in CREATE_RETRYABLE_STATUS
+    return not_sent(exc)
+
+
+def execute(job):
+    """Ejecuta un trabajo ya reclamado y guarda el resultado."""
+    try:
+        result = call_api(job)
+    except PermanentError as exc:
+        fail(job, str(exc), retry=False)
+    except requests.exceptions.RequestException as exc:
+        fail(job, str(exc) or type(exc).__name__, retry=is_retryable(job, exc))
+    except Exception as exc:
+        logger.exception('Trabajo %s: error inesperado', job.pk)
+        fail(job, f'{type(exc).__name__}: {exc}', retry=job.action != ProductJob.ACTION_CREATE)
+    else:
+        job.status = ProductJob.STATUS_SUCCEEDED
+        job.result = result
+        job.last_error = ''
+        if job.action == ProductJob.ACTION_CREATE and isinstance(result, dict):
+            job.product_id = result.get('id')
+        job.locked_at = None
+        job.save(update_fields=['status', 'result', 'last_error', 'product_id', 'locked_at', 'updated_at'])
+        if job.product_id is not None:
+            # La copia en caché ya no vale. Solo llega a los workers web si la
+            # caché por defecto es compartida; con LocMemCache cada uno renueva
+            # la suya al caducar (CATALOG_PRODUCT_CACHE_TIMEOUT)
+            cache.delete(catalog.product_cache_key(job.product_id))
+        logger.info('Trabajo %s completado', job.pk, extra={'job_action': job.action, 'product_id': job.product_id})
+    return job
+
+
+def fail(job, error, retry):
+    job.last_error = error
+    job.locked_at = None
+    if retry and job.attempts < job.max_attempts:
+        job.status = ProductJob.STATUS_PENDING
+        job.run_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+        logger.warning('Trabajo %s falló (intento %s/%s), se reintentará: %s',
+                       job.pk, job.attempts, job.max_attempts, error)
+    else:
+        job.status = ProductJob.STATUS_DEAD
+        logger.error('Trabajo %s descartado tras %s intentos: %s', job.pk, job.attempts, error)
+    job.save(update_fields=['status', 'run_at', 'last_error', 'locked_at', 'updated_at'])
+
+
+def process_next(worker_id):
+    """Reclama y ejecuta un trabajo. Devuelve False si no había ninguno."""
+    job = claim(worker_id)
+    if job is None:
+        return False
+    execute(job)
+    return True
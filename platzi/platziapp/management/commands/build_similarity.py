@@ -0,0 +1,38 @@
+"""
+Construye el índice de similitud de los productos relacionados
+(platziapp/similarity.py).
+
+Uso:
+    python manage.py build_similarity                 # construcción completa
+    python manage.py build_similarity --incremental   # solo los cambios desde la última vez
+"""
+import time
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from platziapp import similarity
+
+
+class Command(BaseCommand):
+    help = 'Construye (o actualiza) el índice de productos relacionados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Aplicar solo los trabajos de escritura completados desde la última actualización',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            if options['incremental']:
+                updated = similarity.update_from_jobs()
+                if updated is None:
+                    raise CommandError('El índice no existe: ejecuta build_similarity sin --incremental')
+                message = f'{updated} productos recalculados'
+            else:
+                message = f'{similarity.rebuild()} productos indexados'
+        except requests.exceptions.RequestException as exc:
+            raise CommandError(f'Error de conexión con la API: {exc}')
+        self.stdout.write(self.style.SUCCESS(f'{message} en {time.perf_counter() - start:.2f} s'))
@@ -0,0 +1,53 @@
+"""
+Construye los archivos estáticos para producción.
+
+1. Descarga (vendoriza) las dependencias de CDN de settings.STATIC_VENDOR_ASSETS
+   en static/, para no depender de un CDN externo en cada página.
+2. Ejecuta collectstatic, que con CompressedManifestStaticFilesStorage añade
+   la huella (hash) a los nombres y escribe las variantes .gz y .br.
+
+Uso:
+    python manage.py build_static
+    python manage.py build_static --refresh   # vuelve a descargar lo vendorizado
+"""
+from pathlib import Path
+
+import requests
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Vendoriza dependencias de CDN y recopila estáticos con huella y precomprimidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--refresh', action='store_true',
+            help='Descarga de nuevo los archivos vendorizados aunque ya existan',
+        )
+        parser.add_argument(
+            '--skip-vendor', action='store_true',
+            help='No descarga dependencias; solo ejecuta collectstatic',
+        )
+
+    def handle(self, *args, **options):
+        if not options['skip_vendor']:
+            self.vendor(Path(settings.STATICFILES_DIRS[0]), options['refresh'])
+
+        call_command('collectstatic', interactive=False, clear=True, verbosity=options['verbosity'])
+        self.stdout.write(self.style.SUCCESS(f'Estáticos listos en {settings.STATIC_ROOT}'))
+
+    def vendor(self, target_dir, refresh):
+        for path, url in settings.STATIC_VENDOR_ASSETS.items():
+            target = target_dir / path
+            if target.exists() and not refresh:
+                continue
+            try:
+                response = requests.get(url, timeout=30)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as exc:
+                raise CommandError(f'No se pudo descargar {url}: {exc}')
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(response.content)
+            self.stdout.write(f'Vendorizado {path} ({len(response.content)} bytes)')
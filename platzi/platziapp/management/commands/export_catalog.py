@@ -0,0 +1,45 @@
+"""
+Exporta el catálogo completo de la API en CSV, NDJSON o JSON.
+
+Uso:
+    python manage.py export_catalog > catalog.csv
+    python manage.py export_catalog --format ndjson --category 2 --updated-since 2025-06-01 -o catalog.ndjson
+"""
+import sys
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from platziapp import export
+
+
+class Command(BaseCommand):
+    help = 'Exporta el catálogo de productos en CSV, NDJSON o JSON (página a página)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv')
+        parser.add_argument('--category', type=int, default=None, help='Solo productos de esta categoría')
+        parser.add_argument(
+            '--updated-since', default=None,
+            help='Solo productos modificados desde esta fecha (YYYY-MM-DD o ISO 8601)',
+        )
+        parser.add_argument('-o', '--output', default=None, help='Archivo de salida (por defecto stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            updated_since = options['updated_since'] and export.parse_updated_since(options['updated_since'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        chunks = export.export(options['format'], options['category'], updated_since or None)
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        except requests.exceptions.RequestException as exc:
+            raise CommandError(f'Error de conexión con la API: {exc}')
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
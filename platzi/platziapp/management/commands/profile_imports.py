@@ -0,0 +1,66 @@
+"""
+Perfil del tiempo de importación de platzi.wsgi (arranque en frío de un worker).
+
+Ejecuta ``python -X importtime -c "import platzi.wsgi"`` en un proceso nuevo
+y muestra los módulos que más tardan, para saber qué conviene importar de
+forma perezosa.
+
+Uso:
+    python manage.py profile_imports
+    python manage.py profile_imports --top 40 --sort self
+    python manage.py profile_imports --module platzi.wsgi --raw importtime.txt
+"""
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def parse_importtime(output):
+    """Convierte la salida de -X importtime en [(módulo, self_us, cumulative_us)]."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Mide el tiempo de importación de platzi.wsgi por módulo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='platzi.wsgi', help='Módulo a importar')
+        parser.add_argument('--top', type=int, default=25, help='Módulos a mostrar')
+        parser.add_argument('--sort', choices=('cumulative', 'self'), default='cumulative')
+        parser.add_argument('--raw', default=None, help='Guardar la salida completa de -X importtime aquí')
+
+    def handle(self, *args, **options):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'platzi.settings'),
+            # Medir solo la importación, sin el calentamiento en segundo plano
+            'PLATZI_WARMUP': '0',
+        }
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f"import {options['module']}"],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"No se pudo importar {options['module']}:\n{result.stderr[-2000:]}")
+        if options['raw']:
+            with open(options['raw'], 'w') as raw:
+                raw.write(result.stderr)
+
+        rows = parse_importtime(result.stderr)
+        total = next((cumulative for module, _, cumulative in rows if module == options['module']), 0)
+        index = 1 if options['sort'] == 'self' else 2
+        rows.sort(key=lambda row: row[index], reverse=True)
+
+        self.stdout.write(f"{'self ms':>9} {'acum. ms':>9}  módulo")
+        for module, self_us, cumulative_us in rows[:options['top']]:
+            self.stdout.write(f'{self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}  {module}')
+        self.stdout.write(f"\n{len(rows)} módulos, {total / 1000:.1f} ms para importar {options['module']}")
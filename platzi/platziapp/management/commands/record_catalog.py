@@ -0,0 +1,67 @@
+"""
+Graba en el almacén de respuestas las páginas del catálogo que usa la
+aplicación, para poder servirlas en modo 'snapshot' si la API se cae.
+
+Uso:
+    python manage.py record_catalog
+    python manage.py record_catalog --max-products 50
+"""
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from platziapp import catalog, transport
+
+
+class Command(BaseCommand):
+    help = 'Graba las respuestas de la API de productos para el modo snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-products', type=int, default=None,
+            help='Número máximo de fichas de producto a grabar (por defecto todas)',
+        )
+
+    def handle(self, *args, **options):
+        store = transport.RecordingStore(settings.CATALOG_RECORDINGS_PATH)
+        session = requests.Session()
+        session.mount(catalog.API_BASE_URL, transport.RecordReplayAdapter(store, 'record'))
+
+        def fetch(path, params=None):
+            response = session.get(catalog.build_url(path), params=params, timeout=settings.API_TIMEOUT)
+            self.stdout.write(f'{response.status_code} {response.url.removeprefix(catalog.API_BASE_URL)}')
+            return response
+
+        def fetch_pages(page_size, params_for):
+            # Hasta la primera página incompleta, como quien la pide. La
+            # grabación se busca por URL exacta: los parámetros deben ir en
+            # el mismo orden que en la petición real
+            offset = 0
+            while True:
+                response = fetch('products', params=params_for(offset))
+                response.raise_for_status()
+                if len(response.json()) < page_size:
+                    return
+                offset += page_size
+
+        try:
+            products = fetch('products').json()
+            categories = fetch('categories').json()
+            fetch('products?limit=20')
+            for category in categories:
+                fetch(f"categories/{category['id']}/products")
+            for product in products[:options['max_products']]:
+                fetch(f"products/{product['id']}")
+            # Inicio, scroll infinito y precalentamiento (catalog.get_products_page)
+            fetch_pages(settings.HOME_PAGE_SIZE, lambda offset: {'offset': offset, 'limit': settings.HOME_PAGE_SIZE})
+            # Exportación, analítica, índice de similares y snapshot (export.iter_pages),
+            # con el catálogo completo y filtrado por categoría
+            for category_id in [None] + [category['id'] for category in categories]:
+                params = {'limit': settings.EXPORT_PAGE_SIZE}
+                if category_id is not None:
+                    params['categoryId'] = category_id
+                fetch_pages(settings.EXPORT_PAGE_SIZE, lambda offset: {**params, 'offset': offset})
+        except requests.exceptions.RequestException as exc:
+            raise CommandError(f'Error de conexión con la API: {exc}')
+
+        self.stdout.write(self.style.SUCCESS(f'Respuestas grabadas en {settings.CATALOG_RECORDINGS_PATH}'))
@@ -0,0 +1,103 @@
+"""
+Worker de la cola de escrituras en la API de productos (platziapp/jobs.py).
+Con la cola vacía también borra las claves de idempotencia y los tokens
+de refresco caducados, aplica los cambios al índice de productos
+relacionados (platziapp/similarity.py) y regenera la instantánea del
+catálogo (platziapp/snapshot.py) si existe.
+
+Se pueden arrancar varios procesos a la vez: cada trabajo se reclama con
+SKIP LOCKED y solo lo ejecuta uno. Con SIGTERM/SIGINT termina el trabajo en
+curso y sale.
+
+Uso:
+    python manage.py run_jobs
+    python manage.py run_jobs --once      # vacía la cola y sale
+"""
+import logging
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts import tokens
+from platziapp import idempotency, jobs, snapshot
+
+logger = logging.getLogger('platziapp.jobs')
+
+# Segundos entre limpiezas de claves de idempotencia y tokens de refresco caducados
+PURGE_INTERVAL = 600
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los trabajos pendientes de escritura en la API de productos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Procesar lo pendiente y salir')
+        parser.add_argument(
+            '--poll-interval', type=float, default=None,
+            help='Segundos de espera cuando la cola está vacía (por defecto JOB_POLL_INTERVAL)',
+        )
+
+    def handle(self, *args, **options):
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        poll_interval = options['poll_interval'] or settings.JOB_POLL_INTERVAL
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.stdout.write(f'Worker {worker_id} esperando trabajos')
+        processed = 0
+        last_purge = 0
+        last_similarity_update = 0
+        last_snapshot = time.monotonic()
+        snapshot_stale = False
+        while not self.stopping:
+            # Como en cada petición web: descartar conexiones caídas o caducadas
+            close_old_connections()
+            if jobs.process_next(worker_id):
+                processed += 1
+                snapshot_stale = True
+                continue
+            if time.monotonic() - last_purge >= PURGE_INTERVAL:
+                idempotency.purge_expired()
+                tokens.purge_expired()
+                last_purge = time.monotonic()
+            if time.monotonic() - last_similarity_update >= settings.SIMILARITY_UPDATE_INTERVAL:
+                self.update_similarity()
+                last_similarity_update = time.monotonic()
+            # Tras escribir en la API, o cada CATALOG_SNAPSHOT_REFRESH_INTERVAL
+            if snapshot_stale or time.monotonic() - last_snapshot >= settings.CATALOG_SNAPSHOT_REFRESH_INTERVAL:
+                self.sync_snapshot()
+                last_snapshot = time.monotonic()
+                snapshot_stale = False
+            if options['once']:
+                break
+            time.sleep(poll_interval)
+
+        self.stdout.write(f'Worker {worker_id}: {processed} trabajos procesados')
+
+    def update_similarity(self):
+        # NumPy solo se importa si hace falta (el índice puede no estar construido)
+        if not settings.SIMILARITY_INDEX_PATH.exists():
+            return
+        from platziapp import similarity
+        try:
+            similarity.update_from_jobs()
+        except Exception:
+            logger.exception('Error al actualizar el índice de similitud')
+
+    def sync_snapshot(self):
+        # Solo si se ha creado alguna vez (python manage.py sync_catalog)
+        if not settings.CATALOG_SNAPSHOT_PATH.exists():
+            return
+        try:
+            snapshot.sync()
+        except Exception:
+            logger.exception('Error al regenerar la instantánea del catálogo')
+
+    def stop(self, signum, frame):
+        self.stopping = True
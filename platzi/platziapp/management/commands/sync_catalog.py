@@ -0,0 +1,32 @@
+"""
+Escribe la instantánea del catálogo que comparten los workers
+(platziapp/snapshot.py). Después la regenera el worker run_jobs.
+
+Uso:
+    python manage.py sync_catalog
+"""
+import time
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from platziapp import snapshot
+
+
+class Command(BaseCommand):
+    help = 'Descarga el catálogo de la API y escribe la instantánea compartida'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            count = snapshot.sync()
+        except requests.exceptions.RequestException as exc:
+            raise CommandError(f'Error de conexión con la API: {exc}')
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        size = settings.CATALOG_SNAPSHOT_PATH.stat().st_size
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} productos en {settings.CATALOG_SNAPSHOT_PATH} '
+            f'({size / 1024:.1f} KiB, {time.perf_counter() - start:.2f} s)'
+        ))
@@ -0,0 +1,30 @@
+"""
+Ejecuta el calentamiento (platziapp/warmup.py) y muestra cuánto tarda cada paso.
+
+Sirve para comprobar tras un despliegue que la BD y la API responden. Con una
+caché compartida (no LocMemCache) además deja precargado el catálogo para
+todos los workers.
+
+Uso:
+    python manage.py warmup
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from platziapp import warmup
+
+
+class Command(BaseCommand):
+    help = 'Conecta con la BD y la API y precarga categorías y primeras páginas del catálogo'
+
+    def handle(self, *args, **options):
+        status = warmup.run()
+        for name, result in status['steps'].items():
+            line = f"{name:<10} {result['ms']:>8.1f} ms"
+            if result['ok']:
+                self.stdout.write(f'{line}  ok')
+            else:
+                self.stdout.write(self.style.WARNING(f"{line}  {result['error']}"))
+
+        if not status['ready']:
+            raise CommandError('El calentamiento falló en un paso imprescindible')
+        self.stdout.write(self.style.SUCCESS('Calentamiento completado'))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('platziapp', '0002_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedProducts',
+            fields=[
+                ('product_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('card', models.JSONField(default=dict)),
+                ('related', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'related products',
+            },
+        ),
+    ]
@@ -1,3 +1,124 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class ProductJob(models.Model):
+    """
+    Escritura pendiente en la API de productos (crear, editar o borrar).
+
+    Las vistas solo encolan el trabajo; lo ejecuta un worker aparte
+    (``python manage.py run_jobs``) con reintentos y backoff exponencial.
+    Ver platziapp/jobs.py.
+    """
+
+    ACTION_CREATE = 'create'
+    ACTION_UPDATE = 'update'
+    ACTION_DELETE = 'delete'
+    ACTION_CHOICES = [
+        (ACTION_CREATE, 'Crear'),
+        (ACTION_UPDATE, 'Editar'),
+        (ACTION_DELETE, 'Borrar'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_DEAD = 'dead'  # Sin más reintentos (dead-letter): requiere revisión manual
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'En cola'),
+        (STATUS_RUNNING, 'En proceso'),
+        (STATUS_SUCCEEDED, 'Completado'),
+        (STATUS_DEAD, 'Fallido'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # Producto afectado (en 'create' se rellena al terminar con el id que asigna la API)
+    product_id = models.IntegerField(null=True, blank=True)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # Próxima ejecución (se retrasa con cada reintento)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Consulta del worker: trabajos pendientes cuya hora ya llegó
+            models.Index(fields=['status', 'run_at'], name='productjob_status_run_at'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_action_display()} producto {self.product_id or "-"} ({self.get_status_display()})'
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_DEAD)
+
+
+class IdempotencyKey(models.Model):
+    """
+    Respuesta registrada para una clave de idempotencia (cabecera
+    Idempotency-Key o campo oculto ``idempotency_key`` de los formularios).
+
+    La restricción única (user, key) es la que resuelve los envíos
+    simultáneos: solo una petición consigue crear la fila y ejecutar la vista.
+    Ver platziapp/idempotency.py.
+    """
+
+    STATUS_IN_PROGRESS = 'in_progress'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CHOICES = [
+        (STATUS_IN_PROGRESS, 'En curso'),
+        (STATUS_COMPLETED, 'Completada'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    # Hash del método, la ruta y el cuerpo: la misma clave con otros datos es un error
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=STATUS_IN_PROGRESS)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_headers = models.JSONField(default=dict, blank=True)
+    response_body = models.BinaryField(blank=True, default=b'')
+    # Mientras está en curso: pasada esta hora se da por abandonada (el worker
+    # murió) y un reintento puede quedarse con la clave
+    locked_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotencykey_user_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.key} ({self.get_status_display()})'
+
+
+class RelatedProducts(models.Model):
+    """
+    Productos relacionados de cada producto, precalculados por el índice de
+    similitud (platziapp/similarity.py). ``card`` y cada elemento de
+    ``related`` llevan lo que muestra la tarjeta de producto, así
+    product_detail no tiene que pedirlos a la API.
+    """
+
+    product_id = models.IntegerField(primary_key=True)
+    card = models.JSONField(default=dict)
+    related = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'related products'
+
+    def __str__(self):
+        return f'Relacionados con {self.product_id}'
@@ -0,0 +1,327 @@
+"""
+Índice de similitud de contenido para los productos relacionados.
+
+Cada producto se representa con un vector TF-IDF "hasheado" (hashing trick,
+SIMILARITY_DIMENSIONS posiciones) de las palabras del título (con más peso),
+de la descripción y de la categoría. La similitud es el coseno entre
+vectores normalizados, así que la tabla de vecinos sale de productos de
+matrices por bloques (SIMILARITY_BLOCK_ROWS filas).
+
+Los vectores son dispersos (scipy.sparse, CSR): un producto tiene unas
+decenas de palabras de las SIMILARITY_DIMENSIONS posiciones, y el producto
+de un bloque por el catálogo solo tiene entradas para los pares con alguna
+palabra en común. La memoria crece con las palabras y los pares parecidos,
+no con productos x dimensiones ni con bloque x productos.
+
+- Construcción completa (``python manage.py build_similarity``): pide el
+  catálogo a la API, calcula los vectores y los SIMILARITY_TOP_K vecinos de
+  cada producto.
+- Incremental (``build_similarity --incremental`` y el worker ``run_jobs``):
+  aplica los trabajos de escritura completados desde la última
+  actualización. Solo se recalculan los vecinos de los productos que
+  cambiaron, de los que los tenían como vecinos y de aquellos en los que
+  ahora entrarían. Los pesos IDF se mantienen hasta la próxima
+  construcción completa.
+
+Los vectores se guardan en SIMILARITY_INDEX_PATH (.npz) y los vecinos, ya
+con los datos de cada tarjeta, en la tabla RelatedProducts: product_detail
+los obtiene con una sola consulta y sin llamar a la API.
+"""
+import logging
+import os
+import re
+import tempfile
+import unicodedata
+import zlib
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+from django.db import transaction
+from django.utils import timezone
+
+from . import catalog, export
+from .models import ProductJob, RelatedProducts
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r'[a-z0-9]+')
+
+# Palabras demasiado comunes para distinguir productos
+STOPWORDS = frozenset('''
+    a al and con de del el en for in is it la las los of on or para por the to un una with y
+'''.split())
+
+# Peso de cada campo en el vector
+FIELD_WEIGHTS = {'title': 2.0, 'description': 1.0, 'category': 1.5}
+
+# Longitud máxima de la descripción guardada en cada tarjeta
+CARD_DESCRIPTION_CHARS = 200
+
+
+def tokenize(text):
+    text = unicodedata.normalize('NFKD', (text or '').lower()).encode('ascii', 'ignore').decode()
+    return [token for token in TOKEN.findall(text) if len(token) > 1 and token not in STOPWORDS]
+
+
+def features(product):
+    """(bucket, signo, peso) de cada palabra del producto."""
+    category = product.get('category') or {}
+    fields = {
+        'title': tokenize(product.get('title')),
+        'description': tokenize(product.get('description')),
+        'category': [f'category:{category.get("id")}'] if category.get('id') is not None else [],
+    }
+    dimensions = settings.SIMILARITY_DIMENSIONS
+    for field, tokens in fields.items():
+        for token in tokens:
+            # crc32 y no hash(): tiene que dar lo mismo en todos los procesos
+            digest = zlib.crc32(token.encode())
+            yield digest % dimensions, 1.0 if digest & 0x80000000 else -1.0, FIELD_WEIGHTS[field]
+
+
+def term_frequencies(products):
+    """Matriz dispersa (CSR) productos x dimensiones con las frecuencias (con signo y peso)."""
+    rows, buckets, values = [], [], []
+    for row, product in enumerate(products):
+        for bucket, sign, weight in features(product):
+            rows.append(row)
+            buckets.append(bucket)
+            values.append(sign * weight)
+    matrix = sparse.csr_matrix(
+        (np.array(values, dtype=np.float32), (rows, buckets)),
+        shape=(len(products), settings.SIMILARITY_DIMENSIONS),
+    )  # Suma las repeticiones de una misma posición
+    matrix.eliminate_zeros()  # Palabras con signos opuestos que se anulan
+    # TF sublineal: una palabra repetida no domina el vector
+    matrix.data = np.sign(matrix.data) * np.log1p(np.abs(matrix.data))
+    return matrix
+
+
+def idf_weights(frequencies):
+    documents = frequencies.shape[0]
+    document_frequency = np.bincount(frequencies.indices, minlength=frequencies.shape[1])
+    return (np.log((1 + documents) / (1 + document_frequency)) + 1).astype(np.float32)
+
+
+def vectorize(frequencies, idf):
+    vectors = sparse.csr_matrix(frequencies.multiply(idf[np.newaxis, :]), dtype=np.float32)
+    norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / norms) @ vectors, dtype=np.float32)
+
+
+def card(product):
+    """Lo que necesita la tarjeta de producto relacionado en product_detalles.html."""
+    category = product.get('category') or {}
+    return {
+        'id': product['id'],
+        'title': product.get('title', ''),
+        'price': product.get('price'),
+        'description': (product.get('description') or '')[:CARD_DESCRIPTION_CHARS],
+        'images': (product.get('images') or [])[:1],
+        'category': {'id': category.get('id'), 'name': category.get('name', '')} if category else None,
+    }
+
+
+class SimilarityIndex:
+    """Vectores de los productos (ordenados por id) y su tabla de vecinos."""
+
+    def __init__(self, ids, vectors, idf, neighbors, scores, updated_at):
+        self.ids = ids
+        self.vectors = vectors
+        self.idf = idf
+        self.neighbors = neighbors  # ids de los vecinos (-1 si hay menos de k)
+        self.scores = scores        # similitud de cada vecino, de mayor a menor
+        self.updated_at = updated_at
+
+    @classmethod
+    def build(cls, products):
+        products = sorted(products, key=lambda product: product['id'])
+        frequencies = term_frequencies(products)
+        idf = idf_weights(frequencies)
+        ids = np.array([product['id'] for product in products], dtype=np.int64)
+        k = settings.SIMILARITY_TOP_K
+        index = cls(
+            ids, vectorize(frequencies, idf), idf,
+            np.full((len(ids), k), -1, dtype=np.int64), np.zeros((len(ids), k), dtype=np.float32),
+            timezone.now(),
+        )
+        index.compute_neighbors(np.arange(len(ids)))
+        return index
+
+    def compute_neighbors(self, rows):
+        """Recalcula los k vecinos de las filas ``rows``."""
+        k = self.neighbors.shape[1]
+        transposed = self.vectors.T.tocsr()
+        block_rows = settings.SIMILARITY_BLOCK_ROWS
+        for start in range(0, len(rows), block_rows):
+            block = rows[start:start + block_rows]
+            # Solo hay entradas para los pares con alguna palabra en común
+            similarities = (self.vectors[block] @ transposed).tocsr()
+            self.neighbors[block] = -1
+            self.scores[block] = 0
+            for position, row in enumerate(block):
+                begin, end = similarities.indptr[position], similarities.indptr[position + 1]
+                columns, values = similarities.indices[begin:end], similarities.data[begin:end]
+                # Ni el propio producto ni los que no tienen nada en común (similitud <= 0)
+                keep = (columns != row) & (values > 0)
+                columns, values = columns[keep], values[keep]
+                if len(values) > k:
+                    top = np.argpartition(-values, k - 1)[:k]
+                    columns, values = columns[top], values[top]
+                # De mayor a menor similitud; a igualdad, el id menor
+                order = np.lexsort((self.ids[columns], -values))
+                self.neighbors[row, :len(order)] = self.ids[columns[order]]
+                self.scores[row, :len(order)] = values[order]
+
+    def update(self, products, removed_ids):
+        """
+        Aplica productos nuevos o modificados y productos borrados.
+        Devuelve los ids cuyos vecinos cambiaron.
+        """
+        changed_ids = np.array(sorted({product['id'] for product in products} | set(removed_ids)), dtype=np.int64)
+        if not len(changed_ids):
+            return set()
+        # Filas que tenían como vecino un producto que cambió
+        holders = set(self.ids[np.isin(self.neighbors, changed_ids).any(axis=1)].tolist())
+
+        keep = np.flatnonzero(~np.isin(self.ids, changed_ids))
+        ids, vectors = self.ids[keep], self.vectors[keep]
+        neighbors, scores = self.neighbors[keep], self.scores[keep]
+        if products:
+            products = sorted(products, key=lambda product: product['id'])
+            new_ids = np.array([product['id'] for product in products], dtype=np.int64)
+            new_vectors = vectorize(term_frequencies(products), self.idf)
+            ids = np.concatenate((ids, new_ids))
+            vectors = sparse.vstack((vectors, new_vectors), format='csr', dtype=np.float32)
+            neighbors = np.concatenate((neighbors, np.full((len(new_ids), neighbors.shape[1]), -1, dtype=np.int64)))
+            scores = np.concatenate((scores, np.zeros((len(new_ids), scores.shape[1]), dtype=np.float32)))
+            order = np.argsort(ids, kind='stable')
+            ids, vectors, neighbors, scores = ids[order], vectors[order], neighbors[order], scores[order]
+
+            # Filas en las que algún producto nuevo supera al peor vecino actual
+            best = (vectors @ new_vectors.T).max(axis=1).toarray().ravel()
+            weakest = np.where(neighbors[:, -1] >= 0, scores[:, -1], 0)
+            holders |= set(ids[best > weakest].tolist())
+            holders |= set(new_ids.tolist())
+
+        self.ids, self.vectors, self.neighbors, self.scores = ids, vectors, neighbors, scores
+        self.updated_at = timezone.now()
+        rows = np.flatnonzero(np.isin(self.ids, list(holders)))
+        self.compute_neighbors(rows)
+        return set(self.ids[rows].tolist())
+
+    def related_ids(self, product_id):
+        row = int(np.searchsorted(self.ids, product_id))
+        if row >= len(self.ids) or self.ids[row] != product_id:
+            return []
+        return [int(neighbor) for neighbor in self.neighbors[row] if neighbor >= 0]
+
+    def save(self, path=None):
+        """Guarda el índice de forma atómica (archivo temporal + os.replace)."""
+        path = path or settings.SIMILARITY_INDEX_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                np.savez(
+                    tmp, ids=self.ids, idf=self.idf, neighbors=self.neighbors, scores=self.scores,
+                    vectors_data=self.vectors.data, vectors_indices=self.vectors.indices,
+                    vectors_indptr=self.vectors.indptr, vectors_shape=np.array(self.vectors.shape),
+                    updated_at=np.array(self.updated_at.timestamp()),
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path=None):
+        """Carga el índice guardado, o None si todavía no se ha construido."""
+        path = path or settings.SIMILARITY_INDEX_PATH
+        try:
+            data = np.load(path)
+        except FileNotFoundError:
+            return None
+        with data:
+            if 'vectors' in data:  # Índice guardado con vectores densos
+                vectors = sparse.csr_matrix(data['vectors'])
+            else:
+                vectors = sparse.csr_matrix(
+                    (data['vectors_data'], data['vectors_indices'], data['vectors_indptr']),
+                    shape=tuple(data['vectors_shape']),
+                )
+            return cls(
+                data['ids'], vectors, data['idf'], data['neighbors'], data['scores'],
+                datetime.fromtimestamp(float(data['updated_at']), tz=dt_timezone.utc),
+            )
+
+
+def store(index, product_ids, cards):
+    """Guarda en RelatedProducts los vecinos de ``product_ids`` (con sus tarjetas)."""
+    product_ids = set(product_ids)
+    needed = product_ids | {neighbor for product_id in product_ids for neighbor in index.related_ids(product_id)}
+    # Tarjetas que no vienen en ``cards``: las de los productos ya guardados
+    missing = needed - cards.keys()
+    if missing:
+        cards = {**cards, **dict(RelatedProducts.objects.filter(pk__in=missing).values_list('product_id', 'card'))}
+    rows = [
+        RelatedProducts(
+            product_id=product_id, card=cards[product_id],
+            related=[cards[neighbor] for neighbor in index.related_ids(product_id) if neighbor in cards],
+        )
+        for product_id in product_ids if product_id in cards
+    ]
+    RelatedProducts.objects.bulk_create(
+        rows, batch_size=500, update_conflicts=True,
+        unique_fields=['product_id'], update_fields=['card', 'related', 'updated_at'],
+    )
+
+
+def rebuild():
+    """Construcción completa desde la API. Devuelve el número de productos."""
+    products = [product for page in export.iter_pages() for product in page]
+    index = SimilarityIndex.build(products)
+    with transaction.atomic():
+        RelatedProducts.objects.exclude(pk__in=index.ids.tolist()).delete()
+        store(index, index.ids.tolist(), {product['id']: card(product) for product in products})
+    index.save()
+    logger.info('Índice de similitud construido: %s productos', len(products))
+    return len(products)
+
+
+def update_from_jobs(index=None):
+    """
+    Aplica los trabajos completados desde la última actualización del índice.
+    Devuelve el número de productos cuyos vecinos cambiaron (None si no hay índice).
+    """
+    index = index or SimilarityIndex.load()
+    if index is None:
+        return None
+    now = timezone.now()
+    finished = ProductJob.objects.filter(
+        status=ProductJob.STATUS_SUCCEEDED, updated_at__gt=index.updated_at, updated_at__lte=now,
+    )
+    changed = set(finished.exclude(product_id=None).values_list('product_id', flat=True))
+    if not changed:
+        return 0
+
+    # El estado actual de cada producto; si la API ya no lo tiene, se borró.
+    # A la API: la instantánea y la caché pueden ser de antes de la escritura
+    found, errors = catalog.get_products(sorted(changed), fresh=True)
+    unavailable = {product_id for product_id, error in errors.items() if error != 'not_found'}
+    if unavailable:
+        logger.warning('Índice de similitud: no se pudieron pedir los productos %s', sorted(unavailable))
+        return 0  # Se reintenta en la siguiente actualización
+    removed = changed - found.keys()
+
+    updated = index.update(list(found.values()), removed)
+    index.updated_at = now
+    with transaction.atomic():
+        RelatedProducts.objects.filter(pk__in=removed).delete()
+        store(index, updated, {product_id: card(product) for product_id, product in found.items()})
+    index.save()
+    logger.info('Índice de similitud actualizado: %s productos cambiados, %s recalculados', len(changed), len(updated))
+    return len(updated)
@@ -0,0 +1,229 @@
+"""
+Instantánea binaria y compacta del catálogo, compartida entre workers.
+
+En lugar de que cada worker guarde el catálogo como dicts (una copia por
+proceso), ``python manage.py sync_catalog`` (o el worker ``run_jobs``)
+escribe un archivo en CATALOG_SNAPSHOT_PATH y cada worker lo abre en solo
+lectura con ``mmap``: el sistema operativo comparte las mismas páginas de
+memoria entre todos los procesos.
+
+Formato (little-endian, todas las secciones alineadas a 8 bytes):
+
+    cabecera     HEADER (magic, versión, productos, id mínimo, tamaño del índice, fecha)
+    ids          int64   x productos, en el orden del listado de la API
+    precios      float64 x productos
+    categorías   int64   x productos (-1 sin categoría)
+    offsets      uint64  x (productos * len(FIELDS) + 1): inicio de cada texto en la tabla
+    índice       int32   x (id máximo - id mínimo + 1): fila de cada id, -1 si no existe
+    textos       UTF-8 de los campos de FIELDS, uno tras otro
+
+La búsqueda por id es O(1) (índice directo) y las columnas numéricas se
+leen sin copiar (``memoryview.cast``). Al refrescar se escribe un archivo
+temporal y se cambia con os.replace: los workers que tienen abierto el
+anterior siguen leyéndolo hasta que detectan el cambio y abren el nuevo.
+"""
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PLZCAT\x00\x01'
+VERSION = 1
+HEADER = struct.Struct('<8sIIqqd')  # magic, versión, productos, id mínimo, tamaño del índice, fecha
+
+# Textos de cada producto (las imágenes van separadas por saltos de línea)
+FIELDS = ('title', 'slug', 'description', 'images', 'category_name', 'category_slug', 'creationAt', 'updatedAt')
+
+# El índice directo por id se usa si no es mucho más grande que el catálogo
+MAX_INDEX_RATIO = 8
+
+
+def text_fields(product):
+    category = product.get('category') or {}
+    values = {
+        'title': product.get('title'),
+        'slug': product.get('slug'),
+        'description': product.get('description'),
+        'images': '\n'.join(product.get('images') or []),
+        'category_name': category.get('name'),
+        'category_slug': category.get('slug'),
+        'creationAt': product.get('creationAt'),
+        'updatedAt': product.get('updatedAt'),
+    }
+    return [(values[field] or '').encode() for field in FIELDS]
+
+
+def write(products, path=None):
+    """Escribe la instantánea de ``products`` (en el orden del listado) de forma atómica."""
+    path = path or settings.CATALOG_SNAPSHOT_PATH
+    count = len(products)
+    ids = [int(product['id']) for product in products]
+    min_id = min(ids, default=0)
+    index_len = max(ids, default=-1) - min_id + 1
+    if index_len > MAX_INDEX_RATIO * count + 1024:
+        raise ValueError('Ids demasiado dispersos para el índice directo de la instantánea')
+
+    index = [-1] * index_len
+    for row, product_id in enumerate(ids):
+        index[product_id - min_id] = row
+
+    texts = []
+    offsets = [0]
+    for product in products:
+        for value in text_fields(product):
+            texts.append(value)
+            offsets.append(offsets[-1] + len(value))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(HEADER.pack(MAGIC, VERSION, count, min_id, index_len, time.time()))
+            tmp.write(struct.pack(f'<{count}q', *ids))
+            tmp.write(struct.pack(f'<{count}d', *(float(product.get('price') or 0) for product in products)))
+            tmp.write(struct.pack(f'<{count}q', *(category_id(product) for product in products)))
+            tmp.write(struct.pack(f'<{len(offsets)}Q', *offsets))
+            tmp.write(struct.pack(f'<{index_len}i', *index))
+            if index_len % 2:
+                tmp.write(b'\x00' * 4)  # Alineación a 8 bytes
+            for value in texts:
+                tmp.write(value)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return count
+
+
+def category_id(product):
+    category = product.get('category') or {}
+    return int(category['id']) if category.get('id') is not None else -1
+
+
+class Snapshot:
+    """Instantánea abierta con mmap (solo lectura)."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.stat = os.fstat(file.fileno())
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, count, self.min_id, index_len, self.created_at = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} no es una instantánea del catálogo')
+        self.count = count
+
+        position = HEADER.size
+
+        def section(fmt, length, size):
+            nonlocal position
+            column = view[position:position + length * size].cast(fmt)
+            position += length * size
+            return column
+
+        self.ids = section('q', count, 8)
+        self.prices = section('d', count, 8)
+        self.category_ids = section('q', count, 8)
+        self.offsets = section('Q', count * len(FIELDS) + 1, 8)
+        self.index = section('i', index_len, 4)
+        position += 4 * (index_len % 2)
+        self.texts = view[position:]
+
+    def __len__(self):
+        return self.count
+
+    def row(self, product_id):
+        """Fila del producto (O(1)), o None si no está."""
+        slot = product_id - self.min_id
+        if 0 <= slot < len(self.index):
+            row = self.index[slot]
+            if row >= 0:
+                return row
+        return None
+
+    def text(self, row, field):
+        position = row * len(FIELDS) + field
+        return str(self.texts[self.offsets[position]:self.offsets[position + 1]], 'utf-8')
+
+    def product(self, row):
+        """Producto de la fila ``row`` con la forma de la respuesta de la API."""
+        texts = {field: self.text(row, position) for position, field in enumerate(FIELDS)}
+        price = self.prices[row]
+        category = self.category_ids[row]
+        return {
+            'id': self.ids[row],
+            'title': texts['title'],
+            'slug': texts['slug'],
+            'price': int(price) if price.is_integer() else price,
+            'description': texts['description'],
+            'images': texts['images'].split('\n') if texts['images'] else [],
+            'category': {
+                'id': category, 'name': texts['category_name'], 'slug': texts['category_slug'],
+            } if category >= 0 else None,
+            'creationAt': texts['creationAt'],
+            'updatedAt': texts['updatedAt'],
+        }
+
+    def get(self, product_id):
+        row = self.row(product_id)
+        return None if row is None else self.product(row)
+
+    def page(self, offset, limit):
+        """Como GET products?offset=&limit= de la API."""
+        return [self.product(row) for row in range(offset, min(offset + limit, self.count))]
+
+    def is_current(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_ino, stat.st_mtime_ns) == (self.stat.st_ino, self.stat.st_mtime_ns)
+
+
+# Instantánea abierta en este proceso y cuándo se comprobó por última vez si cambió
+_snapshot = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def current():
+    """
+    Instantánea vigente, o None si no hay (o es más antigua que
+    CATALOG_SNAPSHOT_MAX_AGE): en ese caso se usa la API.
+    """
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    if now - _checked_at >= settings.CATALOG_SNAPSHOT_CHECK_INTERVAL:
+        with _lock:
+            path = settings.CATALOG_SNAPSHOT_PATH
+            if _snapshot is None or not _snapshot.is_current(path):
+                try:
+                    _snapshot = Snapshot(path)
+                except FileNotFoundError:
+                    _snapshot = None
+                except (ValueError, OSError, struct.error):
+                    logger.warning('Instantánea del catálogo no válida: %s', path, exc_info=True)
+                    _snapshot = None
+            _checked_at = now
+    snapshot = _snapshot
+    if snapshot is None or time.time() - snapshot.created_at > settings.CATALOG_SNAPSHOT_MAX_AGE:
+        return None
+    return snapshot
+
+
+def sync(path=None):
+    """Descarga el catálogo completo de la API y escribe la instantánea."""
+    # Importado aquí: export usa catalog, que a su vez usa este módulo
+    from . import export
+
+    products = [product for page in export.iter_pages() for product in page]
+    count = write(products, path)
+    logger.info('Instantánea del catálogo escrita: %s productos', count)
+    return count
@@ -0,0 +1,36 @@
+"""
+Etiquetas para servir las imágenes de producto a través del proxy.
+
+Uso:
+    {% load product_images %}
+    <picture>
+        <source type="image/webp" srcset="{% image_srcset product.images.0 'webp' %}" sizes="200px">
+        <img src="{% image_url product.images.0 320 %}" srcset="{% image_srcset product.images.0 %}" sizes="200px">
+    </picture>
+"""
+from django import template
+
+from platziapp import images
+
+register = template.Library()
+
+
+def _proxiable(source_url):
+    # Las de hosts no permitidos se dejan tal cual: el proxy no las descargaría
+    return images.is_allowed_url(source_url)
+
+
+@register.simple_tag
+def image_url(source_url, width, fmt='jpeg'):
+    """URL de una variante; si la imagen no es una URL válida se devuelve tal cual."""
+    if not _proxiable(source_url):
+        return source_url
+    return images.proxy_url(source_url, width, fmt)
+
+
+@register.simple_tag
+def image_srcset(source_url, fmt='jpeg'):
+    """Valor de ``srcset`` con todas las variantes de ``fmt``."""
+    if not _proxiable(source_url):
+        return ''
+    return ', '.join(f'{images.proxy_url(source_url, width, fmt)} {width}w' for width in images.WIDTHS)
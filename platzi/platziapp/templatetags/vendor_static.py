@@ -0,0 +1,31 @@
+"""
+Dependencias de terceros (Bootstrap, Font Awesome) servidas desde estáticos.
+
+``{% vendor_static 'vendor/bootstrap/5.3.0/css/bootstrap.min.css' %}`` devuelve
+la URL con huella del archivo vendorizado por ``manage.py build_static`` y,
+si todavía no se ha descargado, la URL original del CDN
+(settings.STATIC_VENDOR_ASSETS).
+"""
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def vendor_url(path):
+    if finders.find(path):
+        try:
+            return static(path)
+        except ValueError:
+            pass  # Sin manifest: collectstatic aún no se ha ejecutado
+    return settings.STATIC_VENDOR_ASSETS[path]
+
+
+@register.simple_tag
+def vendor_static(path):
+    return vendor_url(path)
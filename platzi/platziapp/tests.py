@@ -1,3 +1,1463 @@
-from django.test import TestCase
+import csv
+import io
+import ipaddress
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import requests
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.client import encode_multipart
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPResponse
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from platzi import timing
+
+from . import (
+    analytics, catalog, export, hedging, httpcache, idempotency, images, jobs, similarity, snapshot, transport, warmup,
+)
+from .diskcache import DiskLRUCache
+from .models import IdempotencyKey, ProductJob, RelatedProducts
+
+
+class IdempotencyTests(TestCase):
+    """Claves de idempotencia de las vistas de escritura (platziapp/idempotency.py)."""
+
+    product = {'title': 'Silla', 'price': '10', 'description': 'De madera', 'category_id': '1'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('ana')
+        self.client.force_login(self.user)
+
+    def create(self, key, **data):
+        return self.client.post(
+            reverse('platziapp:create_product'), {**self.product, **data}, HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_response_without_running_the_view(self):
+        first = self.create('alta-silla-0001')
+        second = self.create('alta-silla-0001')
+
+        self.assertEqual(ProductJob.objects.count(), 1)
+        self.assertEqual(second.status_code, first.status_code)
+        self.assertEqual(second['Location'], first['Location'])
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+
+    def test_replay_from_the_database_when_the_cache_is_lost(self):
+        first = self.create('alta-silla-0001')
+        cache.clear()  # Otro worker, o la caché se vació
+
+        second = self.create('alta-silla-0001')
+
+        self.assertEqual(ProductJob.objects.count(), 1)
+        self.assertEqual(second['Location'], first['Location'])
+
+    def test_same_key_with_other_data_is_rejected(self):
+        self.create('alta-silla-0001')
+
+        response = self.create('alta-silla-0001', title='Mesa')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(ProductJob.objects.count(), 1)
+
+    def test_keys_are_per_user(self):
+        self.create('alta-silla-0001')
+        self.client.force_login(User.objects.create_user('luis'))
+
+        self.create('alta-silla-0001')
+
+        self.assertEqual(ProductJob.objects.count(), 2)
+
+    def test_without_key_every_request_runs(self):
+        self.client.post(reverse('platziapp:create_product'), self.product)
+        self.client.post(reverse('platziapp:create_product'), self.product)
+
+        self.assertEqual(ProductJob.objects.count(), 2)
+
+    def test_invalid_key(self):
+        self.assertEqual(self.create('corta').status_code, 400)
+
+
+class IdempotentDecoratorTests(TestCase):
+    """Casos del decorador que no dependen de una vista concreta."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('ana')
+        self.calls = 0
+
+    def request(self, key='clave-0001'):
+        request = RequestFactory().post('/escritura/', {'campo': 'valor'}, HTTP_IDEMPOTENCY_KEY=key)
+        request.user = self.user
+        return request
+
+    def view(self, status):
+        @idempotency.idempotent
+        def view(request):
+            self.calls += 1
+            return HttpResponse('hecho', status=status)
+        return view
+
+    @override_settings(IDEMPOTENCY_WAIT=0)
+    def test_request_in_progress_gets_conflict(self):
+        request = self.request()
+        # Otra petición con la misma clave y los mismos datos aún no ha terminado
+        IdempotencyKey.objects.create(
+            user=self.user, key='clave-0001', fingerprint=idempotency.fingerprint(request),
+            expires_at=timezone.now() + timedelta(seconds=60),
+        )
+
+        response = self.view(201)(request)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(self.calls, 0)
+
+    def test_server_error_releases_the_key(self):
+        self.assertEqual(self.view(502)(self.request()).status_code, 502)
+
+        response = self.view(201)(self.request())
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(IdempotencyKey.objects.get().status, IdempotencyKey.STATUS_COMPLETED)
+
+    def test_expired_key_runs_the_view_again(self):
+        self.view(201)(self.request())
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        cache.clear()
+
+        self.view(201)(self.request())
+
+        self.assertEqual(self.calls, 2)
+
+    def test_abandoned_key_is_taken_over_after_the_lease(self):
+        request = self.request()
+        # El worker que tenía la clave murió sin liberarla
+        IdempotencyKey.objects.create(
+            user=self.user, key='clave-0001', fingerprint=idempotency.fingerprint(request),
+            locked_until=timezone.now() - timedelta(seconds=1),
+            expires_at=timezone.now() + timedelta(seconds=60),
+        )
+
+        response = self.view(201)(request)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.calls, 1)
+        record = IdempotencyKey.objects.get()
+        self.assertEqual(record.status, IdempotencyKey.STATUS_COMPLETED)
+        self.assertIsNone(record.locked_until)
+
+    def test_slow_view_that_lost_its_key_still_responds(self):
+        @idempotency.idempotent
+        def view(request):
+            # Pasada la reserva, un reintento borró la clave y se quedó con ella
+            IdempotencyKey.objects.all().delete()
+            return HttpResponse('hecho', status=201)
+
+        response = view(self.request())
+
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_form_encoded_put_bodies_are_compared(self):
+        def put(value):
+            request = RequestFactory().put(
+                '/escritura/', f'campo={value}&csrfmiddlewaretoken={value}',
+                content_type='application/x-www-form-urlencoded', HTTP_IDEMPOTENCY_KEY='clave-0001',
+            )
+            request.user = self.user
+            return request
+
+        self.assertEqual(self.view(200)(put('uno')).status_code, 200)
+
+        self.assertEqual(self.view(200)(put('dos')).status_code, 422)
+        self.assertEqual(self.calls, 1)
+
+    def test_multipart_boundary_is_ignored(self):
+        def fingerprint(boundary):
+            request = RequestFactory().patch(
+                '/escritura/', encode_multipart(boundary, {'campo': 'valor'}),
+                content_type=f'multipart/form-data; boundary={boundary}',
+            )
+            return idempotency.fingerprint(request)
+
+        self.assertEqual(fingerprint('----separador1'), fingerprint('----separador2'))
+
+
+def api_response(status, body=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(body if body is not None else {}).encode()
+    return response
+
+
+def connection_refused():
+    reason = NewConnectionError(None, 'Failed to establish a new connection: [Errno 111] Connection refused')
+    return requests.exceptions.ConnectionError(MaxRetryError(None, '/products', reason))
+
+
+@override_settings(JOB_MAX_ATTEMPTS=3, JOB_LOCK_TIMEOUT=120)
+class JobQueueTests(TestCase):
+    """Cola de escrituras en la API (platziapp/jobs.py)."""
+
+    def setUp(self):
+        cache.clear()
+
+    def run_job(self, job, outcome):
+        """Reclama el trabajo y lo ejecuta con ``outcome`` como respuesta (o excepción) de la API."""
+        claimed = jobs.claim('test-worker')
+        self.assertEqual(claimed.pk, job.pk)
+        kwargs = {'side_effect': outcome} if isinstance(outcome, Exception) else {'return_value': outcome}
+        with mock.patch.object(jobs.catalog, 'request', **kwargs):
+            return jobs.execute(claimed)
+
+    def test_claim_marks_the_job_running(self):
+        job = jobs.enqueue(ProductJob.ACTION_UPDATE, {'title': 'Silla'}, product_id=7)
+
+        claimed = jobs.claim('test-worker')
+
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, ProductJob.STATUS_RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertEqual(claimed.locked_by, 'test-worker')
+        # Ya no está disponible para otro worker
+        self.assertIsNone(jobs.claim('other-worker'))
+
+    def test_claim_waits_for_run_at(self):
+        job = jobs.enqueue(ProductJob.ACTION_DELETE, product_id=7)
+        ProductJob.objects.filter(pk=job.pk).update(run_at=timezone.now() + timedelta(minutes=1))
+
+        self.assertIsNone(jobs.claim('test-worker'))
+
+    def test_stale_running_update_is_reclaimed(self):
+        job = jobs.enqueue(ProductJob.ACTION_UPDATE, {'title': 'Silla'}, product_id=7)
+        jobs.claim('dead-worker')
+        ProductJob.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=121))
+
+        claimed = jobs.claim('test-worker')
+
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.attempts, 2)
+        self.assertEqual(claimed.locked_by, 'test-worker')
+
+    def test_recent_running_job_is_not_reclaimed(self):
+        jobs.enqueue(ProductJob.ACTION_UPDATE, {'title': 'Silla'}, product_id=7)
+        jobs.claim('busy-worker')
+
+        self.assertIsNone(jobs.claim('test-worker'))
+
+    def test_stale_running_create_goes_to_review_instead_of_rerunning(self):
+        job = jobs.enqueue(ProductJob.ACTION_CREATE, {'title': 'Silla'})
+        jobs.claim('dead-worker')
+        ProductJob.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=121))
+
+        self.assertIsNone(jobs.claim('test-worker'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ProductJob.STATUS_DEAD)
+        self.assertIn('Worker interrumpido', job.last_error)
+
+    def test_successful_create_stores_the_product_id(self):
+        job = jobs.enqueue(ProductJob.ACTION_CREATE, {'title': 'Silla'})
+
+        job = self.run_job(job, api_response(201, {'id': 99, 'title': 'Silla'}))
+
+        self.assertEqual(job.status, ProductJob.STATUS_SUCCEEDED)
+        self.assertEqual(job.product_id, 99)
+        self.assertEqual(job.result['title'], 'Silla')
+
+    def test_update_is_retried_with_backoff_until_max_attempts(self):
+        job = jobs.enqueue(ProductJob.ACTION_UPDATE, {'title': 'Silla'}, product_id=7)
+
+        for attempt in range(1, 4):
+            job = self.run_job(job, api_response(502))
+            if attempt < 3:
+                self.assertEqual(job.status, ProductJob.STATUS_PENDING)
+                self.assertGreater(job.run_at, timezone.now())
+                ProductJob.objects.filter(pk=job.pk).update(run_at=timezone.now())
+
+        self.assertEqual(job.status, ProductJob.STATUS_DEAD)
+        self.assertEqual(job.attempts, 3)
+
+    def test_client_error_is_not_retried(self):
+        job = jobs.enqueue(ProductJob.ACTION_UPDATE, {'title': ''}, product_id=7)
+
+        job = self.run_job(job, api_response(400, {'message': 'title should not be empty'}))
+
+        self.assertEqual(job.status, ProductJob.STATUS_DEAD)
+        self.assertIn('HTTP 400', job.last_error)
+
+    def test_create_is_retried_only_when_it_was_not_processed(self):
+        # La API no admite claves de idempotencia: reintentar un POST que
+        # quizá llegó duplicaría el producto
+        cases = [
+            (connection_refused(), ProductJob.STATUS_PENDING),
+            (requests.exceptions.ConnectTimeout(), ProductJob.STATUS_PENDING),
+            (api_response(429), ProductJob.STATUS_PENDING),
+            (api_response(503), ProductJob.STATUS_PENDING),
+            (requests.exceptions.ReadTimeout(), ProductJob.STATUS_DEAD),
+            (api_response(502), ProductJob.STATUS_DEAD),
+            (api_response(500), ProductJob.STATUS_DEAD),
+            (requests.exceptions.ConnectionError('Connection aborted'), ProductJob.STATUS_DEAD),
+        ]
+        for outcome, status in cases:
+            with self.subTest(outcome=outcome):
+                ProductJob.objects.all().delete()
+                job = jobs.enqueue(ProductJob.ACTION_CREATE, {'title': 'Silla'})
+
+                self.assertEqual(self.run_job(job, outcome).status, status)
+
+    def test_update_is_retried_after_a_read_timeout(self):
+        job = jobs.enqueue(ProductJob.ACTION_UPDATE, {'title': 'Silla'}, product_id=7)
+
+        job = self.run_job(job, requests.exceptions.ReadTimeout())
+
+        self.assertEqual(job.status, ProductJob.STATUS_PENDING)
+
+
+def product(product_id, title, category_id, description=''):
+    return {
+        'id': product_id, 'title': title, 'price': 10 * product_id, 'description': description,
+        'images': [f'https://i.imgur.com/{product_id}.jpeg'],
+        'category': {'id': category_id, 'name': f'Categoría {category_id}', 'slug': f'cat-{category_id}'},
+    }
+
+
+# Dos grupos sin palabras en común: sillas (1-3) y zapatillas (4-6)
+CORPUS = [
+    product(1, 'Silla de madera clasica', 1, 'Silla comoda de madera de roble'),
+    product(2, 'Silla de madera moderna', 1, 'Silla ligera de madera de pino'),
+    product(3, 'Silla de oficina', 1, 'Silla giratoria con ruedas'),
+    product(4, 'Zapatillas de running', 2, 'Zapatillas ligeras para correr'),
+    product(5, 'Zapatillas de trail', 2, 'Zapatillas con suela para montaña'),
+    product(6, 'Zapatillas urbanas', 2, 'Zapatillas de lona para la ciudad'),
+]
+
+
+class FakeCatalogMixin:
+    """Catálogo de la API en memoria (``self.api``) e índices en un directorio temporal."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        paths = override_settings(
+            SIMILARITY_INDEX_PATH=directory / 'similarity.npz',
+            CATALOG_SNAPSHOT_PATH=directory / 'catalog.snapshot',
+            CATALOG_SNAPSHOT_CHECK_INTERVAL=0,
+        )
+        paths.enable()
+        self.addCleanup(paths.disable)
+        self.addCleanup(setattr, snapshot, '_snapshot', None)
+        self.api = {item['id']: dict(item) for item in CORPUS}
+        self.fetched = []
+        for target, fake in (('platziapp.export.iter_pages', self.fake_pages), ('platziapp.catalog.fetch_product', self.fake_fetch)):
+            patcher = mock.patch(target, side_effect=fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fake_pages(self, category_id=None, page_size=None):
+        yield [self.api[product_id] for product_id in sorted(self.api)]
+
+    def fake_fetch(self, product_id):
+        self.fetched.append(product_id)
+        if product_id in self.api:
+            return self.api[product_id], None
+        return None, 'not_found'
+
+    def finish_job(self, action, product_id):
+        ProductJob.objects.create(action=action, product_id=product_id, status=ProductJob.STATUS_SUCCEEDED)
+
+    def related(self, product_id):
+        return [item['id'] for item in RelatedProducts.objects.get(pk=product_id).related]
+
+
+class SimilaritySnapshotTests(FakeCatalogMixin, TestCase):
+    """El índice incremental no debe leer la instantánea (anterior a la escritura)."""
+
+    def setUp(self):
+        super().setUp()
+        snapshot.write(CORPUS)
+        similarity.rebuild()
+
+    def test_deleted_product_leaves_the_index(self):
+        del self.api[2]
+        self.finish_job(ProductJob.ACTION_DELETE, 2)
+
+        similarity.update_from_jobs()
+
+        self.assertIn(2, self.fetched)
+        self.assertFalse(RelatedProducts.objects.filter(pk=2).exists())
+        self.assertNotIn(2, self.related(1))
+        # La instantánea (aún sin regenerar) sigue teniéndolo
+        self.assertIsNotNone(snapshot.current().get(2))
+
+    def test_edited_product_uses_the_api_data(self):
+        self.api[3] = product(3, 'Zapatillas de baloncesto', 2, 'Zapatillas altas para la pista')
+        self.finish_job(ProductJob.ACTION_UPDATE, 3)
+
+        similarity.update_from_jobs()
+
+        self.assertEqual(RelatedProducts.objects.get(pk=3).card['title'], 'Zapatillas de baloncesto')
+        self.assertEqual(set(self.related(3)), {4, 5, 6})
+        self.assertNotIn(3, self.related(1))
+
+
+class SnapshotTests(SimpleTestCase):
+    """Instantánea del catálogo compartida con mmap (platziapp/snapshot.py)."""
+
+    def setUp(self):
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = directory / 'catalog.snapshot'
+        paths = override_settings(
+            CATALOG_SNAPSHOT_PATH=self.path, CATALOG_SNAPSHOT_CHECK_INTERVAL=0, CATALOG_SNAPSHOT_MAX_AGE=3600,
+        )
+        paths.enable()
+        self.addCleanup(paths.disable)
+        self.addCleanup(setattr, snapshot, '_snapshot', None)
+
+    def test_write_and_read_round_trip(self):
+        products = [
+            {**product(10, 'Camión de juguete 🚚', 2), 'slug': 'camion', 'creationAt': '2024-05-01T12:00:00.000Z'},
+            {**product(3, 'Silla', 1), 'price': 12.5, 'images': []},
+            {**product(7, 'Sin categoría', 1), 'category': None, 'description': None},
+        ]
+
+        self.assertEqual(snapshot.write(products), 3)
+        catalog_snapshot = snapshot.Snapshot(self.path)
+
+        self.assertEqual(len(catalog_snapshot), 3)
+        self.assertEqual(catalog_snapshot.get(10), {**products[0], 'updatedAt': ''})
+        self.assertEqual(catalog_snapshot.get(3)['price'], 12.5)
+        self.assertEqual(catalog_snapshot.get(3)['images'], [])
+        self.assertIsNone(catalog_snapshot.get(7)['category'])
+        self.assertEqual(catalog_snapshot.get(7)['description'], '')
+        for missing in (0, 4, 11, -1):
+            self.assertIsNone(catalog_snapshot.get(missing))
+        # En el orden del listado, como la API
+        self.assertEqual([item['id'] for item in catalog_snapshot.page(1, 10)], [3, 7])
+        self.assertEqual(catalog_snapshot.page(3, 10), [])
+
+    def test_empty_catalog(self):
+        self.assertEqual(snapshot.write([]), 0)
+
+        catalog_snapshot = snapshot.current()
+
+        self.assertIsNotNone(catalog_snapshot)
+        self.assertEqual(len(catalog_snapshot), 0)
+        self.assertIsNone(catalog_snapshot.get(1))
+        self.assertEqual(catalog_snapshot.page(0, 20), [])
+
+    def test_sparse_ids_are_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'Ids demasiado dispersos'):
+            snapshot.write([product(1, 'Silla', 1), product(10 ** 6, 'Mesa', 1)])
+
+        self.assertFalse(self.path.exists())
+        self.assertEqual(list(self.path.parent.iterdir()), [])  # Sin temporales a medias
+
+    def test_current_follows_the_file(self):
+        self.assertIsNone(snapshot.current())
+        snapshot.write(CORPUS[:2])
+        first = snapshot.current()
+
+        snapshot.write(CORPUS)
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(snapshot.current()), len(CORPUS))
+        # El worker que aún la tiene abierta sigue leyendo la anterior
+        self.assertEqual(first.get(2)['title'], 'Silla de madera moderna')
+
+    def test_invalid_or_old_snapshot_is_ignored(self):
+        self.path.write_bytes(b'no es una instantanea' * 4)
+        with self.assertLogs('platziapp.snapshot', 'WARNING'):
+            self.assertIsNone(snapshot.current())
+
+        snapshot.write(CORPUS)
+        with override_settings(CATALOG_SNAPSHOT_MAX_AGE=0):
+            self.assertIsNone(snapshot.current())
+
+
+@override_settings(CATALOG_BATCH_MAX_IDS=5)
+class ProductsBatchTests(FakeCatalogMixin, TestCase):
+    """Varios productos en una petición (catalog.get_products y /api/products/batch)."""
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user('ana'))
+
+    def batch(self, ids):
+        return self.client.get(reverse('platziapp:products_batch'), {'ids': ids})
+
+    def test_missing_products_are_fetched_in_parallel_and_cached(self):
+        threads = set()
+        fetch = self.fake_fetch
+
+        def slow_fetch(product_id):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.05)
+            return fetch(product_id)
+
+        with mock.patch('platziapp.catalog.fetch_product', side_effect=slow_fetch):
+            found, errors = catalog.get_products([1, 2, 99, 3, 1])
+        self.assertGreater(len(threads), 1)
+        self.assertEqual(sorted(found), [1, 2, 3])
+        self.assertEqual(found[2]['title'], 'Silla de madera moderna')
+        self.assertEqual(errors, {99: 'not_found'})
+
+        # Los encontrados quedan en la caché; los que fallaron se vuelven a pedir
+        self.fetched.clear()
+        catalog.get_products([1, 2, 3, 99])
+        self.assertEqual(self.fetched, [99])
+
+        catalog.get_products([1, 2], fresh=True)
+        self.assertEqual(sorted(self.fetched), [1, 2, 99])
+
+    def test_snapshot_is_read_first(self):
+        snapshot.write(CORPUS)
+
+        found, errors = catalog.get_products([4, 5])
+
+        self.assertEqual(self.fetched, [])
+        self.assertEqual([found[4]['title'], found[5]['title']], ['Zapatillas de running', 'Zapatillas de trail'])
+        self.assertEqual(errors, {})
+
+    def test_view_keeps_the_requested_order(self):
+        response = self.batch('5, 99,1,5')
+
+        data = json.loads(response.content)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(data['success'])
+        self.assertEqual([item['id'] for item in data['products']], [5, 1])
+        self.assertEqual(data['errors'], {'99': 'not_found'})
+
+    def test_view_validates_the_ids(self):
+        for ids in ('', '1,dos', '1,2,3,4,5,6'):
+            with self.subTest(ids=ids):
+                self.assertEqual(self.batch(ids).status_code, 400)
+        self.assertEqual(self.fetched, [])
+        # Los repetidos cuentan una vez
+        self.assertEqual(self.batch('1,2,3,4,5,1').status_code, 200)
+
+
+class FetchProductTests(SimpleTestCase):
+    """Errores de catalog.fetch_product, que usa get_products."""
+
+    def test_errors(self):
+        invalid_json = api_response(200)
+        invalid_json._content = b'<html>'
+        cases = [
+            (api_response(400), 'not_found'),  # La API responde 400 cuando el id no existe
+            (api_response(500), 'upstream_error'),
+            (invalid_json, 'upstream_error'),
+            (connection_refused(), 'connection_error'),
+        ]
+        for outcome, error in cases:
+            with self.subTest(error=error):
+                kwargs = {'side_effect': outcome} if isinstance(outcome, Exception) else {'return_value': outcome}
+                with mock.patch.object(catalog, 'get', **kwargs):
+                    self.assertEqual(catalog.fetch_product(7), (None, error))
+
+        with mock.patch.object(catalog, 'get', return_value=api_response(200, {'id': 7})):
+            self.assertEqual(catalog.fetch_product(7), ({'id': 7}, None))
+
+
+class FakeAdapter(BaseAdapter):
+    """Transporte de requests que devuelve las respuestas de ``self.responses`` en orden."""
+
+    def __init__(self):
+        super().__init__()
+        self.responses = []
+        self.sent = []
+
+    def reply(self, status=200, body=b'[]', **headers):
+        headers.setdefault('Content-Type', 'application/json; charset=utf-8')
+        self.responses.append((status, {name.replace('_', '-'): value for name, value in headers.items()}, body))
+
+    def send(self, request, **kwargs):
+        self.sent.append(request)
+        status, headers, body = self.responses.pop(0)
+        response = requests.Response()
+        response.status_code = status
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.raw = io.BytesIO(body)
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class FreshnessTests(TestCase):
+    """Cálculos de RFC 9111 de platziapp/httpcache.py."""
+
+    def test_max_age_wins_over_expires(self):
+        headers = {'Cache-Control': 'public, max-age=60', 'Expires': http_date(0)}
+
+        self.assertEqual(httpcache.freshness_lifetime(headers, 1000), 60)
+
+    def test_expires_relative_to_date(self):
+        headers = {'Date': http_date(1_000_000), 'Expires': http_date(1_000_090)}
+
+        self.assertEqual(httpcache.freshness_lifetime(headers, 0), 90)
+
+    def test_invalid_expires_means_stale(self):
+        self.assertEqual(httpcache.freshness_lifetime({'Expires': '0'}, 1000), 0)
+
+    @override_settings(CATALOG_HTTP_CACHE_HEURISTIC_MAX=300)
+    def test_heuristic_freshness_from_last_modified(self):
+        date = 10_000_000
+        recent = {'Date': http_date(date), 'Last-Modified': http_date(date - 1000)}
+        old = {'Date': http_date(date), 'Last-Modified': http_date(date - 100_000)}
+
+        self.assertEqual(httpcache.freshness_lifetime(recent, date), 100)
+        self.assertEqual(httpcache.freshness_lifetime(old, date), 300)
+        self.assertEqual(httpcache.freshness_lifetime({}, date), 0)
+
+    def test_current_age(self):
+        headers = {'Date': http_date(1000), 'Age': '30'}
+
+        # Edad inicial: la mayor entre la aparente (1005 - 1000) y Age + el tiempo de respuesta (30 + 2)
+        self.assertEqual(httpcache.current_age(headers, 1003, 1005, 1015), 42)
+
+
+class HTTPCacheAdapterTests(TestCase):
+    """Adaptador de caché HTTP delante de un transporte falso."""
+
+    base_url = 'http://api.test/api/v1/'
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.store = DiskLRUCache(directory, 1024 * 1024)
+        self.inner = FakeAdapter()
+        self.session = requests.Session()
+        self.session.mount(self.base_url, httpcache.HTTPCacheAdapter(self.inner, self.store, self.base_url))
+
+    def get(self, path='products/1', **headers):
+        return self.session.get(
+            self.base_url + path, headers={name.replace('_', '-'): value for name, value in headers.items()},
+        )
+
+    def test_fresh_response_is_served_from_the_cache(self):
+        self.inner.reply(body=b'{"id":1,"title":"Silla"}', Cache_Control='max-age=60')
+
+        first = self.get()
+        second = self.get()
+
+        self.assertEqual(len(self.inner.sent), 1)
+        self.assertEqual(first.headers['Cache-Status'], 'platzi; fwd=uri-miss; fwd-status=200; stored')
+        self.assertEqual(second.headers['Cache-Status'], 'platzi; hit')
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.json(), {'id': 1, 'title': 'Silla'})
+        self.assertIn('Age', second.headers)
+
+    def test_stale_response_is_revalidated(self):
+        self.inner.reply(body=b'{"id":1}', Cache_Control='max-age=0', ETag='"v1"', Last_Modified=http_date(0))
+        self.inner.reply(304, b'', Cache_Control='max-age=60', ETag='"v1"', X_Upstream='nuevo')
+        self.get()
+
+        response = self.get()
+
+        revalidation = self.inner.sent[1]
+        self.assertEqual(revalidation.headers['If-None-Match'], '"v1"')
+        self.assertEqual(revalidation.headers['If-Modified-Since'], http_date(0))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'id': 1})
+        self.assertEqual(response.headers['Cache-Status'], 'platzi; fwd=stale; fwd-status=304')
+        # Las cabeceras del 304 sustituyen a las guardadas: ahora es fresca
+        self.assertEqual(response.headers['X-Upstream'], 'nuevo')
+        self.assertEqual(self.get().headers['Cache-Status'], 'platzi; hit')
+        self.assertEqual(len(self.inner.sent), 2)
+
+    def test_changed_resource_replaces_the_entry(self):
+        self.inner.reply(body=b'{"id":1,"v":1}', Cache_Control='no-cache', ETag='"v1"')
+        self.inner.reply(body=b'{"id":1,"v":2}', Cache_Control='max-age=60', ETag='"v2"')
+        self.get()
+
+        self.assertEqual(self.get().json()['v'], 2)
+        self.assertEqual(self.get().json()['v'], 2)
+        self.assertEqual(len(self.inner.sent), 2)
+
+    def test_vary_must_match(self):
+        self.inner.reply(body=b'"es"', Cache_Control='max-age=60', Vary='Accept-Language')
+        self.inner.reply(body=b'"en"', Cache_Control='max-age=60', Vary='Accept-Language')
+        self.get(Accept_Language='es')
+
+        self.assertEqual(self.get(Accept_Language='en').json(), 'en')
+        self.assertEqual(len(self.inner.sent), 2)
+
+    def test_no_store_and_vary_star_are_not_stored(self):
+        for headers in ({'Cache_Control': 'no-store, max-age=60'}, {'Cache_Control': 'max-age=60', 'Vary': '*'}):
+            with self.subTest(headers=headers):
+                self.inner.sent.clear()
+                self.inner.reply(**headers)
+                self.inner.reply(**headers)
+
+                self.get()
+                response = self.get()
+
+                self.assertEqual(len(self.inner.sent), 2)
+                self.assertEqual(response.headers['Cache-Status'], 'platzi; fwd=uri-miss; fwd-status=200')
+
+    def test_request_no_cache_forces_revalidation(self):
+        self.inner.reply(body=b'1', Cache_Control='max-age=60')
+        self.inner.reply(body=b'2', Cache_Control='max-age=60')
+        self.get()
+
+        self.assertEqual(self.get(Cache_Control='no-cache').json(), 2)
+
+    def test_unsafe_method_invalidates_the_url_and_location(self):
+        self.inner.reply(body=b'[1]', Cache_Control='max-age=60')
+        self.inner.reply(body=b'{"id":1}', Cache_Control='max-age=60')
+        self.get('products')
+        self.get('products/1')
+
+        self.inner.reply(200, b'{"id":1}', Location='/api/v1/products/1')
+        self.session.put(self.base_url + 'products', json={'id': 1})
+
+        self.inner.reply(body=b'[2]', Cache_Control='max-age=60')
+        self.inner.reply(body=b'{"id":2}', Cache_Control='max-age=60')
+        self.assertEqual(self.get('products').json(), [2])
+        self.assertEqual(self.get('products/1').json(), {'id': 2})
+
+    def test_failed_unsafe_method_keeps_the_entry(self):
+        self.inner.reply(body=b'[1]', Cache_Control='max-age=60')
+        self.get('products')
+        self.inner.reply(500, b'')
+
+        self.session.post(self.base_url + 'products', json={})
+
+        self.assertEqual(self.get('products').headers['Cache-Status'], 'platzi; hit')
+
+    def test_other_resources_are_not_cached(self):
+        self.inner.reply(body=b'{}', Cache_Control='max-age=60')
+
+        response = self.get('users/1')
+
+        self.assertNotIn('Cache-Status', response.headers)
+        self.assertIsNone(self.store.get(self.base_url + 'users/1'))
+
+    def test_damaged_entries_are_misses(self):
+        self.inner.reply(body=b'{"id":1,"title":"Silla"}', Cache_Control='max-age=60')
+        self.get()
+        url = self.base_url + 'products/1'
+        stored = self.store.get(url)
+        meta = json.loads(stored.partition(b'\n')[0])
+
+        for data in (stored[:-3], b'\x00garbage', json.dumps({**meta, 'format': 1}).encode() + b'\n{}'):
+            with self.subTest(data=data):
+                self.store.set(url, data)
+                self.inner.reply(body=b'{"id":1}', Cache_Control='max-age=60')
+
+                self.assertEqual(self.get().headers['Cache-Status'], 'platzi; fwd=uri-miss; fwd-status=200; stored')
+
+
+class RecordReplayTests(SimpleTestCase):
+    """Grabación y reproducción de respuestas de la API (platziapp/transport.py)."""
+
+    base_url = 'http://api.test/api/v1/'
+
+    def setUp(self):
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = directory / 'recordings.sqlite3'
+        self.upstream = FakeAdapter()
+        patcher = mock.patch.object(
+            HTTPAdapter, 'send', side_effect=lambda request, **kwargs: self.upstream.send(request),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def session(self, mode):
+        # Un almacén nuevo en cada sesión: lo reproducido sale de SQLite, no de la memoria
+        session = requests.Session()
+        session.mount(self.base_url, transport.RecordReplayAdapter(transport.RecordingStore(self.path), mode))
+        self.addCleanup(session.close)
+        return session
+
+    def test_record_then_replay_round_trip(self):
+        self.upstream.reply(body=b'[{"id":1,"title":"Silla"}]', ETag='"v1"', Set_Cookie='sesion=1')
+        self.upstream.reply(201, b'{"id":2}')
+        recorder = self.session('record')
+        recorded = recorder.get(self.base_url + 'products', params={'offset': 0, 'limit': 5})
+        recorder.post(self.base_url + 'products', json={'title': 'Mesa'})
+
+        replayer = self.session('replay')
+        replayed = replayer.get(self.base_url + 'products', params={'offset': 0, 'limit': 5})
+        created = replayer.post(self.base_url + 'products', json={'title': 'Mesa'})
+
+        self.assertEqual(len(self.upstream.sent), 2)
+        self.assertEqual(replayed.status_code, 200)
+        self.assertEqual(replayed.content, recorded.content)
+        self.assertEqual(replayed.json(), [{'id': 1, 'title': 'Silla'}])
+        self.assertEqual(replayed.headers['ETag'], '"v1"')
+        self.assertEqual(replayed.headers['X-Catalog-Replay'], '1')
+        self.assertNotIn('Set-Cookie', replayed.headers)
+        self.assertEqual((created.status_code, created.json()), (201, {'id': 2}))
+
+    def test_replay_is_keyed_by_url_and_body(self):
+        self.upstream.reply(body=b'{"id":1}')
+        self.session('record').post(self.base_url + 'products', json={'title': 'Mesa'})
+        replayer = self.session('replay')
+
+        with self.assertRaises(transport.ReplayMissError):
+            replayer.post(self.base_url + 'products', json={'title': 'Silla'})
+        with self.assertRaises(transport.ReplayMissError):
+            replayer.get(self.base_url + 'products', params={'offset': 5, 'limit': 5})
+
+    def test_server_errors_are_not_recorded(self):
+        self.upstream.reply(503, b'{"statusCode":503}')
+
+        self.assertEqual(self.session('record').get(self.base_url + 'products').status_code, 503)
+
+        with self.assertRaises(transport.ReplayMissError):
+            self.session('replay').get(self.base_url + 'products')
+
+    def test_snapshot_miss_is_a_connection_error(self):
+        # Las vistas ya tratan los errores de conexión como la API caída
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.session('snapshot').get(self.base_url + 'products/1')
+
+    def test_fallthrough_records_what_is_missing(self):
+        self.upstream.reply(body=b'{"id":1}')
+        fallthrough = self.session('fallthrough')
+
+        first = fallthrough.get(self.base_url + 'products/1')
+        second = fallthrough.get(self.base_url + 'products/1')
+
+        self.assertEqual(len(self.upstream.sent), 1)
+        self.assertNotIn('X-Catalog-Replay', first.headers)
+        self.assertEqual(second.json(), {'id': 1})
+        self.assertEqual(second.headers['X-Catalog-Replay'], '1')
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'Modo de transporte desconocido'):
+            transport.RecordReplayAdapter(transport.RecordingStore(self.path), 'offline')
+
+
+class SimilarityTests(FakeCatalogMixin, TestCase):
+    """Índice de similitud de contenido (platziapp/similarity.py)."""
+
+    def test_neighbors_of_a_known_corpus(self):
+        index = similarity.SimilarityIndex.build(CORPUS)
+
+        # Las dos sillas de madera son las más parecidas; nada en común con las zapatillas
+        self.assertEqual(index.related_ids(1), [2, 3])
+        self.assertEqual(index.related_ids(2), [1, 3])
+        self.assertEqual(set(index.related_ids(4)), {5, 6})
+        self.assertTrue(all(score > 0 for score in index.scores[0][:2]))
+        self.assertEqual(index.related_ids(99), [])
+
+    @override_settings(SIMILARITY_TOP_K=1, SIMILARITY_BLOCK_ROWS=2)
+    def test_top_k_and_blocks(self):
+        index = similarity.SimilarityIndex.build(CORPUS)
+
+        self.assertEqual([index.related_ids(product_id) for product_id in (1, 2)], [[2], [1]])
+        self.assertEqual(index.neighbors.shape, (6, 1))
+
+    def test_rebuild_stores_related_cards(self):
+        RelatedProducts.objects.create(product_id=99, card={'id': 99})
+
+        self.assertEqual(similarity.rebuild(), 6)
+
+        self.assertFalse(RelatedProducts.objects.filter(pk=99).exists())
+        row = RelatedProducts.objects.get(pk=1)
+        self.assertEqual(row.card['title'], 'Silla de madera clasica')
+        self.assertEqual([item['title'] for item in row.related], ['Silla de madera moderna', 'Silla de oficina'])
+
+    def test_save_and_load(self):
+        similarity.rebuild()
+
+        index = similarity.SimilarityIndex.load()
+
+        self.assertEqual(index.ids.tolist(), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(index.related_ids(1), [2, 3])
+        self.assertEqual(index.vectors.shape[0], 6)
+
+    def test_update_from_jobs_adds_new_products(self):
+        similarity.rebuild()
+        self.api[7] = product(7, 'Silla de madera plegable', 1, 'Silla de madera para la terraza')
+        self.finish_job(ProductJob.ACTION_CREATE, 7)
+
+        self.assertGreater(similarity.update_from_jobs(), 0)
+
+        self.assertEqual(self.related(7)[:2], [1, 2])
+        self.assertIn(7, self.related(1))
+        self.assertEqual(self.fetched, [7])
+
+    def test_update_from_jobs_skips_applied_jobs(self):
+        similarity.rebuild()
+        self.finish_job(ProductJob.ACTION_UPDATE, 2)
+        similarity.update_from_jobs()
+        self.fetched.clear()
+
+        self.assertEqual(similarity.update_from_jobs(), 0)
+        self.assertEqual(self.fetched, [])
+
+    def test_update_from_jobs_retries_when_the_api_fails(self):
+        similarity.rebuild()
+        self.finish_job(ProductJob.ACTION_UPDATE, 2)
+
+        with mock.patch('platziapp.catalog.fetch_product', return_value=(None, 'connection_error')):
+            self.assertEqual(similarity.update_from_jobs(), 0)
+
+        self.assertTrue(RelatedProducts.objects.filter(pk=2).exists())
+        # La siguiente actualización vuelve a intentarlo
+        similarity.update_from_jobs()
+        self.assertEqual(self.fetched, [2])
+
+    def test_without_index(self):
+        self.assertIsNone(similarity.update_from_jobs())
+
+
+class FakeUpstream:
+    """
+    ``send`` de pega: el intento n espera a que se suelte ``slow[n]`` (si lo
+    hay) y anota en el desglose de Server-Timing cuánto "tardó".
+    """
+
+    def __init__(self, slow=(), fail=()):
+        self.slow = {attempt: threading.Event() for attempt in slow}
+        self.fail = set(fail)
+        self.responses = []
+        self.threads = []
+        self._lock = threading.Lock()
+
+    def send(self):
+        with self._lock:
+            attempt = len(self.threads)
+            self.threads.append(threading.current_thread())
+        if attempt in self.slow:
+            self.slow[attempt].wait(5)
+        timing.record('upstream', attempt + 1)
+        if attempt in self.fail:
+            raise requests.exceptions.ConnectionError(f'intento {attempt}')
+        response = api_response(200, {'attempt': attempt})
+        response.raw = io.BytesIO()
+        self.responses.append(response)
+        return response
+
+    def release(self):
+        for event in self.slow.values():
+            event.set()
+
+
+@override_settings(
+    CATALOG_HEDGE_MIN_SAMPLES=10, CATALOG_HEDGE_MIN_DELAY=0.05,
+    CATALOG_HEDGE_BUDGET=0.5, CATALOG_HEDGE_BURST=2,
+)
+class HedgingTests(SimpleTestCase):
+    """Peticiones cubiertas a la API de productos (platziapp/hedging.py)."""
+
+    def setUp(self):
+        executor = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(executor.shutdown)
+        for name, value in (('_trackers', {}), ('budget', hedging.HedgeBudget()), ('_executor', executor)):
+            patcher = mock.patch.object(hedging, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.executor = executor
+
+    def warm_up(self, seconds=0.01):
+        for _ in range(20):
+            hedging.tracker('products').add(seconds)
+
+    def finish(self, upstream):
+        """Suelta los intentos lentos y espera a que terminen."""
+        upstream.release()
+        self.executor.shutdown(wait=True)
+
+    def test_threshold_is_the_p95_with_a_minimum(self):
+        tracker = hedging.LatencyTracker(100)
+        self.assertIsNone(tracker.threshold())  # Aún sin muestras suficientes
+
+        for number in range(1, 101):
+            tracker.add(number / 100)
+
+        self.assertEqual(tracker.threshold(), 0.95)
+        self.warm_up(0.001)
+        self.assertEqual(hedging.tracker('products').threshold(), 0.05)
+
+    def test_without_samples_sends_once_in_the_same_thread(self):
+        upstream = FakeUpstream()
+
+        response = hedging.hedged('products', upstream.send)
+
+        self.assertEqual(response.json(), {'attempt': 0})
+        self.assertEqual(upstream.threads, [threading.current_thread()])
+
+    def test_fast_response_is_not_hedged(self):
+        self.warm_up()
+        hedging.budget.tokens = 2
+        upstream = FakeUpstream()
+
+        response = hedging.hedged('products', upstream.send)
+
+        self.assertEqual(response.json(), {'attempt': 0})
+        self.assertEqual(len(upstream.threads), 1)
+        self.assertEqual(hedging.budget.tokens, 2)  # Sin gastar
+
+    def test_slow_response_is_hedged_and_first_winner_returned(self):
+        self.warm_up()
+        hedging.budget.tokens = 2
+        upstream = FakeUpstream(slow=[0])
+
+        response = hedging.hedged('products', upstream.send)
+
+        self.assertEqual(response.json(), {'attempt': 1})
+        self.assertEqual(hedging.budget.tokens, 1)
+        # La original termina después: se cierra para devolver la conexión
+        self.finish(upstream)
+        original, hedge = upstream.responses[1], upstream.responses[0]
+        self.assertEqual(original.json(), {'attempt': 0})
+        self.assertTrue(original.raw.closed)
+        self.assertFalse(hedge.raw.closed)
+
+    def test_no_hedge_without_budget(self):
+        self.warm_up()
+        upstream = FakeUpstream(slow=[0])
+        threading.Timer(0.2, upstream.release).start()
+
+        response = hedging.hedged('products', upstream.send)
+
+        # Con 0,5 fichas no llega para una petición extra: se espera a la original
+        self.assertEqual(response.json(), {'attempt': 0})
+        self.assertEqual(len(upstream.threads), 1)
+
+    def test_budget_caps_the_hedges(self):
+        self.warm_up()
+        hedging.budget.tokens = 2
+        hedges = 0
+
+        for _ in range(4):
+            upstream = FakeUpstream(slow=[0])
+            threading.Timer(0.2, upstream.release).start()
+            hedging.hedged('products', upstream.send)
+            hedges += len(upstream.threads) - 1
+
+        # 2 fichas iniciales + 0,5 por petición, y cada cobertura gasta 1
+        self.assertEqual(hedges, 3)
+
+    def test_failed_hedge_waits_for_the_original(self):
+        self.warm_up()
+        hedging.budget.tokens = 2
+        upstream = FakeUpstream(slow=[0], fail=[1])
+        threading.Timer(0.2, upstream.release).start()
+
+        response = hedging.hedged('products', upstream.send)
+
+        self.assertEqual(response.json(), {'attempt': 0})
+
+    def test_both_failing_raises_the_original_error(self):
+        self.warm_up()
+        hedging.budget.tokens = 2
+        upstream = FakeUpstream(slow=[0], fail=[0, 1])
+        threading.Timer(0.2, upstream.release).start()
+
+        with self.assertRaisesMessage(requests.exceptions.ConnectionError, 'intento 0'):
+            hedging.hedged('products', upstream.send)
+
+    def test_only_the_winner_counts_in_server_timing(self):
+        self.warm_up()
+        hedging.budget.tokens = 2
+        upstream = FakeUpstream(slow=[0])
+        breakdown = timing.Breakdown()
+
+        # Los intentos corren en otros hilos pero con el contexto de la petición
+        response = timing.run_into(breakdown, hedging.hedged, 'products', upstream.send)
+        self.finish(upstream)
+
+        self.assertEqual(response.json(), {'attempt': 1})
+        self.assertEqual(breakdown.durations, {'upstream': 2})
+        self.assertEqual(breakdown.counts, {'upstream': 1})
+
+
+class CatalogColumnsTests(SimpleTestCase):
+    """Agregaciones de CatalogColumns frente a las funciones de NumPy."""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.prices = {int(product_id): float(price) for product_id, price in zip(
+            rng.permutation(500) + 1, rng.gamma(2.0, 40.0, 500).round(2),
+        )}
+        self.columns = analytics.CatalogColumns(list(self.prices), list(self.prices.values()), [1] * 500)
+
+    def assertMatchesNumPy(self):
+        prices = np.array(list(self.prices.values()))
+        self.assertEqual(len(self.columns), len(prices))
+        percents = [0, 25, 50, 90, 99, 100]
+        np.testing.assert_allclose(self.columns.percentiles(percents), np.percentile(prices, percents))
+        counts, edges = self.columns.histogram(20)
+        expected_counts, expected_edges = np.histogram(prices, bins=20)
+        np.testing.assert_allclose(edges, expected_edges)
+        np.testing.assert_array_equal(counts, expected_counts)
+
+    def test_initial_load(self):
+        self.assertMatchesNumPy()
+
+    def test_upsert_and_remove(self):
+        self.columns.upsert(3, 999.5, 1)     # Cambia el máximo
+        self.columns.upsert(1000, 0.5, 2)    # Nuevo, el mínimo
+        self.columns.remove(7)
+        self.columns.remove(5000)            # No existe: no hace nada
+        self.prices.update({3: 999.5, 1000: 0.5})
+        del self.prices[7]
+
+        self.assertMatchesNumPy()
+        self.assertEqual(list(self.columns.ids), sorted(self.prices))
+
+    def test_summary(self):
+        self.columns.upsert(1000, 50.0, 2)
+        self.prices[1000] = 50.0
+        prices = np.array(list(self.prices.values()))
+
+        summary = self.columns.summary(bins=10)
+
+        self.assertEqual(summary['count'], 501)
+        self.assertEqual(summary['price']['mean'], round(float(prices.mean()), 2))
+        self.assertEqual(summary['price']['percentiles']['p50'], round(float(np.median(prices)), 2))
+        self.assertEqual([(c['id'], c['count']) for c in summary['categories']], [(1, 500), (2, 1)])
+        self.assertEqual(sum(summary['histogram']['counts']), 501)
+
+    def test_empty_catalog(self):
+        self.assertEqual(analytics.CatalogColumns([], [], []).summary()['count'], 0)
+
+
+@override_settings(ANALYTICS_SYNC_OVERLAP=300, ANALYTICS_RELOAD_INTERVAL=3600)
+class AnalyticsSyncTests(FakeCatalogMixin, TestCase):
+    """Sincronización incremental de las estadísticas con los trabajos completados."""
+
+    def setUp(self):
+        super().setUp()
+        for name in ('_columns', '_loaded_at', '_synced_at', '_applied'):
+            self.addCleanup(setattr, analytics, name, getattr(analytics, name))
+        analytics.reload()
+
+    def finish_update(self, product_id, price, **fields):
+        job = ProductJob.objects.create(
+            action=ProductJob.ACTION_UPDATE, product_id=product_id, status=ProductJob.STATUS_SUCCEEDED,
+            result={'id': product_id, 'price': price, 'category': {'id': 1}},
+        )
+        if fields:
+            ProductJob.objects.filter(pk=job.pk).update(**fields)
+        return job
+
+    def prices(self):
+        columns = analytics.get_columns()
+        return dict(zip(columns.ids.tolist(), columns.prices.tolist()))
+
+    def test_finished_jobs_are_applied(self):
+        self.finish_update(1, 99.0)
+        ProductJob.objects.create(action=ProductJob.ACTION_DELETE, product_id=2, status=ProductJob.STATUS_SUCCEEDED)
+
+        prices = self.prices()
+
+        self.assertEqual(prices[1], 99.0)
+        self.assertNotIn(2, prices)
+
+    def test_late_commit_is_not_skipped(self):
+        self.prices()  # Sincroniza
+        # Un trabajo que se confirma ahora pero con updated_at de antes de la sincronización
+        self.finish_update(1, 99.0, updated_at=timezone.now() - timedelta(seconds=60))
+
+        self.assertEqual(self.prices()[1], 99.0)
+
+    def test_replay_keeps_the_latest_job(self):
+        self.finish_update(1, 50.0)
+        self.prices()
+        # Llega tarde un trabajo anterior sobre otro producto: se reaplica el
+        # margen en orden y el producto 1 se queda con su último precio
+        self.finish_update(3, 70.0, updated_at=timezone.now() - timedelta(seconds=60))
+        self.finish_update(1, 60.0)
+
+        prices = self.prices()
+
+        self.assertEqual((prices[1], prices[3]), (60.0, 70.0))
+
+    def test_jobs_already_in_the_reload_are_not_replayed(self):
+        self.finish_update(1, 99.0)
+        analytics.reload()  # La API ya tiene el cambio y luego cambia fuera de la aplicación
+        self.api[1]['price'] = 120.0
+        analytics.reload()
+
+        self.assertEqual(self.prices()[1], 120.0)
+
+    def test_summary_result_is_not_shared(self):
+        first = analytics.summary()
+        first['categories'][0]['name'] = 'Sillas'
+        first['price']['min'] = -1
+
+        second = analytics.summary()
+
+        self.assertNotIn('name', second['categories'][0])
+        self.assertEqual(second['price']['min'], 10.0)
+
+
+def resolves_to(*addresses):
+    """Resultado de socket.getaddrinfo para ``addresses``."""
+    return [
+        (socket.AF_INET6 if ':' in address else socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, 443))
+        for address in addresses
+    ]
+
+
+@override_settings(IMAGE_ALLOWED_HOSTS=['i.imgur.com', '.placeimg.com'], IMAGE_ALLOW_PRIVATE_ADDRESSES=False)
+class ImageProxyTests(SimpleTestCase):
+    """Protección SSRF y procesado del proxy de imágenes (platziapp/images.py)."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        patcher = mock.patch.object(images, 'cache', DiskLRUCache(directory, 1024 * 1024))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sent = []
+
+    def fake_send(self, adapter, request, **kwargs):
+        self.sent.append(request)
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = HTTPResponse(body=io.BytesIO(b'imagen'), preload_content=False)
+        response.url = request.url
+        return response
+
+    def test_allowed_urls(self):
+        self.assertTrue(images.is_allowed_url('https://i.imgur.com/1.jpeg'))
+        self.assertTrue(images.is_allowed_url('http://img.placeimg.com/640/480'))
+        self.assertFalse(images.is_allowed_url('https://evil.test/1.jpeg'))
+        self.assertFalse(images.is_allowed_url('https://i.imgur.com.evil.test/1.jpeg'))
+        self.assertFalse(images.is_allowed_url('file:///etc/passwd'))
+        self.assertFalse(images.is_allowed_url('https://i.imgur.com:99999/1.jpeg'))
+        self.assertFalse(images.is_allowed_url(None))
+
+    def test_private_addresses_are_rejected(self):
+        for address in ('127.0.0.1', '10.0.0.5', '169.254.169.254', '192.168.1.1', '::1', 'fd00::1'):
+            with self.subTest(address=address), mock.patch('socket.getaddrinfo', return_value=resolves_to(address)):
+                with self.assertRaisesMessage(images.ImageError, 'Dirección no pública'):
+                    images.check_address('https://i.imgur.com/1.jpeg')
+
+    def test_any_private_address_rejects_the_host(self):
+        with mock.patch('socket.getaddrinfo', return_value=resolves_to('151.101.1.1', '10.0.0.5')):
+            with self.assertRaises(images.ImageError):
+                images.check_address('https://i.imgur.com/1.jpeg')
+
+    def test_public_address_is_returned(self):
+        with mock.patch('socket.getaddrinfo', return_value=resolves_to('151.101.1.1')):
+            self.assertEqual(images.check_address('https://i.imgur.com/1.jpeg'), ipaddress.ip_address('151.101.1.1'))
+
+    def test_disallowed_host_is_not_resolved(self):
+        with mock.patch('socket.getaddrinfo') as getaddrinfo, self.assertRaises(images.ImageError):
+            images.check_address('https://evil.test/1.jpeg')
+
+        getaddrinfo.assert_not_called()
+
+    def test_download_connects_to_the_checked_address(self):
+        # DNS rebinding: la segunda consulta devolvería una dirección interna
+        answers = [resolves_to('151.101.1.1'), resolves_to('127.0.0.1')]
+        with mock.patch('socket.getaddrinfo', side_effect=answers) as getaddrinfo, \
+                mock.patch.object(images.PinnedAddressAdapter, 'send', autospec=True, side_effect=self.fake_send):
+            data = images.fetch_source('https://i.imgur.com/1.jpeg')
+
+        self.assertEqual(data, b'imagen')
+        self.assertEqual(getaddrinfo.call_count, 1)
+        [request] = self.sent
+        self.assertEqual(request.url, 'https://151.101.1.1/1.jpeg')
+        self.assertEqual(request.headers['Host'], 'i.imgur.com')
+
+    def test_tls_uses_the_original_hostname(self):
+        adapter = images.PinnedAddressAdapter()
+        url, headers = images.pinned_request('https://i.imgur.com:8443/1.jpeg', ipaddress.ip_address('2001:db8::1'))
+        request = requests.Request('GET', url, headers=headers).prepare()
+
+        host_params, pool_kwargs = adapter.build_connection_pool_key_attributes(request, True)
+
+        self.assertEqual(url, 'https://[2001:db8::1]:8443/1.jpeg')
+        self.assertEqual(headers, {'Host': 'i.imgur.com:8443'})
+        self.assertEqual(host_params['host'], '2001:db8::1')
+        self.assertEqual(pool_kwargs['server_hostname'], 'i.imgur.com')
+
+    def test_decompression_bomb_is_an_image_error(self):
+        from PIL import Image
+
+        output = io.BytesIO()
+        Image.new('RGB', (64, 64)).save(output, 'PNG')
+
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 1000), self.assertRaises(images.ImageError):
+            images.resize(output.getvalue(), 160, 'webp')
+
+
+class DiskLRUCacheTests(SimpleTestCase):
+    """Tamaño y expulsión de la caché en disco (platziapp/diskcache.py)."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = DiskLRUCache(self.directory, 1000)
+
+    def test_overwrite_counts_the_entry_once(self):
+        self.store.set('a', b'x' * 100)
+
+        for _ in range(20):
+            self.store.set('a', b'x' * 100)
+
+        self.assertEqual(self.store._size, 100)
+        self.assertEqual(self.store.get('a'), b'x' * 100)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for number in range(9):
+            self.store.set(str(number), b'x' * 100)
+            os.utime(self.store.path(str(number)), (number, number))
+        self.store.get('0')  # Usada ahora: es la más reciente
+
+        self.store.set('nueva', b'x' * 200)
+
+        self.assertIsNotNone(self.store.get('0'))
+        self.assertIsNone(self.store.get('1'))
+        self.assertLessEqual(self.store._size, 900)
+
+    def test_size_is_rescanned_to_see_other_workers(self):
+        other = DiskLRUCache(self.directory, 1000)
+        self.store.set('a', b'x' * 100)
+        other.set('b', b'x' * 500)  # Otro worker escribe en el mismo directorio
+
+        with mock.patch('time.monotonic', return_value=time.monotonic() + DiskLRUCache.RESCAN_INTERVAL + 1):
+            self.store.set('c', b'x' * 100)
+
+        self.assertEqual(self.store._size, 700)
+
+
+class ExportTests(SimpleTestCase):
+    """Exportación del catálogo en streaming (platziapp/export.py)."""
+
+    def setUp(self):
+        self.pages = [[
+            {**product(1, 'Silla', 1), 'updatedAt': '2025-03-01T10:00:00.000Z'},
+            {**product(2, 'Mesa', 1), 'updatedAt': '2025-13-01T10:00:00.000Z'},  # Mes 13
+            {**product(3, 'Sofá', 1), 'updatedAt': '2024-01-01T10:00:00'},       # Sin zona
+            {**product(4, 'Lámpara', 1), 'updatedAt': None},
+        ]]
+        patcher = mock.patch('platziapp.export.iter_pages', side_effect=lambda *args: iter(self.pages))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_invalid_or_missing_dates_count_as_missing(self):
+        since = export.parse_updated_since('2025-01-01')
+
+        ids = [item['id'] for page in export.iter_products(updated_since=since) for item in page]
+
+        self.assertEqual(ids, [1, 2, 4])
+
+    def test_csv_neutralizes_formulas(self):
+        self.pages[0][0].update(title='=HYPERLINK("http://evil.test")', description='@SUM(A1)', price=-5)
+        self.pages[0][1].update(title='+1', description='-2 piezas', slug='normal')
+
+        rows = list(csv.reader(io.StringIO(b''.join(export.export('csv')).decode())))
+
+        self.assertEqual(rows[0], list(export.CSV_FIELDS))
+        self.assertEqual((rows[1][1], rows[1][3]), ('\'=HYPERLINK("http://evil.test")', '-5'))  # El precio es un número
+        self.assertEqual(rows[1][6], "'@SUM(A1)")
+        self.assertEqual((rows[2][1], rows[2][2], rows[2][6]), ("'+1", 'normal', "'-2 piezas"))
+
+    def test_ndjson_is_not_altered(self):
+        self.pages[0][0]['title'] = '=1+1'
+
+        lines = b''.join(export.export('ndjson')).splitlines()
+
+        self.assertEqual(json.loads(lines[0])['title'], '=1+1')
+
+
+class WarmupTests(SimpleTestCase):
+    """Calentamiento del proceso y /readyz (platziapp/warmup.py)."""
+
+    def setUp(self):
+        self.failing = set()
+        steps = tuple((name, lambda name=name: self.step(name)) for name, _ in warmup.STEPS)
+        for patcher in (
+            mock.patch.object(warmup, 'STEPS', steps),
+            mock.patch.object(warmup.connections, 'close_all'),
+            mock.patch.dict(warmup._state, {'pid': None, 'running': False, 'finished': False, 'failures': 0}),
+            mock.patch.dict(os.environ, {'PLATZI_WARMUP': '1'}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(warmup, 'logger')
+        self.logger = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def step(self, name):
+        if name in self.failing:
+            raise ConnectionError(f'{name} no responde')
+
+    def test_ready_when_the_required_steps_succeed(self):
+        self.failing = {'catalog'}  # Sin la API las vistas se degradan: sigue listo
+
+        result = warmup.run()
+
+        self.assertTrue(result['ready'])
+        self.assertEqual(list(result['steps']), [name for name, _ in warmup.STEPS])
+        self.assertEqual(result['steps']['catalog']['error'], 'ConnectionError: catalog no responde')
+        self.assertTrue(all('ms' in step for step in result['steps'].values()))
+        self.logger.warning.assert_called_once_with('Calentamiento: falló el paso %s', 'catalog', exc_info=True)
+
+    def test_failed_warmup_is_retried_with_backoff(self):
+        self.failing = {'database'}
+        with mock.patch.object(warmup.time, 'monotonic', return_value=1000.0):
+            self.assertFalse(warmup.run()['ready'])
+
+        with mock.patch.object(warmup.threading, 'Thread') as thread:
+            for now, launched in ((1000.5, False), (1001.0, True)):
+                with mock.patch.object(warmup.time, 'monotonic', return_value=now):
+                    warmup.start()
+                self.assertEqual(thread.called, launched)
+
+        # Ya en marcha: no se lanza otro; el siguiente fallo espera el doble
+        self.assertTrue(warmup.status()['running'])
+        with mock.patch.object(warmup.time, 'monotonic', return_value=1001.0):
+            warmup.run()
+        with mock.patch.object(warmup.threading, 'Thread') as thread:
+            with mock.patch.object(warmup.time, 'monotonic', return_value=1002.5):
+                warmup.start()
+            thread.assert_not_called()
+
+    def test_readyz(self):
+        url = reverse('platziapp:readyz')
+        self.failing = {'database'}
+        warmup.run()
+
+        with mock.patch.object(warmup, 'start'):
+            unready = self.client.get(url)
+        self.failing = set()
+        warmup.run()
+        ready = self.client.get(url)
+        with mock.patch.dict(os.environ, {'PLATZI_WARMUP': ''}):
+            disabled = self.client.get(url)
+
+        self.assertEqual(unready.status_code, 503)
+        self.assertFalse(json.loads(unready.content)['steps']['database']['ok'])
+        self.assertEqual(ready.status_code, 200)
+        self.assertEqual(json.loads(disabled.content), {'ready': True, 'warmup': 'disabled'})
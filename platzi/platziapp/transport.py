@@ -0,0 +1,166 @@
+"""
+Transporte del cliente del catálogo con grabación y reproducción de respuestas.
+
+Se monta como adaptador de ``requests`` en la sesión de ``catalog``, así que
+las vistas y formularios no cambian. Modo según settings.CATALOG_TRANSPORT_MODE:
+
+- 'live':        sin grabación, todo va a la API (por defecto).
+- 'record':      va a la API y graba cada respuesta en el almacén.
+- 'replay':      estricto (tests); solo sirve respuestas grabadas y una
+                 petición sin grabación lanza ReplayMissError.
+- 'fallthrough': (staging) sirve lo grabado; lo que falta va a la API y se graba.
+- 'snapshot':    (incidentes con la API caída) solo sirve lo grabado; lo que
+                 falta se trata como un error de conexión, que las vistas ya
+                 manejan mostrando el mensaje de error habitual.
+
+Las respuestas se guardan en SQLite (settings.CATALOG_RECORDINGS_PATH) con
+clave primaria (método, URL, hash del cuerpo) y las más usadas se mantienen
+además en memoria, así que reproducir no añade latencia apreciable.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+MODES = ('live', 'record', 'replay', 'fallthrough', 'snapshot')
+
+# Cabeceras que no tienen sentido al reproducir (el cuerpo se guarda ya decodificado)
+SKIPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie'}
+
+
+class ReplayMissError(LookupError):
+    """Petición sin respuesta grabada en modo 'replay' (estricto)."""
+
+
+class SnapshotMissError(requests.exceptions.ConnectionError):
+    """Petición sin respuesta grabada en modo 'snapshot'."""
+
+
+def body_hash(body):
+    if body is None:
+        body = b''
+    elif isinstance(body, str):
+        body = body.encode()
+    return hashlib.sha256(body).hexdigest()
+
+
+class RecordingStore:
+    """Almacén de respuestas grabadas en SQLite con caché LRU en memoria."""
+
+    def __init__(self, path, memory_size=2048):
+        self.path = path
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        # sqlite3 no comparte conexiones entre hilos: una por hilo
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS recordings ('
+                ' method TEXT NOT NULL, url TEXT NOT NULL, body_hash TEXT NOT NULL,'
+                ' status INTEGER NOT NULL, reason TEXT, headers TEXT NOT NULL,'
+                ' body BLOB NOT NULL, recorded_at REAL NOT NULL,'
+                ' PRIMARY KEY (method, url, body_hash)) WITHOUT ROWID'
+            )
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        with self._lock:
+            row = self._memory.get(key)
+            if row is not None:
+                self._memory.move_to_end(key)
+                return row
+        row = self.connection.execute(
+            'SELECT status, reason, headers, body FROM recordings'
+            ' WHERE method = ? AND url = ? AND body_hash = ?', key,
+        ).fetchone()
+        if row is not None:
+            self._remember(key, row)
+        return row
+
+    def put(self, key, status, reason, headers, body):
+        row = (status, reason, json.dumps(headers), body)
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO recordings VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (*key, *row, time.time()),
+            )
+        self._remember(key, row)
+
+    def _remember(self, key, row):
+        with self._lock:
+            self._memory[key] = row
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+
+class RecordReplayAdapter(HTTPAdapter):
+    """Adaptador de requests que graba y/o reproduce respuestas según el modo."""
+
+    def __init__(self, store, mode, **kwargs):
+        if mode not in MODES:
+            raise ValueError(f'Modo de transporte desconocido: {mode!r} (opciones: {", ".join(MODES)})')
+        self.store = store
+        self.mode = mode
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, **kwargs):
+        key = (request.method, request.url, body_hash(request.body))
+
+        if self.mode in ('replay', 'fallthrough', 'snapshot'):
+            row = self.store.get(key)
+            if row is not None:
+                return self.build_recorded_response(request, row)
+            if self.mode == 'replay':
+                raise ReplayMissError(f'Sin respuesta grabada para {request.method} {request.url}')
+            if self.mode == 'snapshot':
+                raise SnapshotMissError(
+                    f'Sin respuesta grabada para {request.method} {request.url}', request=request,
+                )
+
+        response = super().send(request, stream=stream, **kwargs)
+        # No grabamos errores del servidor: son transitorios
+        if self.mode in ('record', 'fallthrough') and not stream and response.status_code < 500:
+            headers = {k: v for k, v in response.headers.items() if k.lower() not in SKIPPED_HEADERS}
+            self.store.put(key, response.status_code, response.reason, headers, response.content)
+        return response
+
+    def build_recorded_response(self, request, row):
+        status, reason, headers, body = row
+        response = requests.Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response.headers['X-Catalog-Replay'] = '1'
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = bytes(body)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(0)
+        return response
+
+
+def build_adapter():
+    """Adaptador para la sesión del catálogo según la configuración."""
+    mode = getattr(settings, 'CATALOG_TRANSPORT_MODE', 'live')
+    if mode == 'live':
+        return HTTPAdapter()
+    return RecordReplayAdapter(RecordingStore(settings.CATALOG_RECORDINGS_PATH), mode)
@@ -9,8 +9,16 @@ urlpatterns = [
     
     
     path('/home', views.home,  name='home'),
+    # Siguiente lote de tarjetas de producto (scroll infinito de home)
+    path('products/cards/', views.product_cards, name='product_cards'),
+    # Exportación del catálogo completo (?format=csv|ndjson|json&category=&updated_since=)
+    path('products/export/', views.export_products, name='export_products'),
+    # Estadísticas del catálogo (solo staff; ?format=json para el JSON)
+    path('products/analytics/', views.catalog_analytics, name='catalog_analytics'),
     # Lista de productos (API endpoint)
     path('api/products/', views.products_list, name='products_list'),
+    # Varios productos por id en una sola petición (?ids=1,2,3)
+    path('api/products/batch', views.products_batch, name='products_batch'),
     
     # Detalle de producto específico
     path('product/<int:product_id>/', views.product_detail, name='product_detail'),
@@ -24,4 +32,13 @@ urlpatterns = [
     
     # Borrar producto
     path('product/delete/<int:product_id>/', views.delete_product, name='delete_product'),
+
+    # Estado de una escritura encolada en la API (página y JSON para sondeo)
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
+
+    # Readiness para el balanceador: 503 hasta que termina el calentamiento
+    path('readyz', views.readyz, name='readyz'),
+
+    # Miniaturas de las imágenes de producto (proxy con caché)
+    path('img/<int:width>.<str:fmt>', views.image_proxy, name='image_proxy'),
 ]
\ No newline at end of file
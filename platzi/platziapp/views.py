@@ -1,12 +1,25 @@
-from django.shortcuts import render
-from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 from django.shortcuts import redirect
+import base64
+import logging
+import time
 import requests
+from . import catalog, export, images, jobs, warmup
+from .idempotency import idempotent
+from .models import ProductJob, RelatedProducts
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import never_cache
+from platzi import deadline
+
+logger = logging.getLogger(__name__)
 
 
 @login_required(login_url='accounts:login')
@@ -15,7 +28,7 @@ def products_list(request):
     if request.method == 'GET':
         try:
             # Hacer petición a la API
-            response = requests.get('https://api.escuelajs.co/api/v1/products', timeout=10)
+            response = catalog.get('products')
             
             # Verificar el status code
             if response.status_code == 200:
@@ -46,28 +59,61 @@ def products_list(request):
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 
 
+# Varios productos en una sola petición: /api/products/batch?ids=1,2,3
+@login_required(login_url='accounts:login')
+def products_batch(request):
+    try:
+        product_ids = [int(value) for value in request.GET.get('ids', '').split(',') if value.strip()]
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Los ids deben ser números enteros'}, status=400)
+    product_ids = list(dict.fromkeys(product_ids))
+    if not product_ids:
+        return JsonResponse({'success': False, 'error': 'Falta el parámetro ids'}, status=400)
+    if len(product_ids) > settings.CATALOG_BATCH_MAX_IDS:
+        return JsonResponse(
+            {'success': False, 'error': f'Máximo {settings.CATALOG_BATCH_MAX_IDS} ids por petición'},
+            status=400,
+        )
+
+    found, errors = catalog.get_products(product_ids)
+    if errors:
+        logger.warning('Lote de productos con errores: %s', errors)
+    # En el orden pedido; los que fallaron van en errors (id -> motivo)
+    return JsonResponse({
+        'success': not errors,
+        'products': [found[product_id] for product_id in product_ids if product_id in found],
+        'errors': {str(product_id): error for product_id, error in errors.items()},
+    })
+
+
 # Vista para mostrar el detalle de un producto específico
 @login_required(login_url='accounts:login')
 def product_detail(request, product_id):
     try:
         # Obtener el producto principal
-        response = requests.get(f'https://api.escuelajs.co/api/v1/products/{product_id}', timeout=10)
+        response = catalog.get(f'products/{product_id}')
         
         if response.status_code == 200:
             product = response.json()
             
-            # Obtener productos relacionados por categoría
+            # Obtener productos relacionados
             related_products = []
-            
-            # Si el producto tiene categoría, buscar otros productos de la misma categoría
-            if product.get('category') and product.get('category', {}).get('id'):
+            # Precalculados por el índice de similitud (build_similarity): una sola consulta
+            related = RelatedProducts.objects.filter(pk=product_id).values_list('related', flat=True).first()
+
+            if related is not None:
+                related_products = related
+            # Poco plazo para la petición: la página sale antes sin relacionados
+            elif not deadline.has_budget(settings.REQUEST_DEADLINE_OPTIONAL_MIN):
+                logger.info('Productos relacionados omitidos por falta de plazo (producto %s)', product_id)
+            # Si el producto no está en el índice y tiene categoría, buscar otros productos de la misma categoría
+            elif product.get('category') and product.get('category', {}).get('id'):
                 category_id = product['category']['id']
                 
                 try:
                     # Obtener productos de la misma categoría
-                    category_response = requests.get(
-                        f'https://api.escuelajs.co/api/v1/categories/{category_id}/products',
-                        timeout=10
+                    category_response = catalog.get(
+                        f'categories/{category_id}/products'
                     )
                     
                     if category_response.status_code == 200:
@@ -80,28 +126,27 @@ def product_detail(request, product_id):
                         ][:4]
                         
                 except requests.exceptions.RequestException:
-                    # Si falla la petición de categoría, obtener productos aleatorios
-                    try:
-                        all_products_response = requests.get(
-                            'https://api.escuelajs.co/api/v1/products?limit=20',
-                            timeout=10
-                        )
-                        if all_products_response.status_code == 200:
-                            all_products = all_products_response.json()
-                            # Filtrar el producto actual y tomar 4 aleatorios
-                            related_products = [
-                                p for p in all_products 
-                                if p.get('id') != product.get('id')
-                            ][:4]
-                    except requests.exceptions.RequestException:
-                        related_products = []
+                    # Si falla la petición de categoría (y queda plazo), obtener productos aleatorios
+                    if deadline.has_budget(settings.REQUEST_DEADLINE_OPTIONAL_MIN):
+                        try:
+                            all_products_response = catalog.get(
+                                'products?limit=20'
+                            )
+                            if all_products_response.status_code == 200:
+                                all_products = all_products_response.json()
+                                # Filtrar el producto actual y tomar 4 aleatorios
+                                related_products = [
+                                    p for p in all_products 
+                                    if p.get('id') != product.get('id')
+                                ][:4]
+                        except requests.exceptions.RequestException:
+                            related_products = []
             
             else:
                 # Si no tiene categoría, obtener productos aleatorios
                 try:
-                    all_products_response = requests.get(
-                        'https://api.escuelajs.co/api/v1/products?limit=20',
-                        timeout=10
+                    all_products_response = catalog.get(
+                        'products?limit=20'
                     )
                     if all_products_response.status_code == 200:
                         all_products = all_products_response.json()
@@ -124,6 +169,7 @@ def product_detail(request, product_id):
             return render(request, 'product_detalles.html', context)
     
     except requests.exceptions.RequestException as e:
+        logger.warning('Error de conexión con la API al cargar el producto %s', product_id, exc_info=True)
         context = {'error': 'Error al cargar el producto'}
         return render(request, 'product_detalles.html', context)
 
@@ -136,27 +182,65 @@ def inicio(request):
     return render(request, 'inicio.html')
     
 
+def encode_cursor(offset):
+    """Cursor opaco para la carga incremental del grid de productos."""
+    return base64.urlsafe_b64encode(f'o:{offset}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Devuelve el offset del cursor, o None si no es válido."""
+    try:
+        prefix, offset = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split(':')
+        if prefix != 'o' or int(offset) < 0:
+            return None
+        return int(offset)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def next_cursor(offset, products):
+    """Cursor del siguiente lote, o None si ya no quedan productos."""
+    if len(products) < settings.HOME_PAGE_SIZE:
+        return None
+    return encode_cursor(offset + len(products))
+
+
 @login_required(login_url='accounts:login')
 def home(request):
-#aparecer inicio.html
+    # Solo el primer lote; el resto lo pide el navegador al hacer scroll (product_cards)
     try:
-        # Obtener los ultimos productos creados
-        response = requests.get('https://api.escuelajs.co/api/v1/products', timeout=10)
-        
-        if response.status_code == 200:
-            all_products = response.json()
-            context = {'all_products': all_products}
-            return render(request, 'home.html', context)
-        else:
-            context = {'all_products': []}
-            return render(request, 'home.html', context)
-                # Obtener los ultimos productos creados
+        all_products = catalog.get_products_page(0, settings.HOME_PAGE_SIZE)
+    except requests.exceptions.RequestException:
+        logger.warning('Error de conexión con la API al cargar home', exc_info=True)
+        all_products = []
 
+    context = {
+        'all_products': all_products,
+        'next_cursor': next_cursor(0, all_products),
+    }
+    return render(request, 'home.html', context)
 
-            
-    except requests.exceptions.RequestException as e:
 
-        return render(request, 'home.html', context)
+# Fragmento HTML con el siguiente lote de tarjetas para el scroll infinito de home
+@login_required(login_url='accounts:login')
+def product_cards(request):
+    offset = decode_cursor(request.GET.get('cursor', ''))
+    if offset is None:
+        return HttpResponseBadRequest('Cursor inválido')
+
+    try:
+        products = catalog.get_products_page(offset, settings.HOME_PAGE_SIZE)
+    except requests.exceptions.RequestException:
+        logger.warning('Error de conexión con la API al cargar tarjetas (offset %s)', offset, exc_info=True)
+        return HttpResponse('Error de conexión con la API', status=502)
+
+    response = render(request, 'product_cards.html', {'products': products})
+    cursor = next_cursor(offset, products)
+    if cursor:
+        response['X-Next-Cursor'] = cursor
+    # Lotes pequeños y cacheables por el navegador durante un rato
+    patch_cache_control(response, private=True, max_age=settings.CATALOG_CACHE_TIMEOUT)
+    return response
     
 
 
@@ -165,16 +249,12 @@ def home(request):
 @login_required(login_url='accounts:login')
 # Vista para crear un nuevo producto
 @csrf_exempt
+@idempotent
 def create_product(request):
     if request.method == 'GET':
         # Obtener categorías disponibles para el formulario
         try:
-            response = requests.get('https://api.escuelajs.co/api/v1/categories', timeout=10)
-            if response.status_code == 200:
-                categories = response.json()
-                context = {'categories': categories}
-            else:
-                context = {'categories': []}
+            context = {'categories': catalog.get_categories()}
         except requests.exceptions.RequestException:
             context = {'categories': []}
         
@@ -203,55 +283,33 @@ def create_product(request):
                 "images": images if images else ["https://via.placeholder.com/640x480?text=No+Image"]
             }
             
-            # Enviar petición POST a la API
-            response = requests.post(
-                'https://api.escuelajs.co/api/v1/products',
-                json=product_data,
-                timeout=10
-            )
-            
-            
-            if response.status_code == 201:
-                new_product = response.json()
-                messages.success(request, f'Producto "{title}" creado exitosamente')
-                return redirect('platziapp:product_detail', new_product['id'])
-                
-       
-            else:
-                messages.error(request, 'Error al crear el producto en la API')
-                return JsonResponse({
-                    'success': False, 
-                    'error': 'Error al crear el producto'
-                })
-                
-        except requests.exceptions.RequestException as e:
-            messages.error(request, 'Error de conexión con la API')
-            return JsonResponse({
-                'success': False, 
-                'error': 'Error de conexión con la API'
-            })
+            # La escritura en la API la hace el worker (run_jobs): no se espera a la API
+            job = jobs.enqueue(ProductJob.ACTION_CREATE, payload=product_data, user=request.user)
+            messages.info(request, f'Producto "{title}" en cola para crearse')
+            return redirect('platziapp:job_status', job.id)
+
         except ValueError as e:
             messages.error(request, 'Error en los datos proporcionados')
-            return JsonResponse({
-                'success': False, 
-                'error': 'Error en los datos proporcionados'
-            })
+            return redirect('platziapp:create_product')
     
     return JsonResponse({'success': False, 'error': 'Método no permitido'})
 @login_required(login_url='accounts:login')
 @csrf_exempt
+@idempotent
 def edit_product(request, product_id):
     if request.method == 'GET':
         try:
             # Obtener el producto actual desde la API
-            response = requests.get(f'https://api.escuelajs.co/api/v1/products/{product_id}', timeout=10)
+            response = catalog.get(f'products/{product_id}')
             
             if response.status_code == 200:
                 product = response.json()
                 
                 # Obtener categorías para el formulario
-                categories_response = requests.get('https://api.escuelajs.co/api/v1/categories', timeout=10)
-                categories = categories_response.json() if categories_response.status_code == 200 else []
+                try:
+                    categories = catalog.get_categories()
+                except requests.exceptions.RequestException:
+                    categories = []
                 
                 # Preparar datos iniciales para el formulario
                 initial_data = {
@@ -306,24 +364,13 @@ def edit_product(request, product_id):
                 "images": images
             }
             
-            # Enviar petición PUT a la API para actualizar
-            response = requests.put(
-                f'https://api.escuelajs.co/api/v1/products/{product_id}',
-                json=product_data,
-                timeout=10
+            # La escritura en la API la hace el worker (run_jobs): no se espera a la API
+            job = jobs.enqueue(
+                ProductJob.ACTION_UPDATE, payload=product_data, product_id=product_id, user=request.user,
             )
-            
-            if response.status_code == 200:
-                updated_product = response.json()
-                messages.success(request, f'Producto "{title}" actualizado exitosamente')
-                return redirect('platziapp:product_detail', product_id=product_id)
-            else:
-                messages.error(request, 'Error al actualizar el producto en la API')
-                return redirect('platziapp:edit_product', product_id=product_id)
-                
-        except requests.exceptions.RequestException as e:
-            messages.error(request, 'Error de conexión con la API')
-            return redirect('platziapp:edit_product', product_id=product_id)
+            messages.info(request, f'Producto "{title}" en cola para actualizarse')
+            return redirect('platziapp:job_status', job.id)
+
         except ValueError as e:
             messages.error(request, 'Error en los datos proporcionados')
             return redirect('platziapp:edit_product', product_id=product_id)
@@ -333,11 +380,12 @@ def edit_product(request, product_id):
 @login_required(login_url='accounts:login')
 # Vista para borrar un producto
 @csrf_exempt
+@idempotent
 def delete_product(request, product_id):
     if request.method == 'GET':
         # Mostrar página de confirmación
         try:
-            response = requests.get(f'https://api.escuelajs.co/api/v1/products/{product_id}', timeout=10)
+            response = catalog.get(f'products/{product_id}')
             
             if response.status_code == 200:
                 product = response.json()
@@ -352,36 +400,132 @@ def delete_product(request, product_id):
             return redirect('platziapp:products_list')
     
     elif request.method == 'POST':
-        try:
-            # Obtener el nombre del producto antes de eliminarlo
-            product_response = requests.get(f'https://api.escuelajs.co/api/v1/products/{product_id}', timeout=10)
-            product_name = "el producto"
-            
-              
-              
-            # peticion de delete ya no va a json sino retorna a home.html 
-            if product_response.status_code == 200:
-                product = product_response.json()
-                product_name = product.get('title', 'el producto')
-                return redirect('platziapp:home')
-            
-            # Enviar petición DELETE a la API
-            response = requests.delete(
-                f'https://api.escuelajs.co/api/v1/products/{product_id}',
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                messages.success(request, f'Producto "{product_name}" eliminado exitosamente')
-                return redirect('platziapp:products_list')
-            else:
-                messages.error(request, 'Error al eliminar el producto')
-                return redirect('platziapp:product_detail', product_id=product_id)
-                
-        except requests.exceptions.RequestException as e:
-            messages.error(request, 'Error de conexión con la API')
-            return redirect('platziapp:product_detail', product_id=product_id)
+        # El nombre viene del formulario de confirmación: no hace falta pedirlo a la API
+        product_name = request.POST.get('title') or 'el producto'
+        job = jobs.enqueue(
+            ProductJob.ACTION_DELETE, payload={'title': product_name}, product_id=product_id, user=request.user,
+        )
+        messages.info(request, f'Producto "{product_name}" en cola para eliminarse')
+        return redirect('platziapp:job_status', job.id)
     
     return redirect('platziapp:products_list')
 
 
+# Proxy de imágenes: sirve miniaturas WebP/JPEG de las imágenes de producto
+def image_proxy(request, width, fmt):
+    source_url = request.GET.get('src', '')
+    signature = request.GET.get('sig', '')
+    if (width not in images.WIDTHS or fmt not in images.FORMATS
+            or not images.is_valid_signature(source_url, signature)):
+        raise Http404('Imagen no encontrada')
+
+    try:
+        data = images.get_variant(source_url, width, fmt)
+    except images.ImageError:
+        # Si no se puede procesar, el navegador la pide directamente al origen
+        # (solo a hosts permitidos: si no, sería una redirección abierta)
+        if not images.is_allowed_url(source_url):
+            raise Http404('Imagen no encontrada')
+        response = redirect(source_url)
+        response['Cache-Control'] = 'public, max-age=300'
+        return response
+
+    response = HttpResponse(data, content_type=images.FORMATS[fmt][1])
+    # La URL identifica la variante (origen + ancho + formato): nunca cambia
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+# Exportación del catálogo completo en CSV, NDJSON o JSON (solo staff)
+@login_required(login_url='accounts:login')
+def export_products(request):
+    if not request.user.is_staff:
+        raise PermissionDenied
+
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in export.FORMATS:
+        return HttpResponseBadRequest('Formato no soportado (csv, ndjson o json)')
+    category_id = request.GET.get('category')
+    if category_id is not None and not category_id.isdigit():
+        return HttpResponseBadRequest('Categoría no válida')
+    updated_since = request.GET.get('updated_since')
+    try:
+        updated_since = export.parse_updated_since(updated_since) if updated_since else None
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    # Se genera a medida que se envía: nunca hay más de una página en memoria
+    response = StreamingHttpResponse(
+        export.export(fmt, category_id and int(category_id), updated_since),
+        content_type=export.FORMATS[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="catalog.{fmt}"'
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+# Estadísticas del catálogo para merchandising (página o ?format=json)
+@login_required(login_url='accounts:login')
+def catalog_analytics(request):
+    if not request.user.is_staff:
+        raise PermissionDenied
+
+    # NumPy se importa solo aquí: el resto de la web no lo necesita
+    from . import analytics
+
+    start = time.perf_counter()
+    try:
+        summary = analytics.summary(refresh=request.GET.get('refresh') == '1')
+    except requests.exceptions.RequestException:
+        logger.warning('Error de conexión con la API al cargar las estadísticas', exc_info=True)
+        return JsonResponse({'success': False, 'error': 'Error de conexión con la API'}, status=502)
+    summary['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+    try:
+        names = {category['id']: category['name'] for category in catalog.get_categories()}
+    except requests.exceptions.RequestException:
+        names = {}
+    for category in summary['categories']:
+        category['name'] = names.get(category['id'], 'Sin categoría' if category['id'] < 0 else '')
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'success': True, **summary})
+    largest = max(summary['histogram']['counts'], default=0) or 1
+    bars = [
+        {'start': start_edge, 'end': end_edge, 'count': count, 'percent': round(count * 100 / largest)}
+        for start_edge, end_edge, count in zip(
+            summary['histogram']['edges'], summary['histogram']['edges'][1:], summary['histogram']['counts'],
+        )
+    ]
+    return render(request, 'analytics.html', {'summary': summary, 'bars': bars})
+
+
+# Readiness: 200 solo cuando el calentamiento del worker ha terminado
+@never_cache
+def readyz(request):
+    if not warmup.enabled():
+        # Sin calentamiento automático (p. ej. runserver) el proceso está listo al arrancar
+        return JsonResponse({'ready': True, 'warmup': 'disabled'})
+    if not warmup.is_ready():
+        warmup.start()  # Reintenta (con backoff) si el último calentamiento falló
+    status = warmup.status()
+    return JsonResponse(status, status=200 if status['ready'] else 503)
+
+
+# Estado de una escritura encolada (crear/editar/borrar); ?format=json para sondear
+@login_required(login_url='accounts:login')
+def job_status(request, job_id):
+    jobs_visible = ProductJob.objects.all() if request.user.is_staff else ProductJob.objects.filter(user=request.user)
+    job = get_object_or_404(jobs_visible, pk=job_id)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'id': job.id,
+            'action': job.action,
+            'status': job.status,
+            'finished': job.is_finished,
+            'product_id': job.product_id,
+            'attempts': job.attempts,
+            'error': job.last_error if job.status == ProductJob.STATUS_DEAD else '',
+        })
+    return render(request, 'job_status.html', {'job': job})
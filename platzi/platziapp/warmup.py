@@ -0,0 +1,161 @@
+"""
+Calentamiento del proceso antes de recibir tráfico.
+
+Tras un despliegue o un escalado, las primeras peticiones de cada worker
+pagaban la conexión a la base de datos y a la API, la caché vacía y la
+importación de las vistas. run() hace ese trabajo por adelantado:
+
+- database: conecta con la BD (DNS, TCP/TLS y autenticación). Las conexiones
+  de Django son por hilo: la de cada hilo de peticiones se abre en su primera
+  petición y se reutiliza después gracias a CONN_MAX_AGE.
+- urls: carga el URLconf, lo que importa todas las vistas.
+- templates: compila las plantillas más usadas.
+- images: importa Pillow (el proxy de imágenes lo importa de forma perezosa).
+- catalog: abre la conexión con la API y precarga en la caché las categorías
+  y las primeras WARMUP_PAGES páginas de productos de home.
+
+Se lanza en un hilo desde PlatziappConfig.ready() cuando PLATZI_WARMUP=1
+(platzi/wsgi.py lo activa) o a mano con ``python manage.py warmup``. La vista
+readyz responde 200 solo cuando ha terminado. Si termina sin estar listo
+(p. ej. la BD no respondía), readyz lo vuelve a lanzar con backoff
+exponencial (RETRY_BASE, RETRY_BASE * 2, ... hasta RETRY_MAX segundos).
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+# Plantillas del camino crítico (home, scroll infinito y detalle)
+TEMPLATES = ('home.html', 'product_cards.html', 'product_detalles.html', 'login.html')
+
+# Pasos sin los que el proceso no puede atender peticiones. Si falla la API
+# el proceso sigue estando listo: las vistas ya se degradan sin ella.
+REQUIRED_STEPS = {'database', 'urls'}
+
+# Segundos de espera antes de repetir un calentamiento fallido (se duplica con cada fallo)
+RETRY_BASE = 1
+RETRY_MAX = 60
+
+_lock = threading.Lock()
+_state = {
+    'pid': None,        # Proceso que lanzó el calentamiento (tras un fork hay que repetirlo)
+    'running': False,
+    'finished': False,
+    'finished_at': 0.0,  # time.monotonic() del último final
+    'failures': 0,      # Calentamientos seguidos que terminaron sin estar listo
+    'steps': {},        # nombre -> {'ok': bool, 'ms': float, 'error': str}
+}
+
+
+def warm_database():
+    for alias in settings.DATABASES:
+        connections[alias].ensure_connection()
+
+
+def warm_urls():
+    get_resolver().url_patterns
+
+
+def warm_templates():
+    for name in TEMPLATES:
+        get_template(name)
+
+
+def warm_images():
+    from PIL import Image  # noqa: F401
+
+
+def warm_catalog():
+    from . import catalog
+
+    catalog.get_categories()
+    for page in range(settings.WARMUP_PAGES):
+        catalog.get_products_page(page * settings.HOME_PAGE_SIZE, settings.HOME_PAGE_SIZE)
+
+
+STEPS = (
+    ('database', warm_database),
+    ('urls', warm_urls),
+    ('templates', warm_templates),
+    ('images', warm_images),
+    ('catalog', warm_catalog),
+)
+
+
+def run():
+    """Ejecuta todos los pasos y devuelve su resultado (ver status())."""
+    with _lock:
+        _state.update(pid=os.getpid(), running=True, finished=False, steps={})
+
+    for name, step in STEPS:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as exc:
+            result = {'ok': False, 'error': f'{type(exc).__name__}: {exc}'}
+            logger.warning('Calentamiento: falló el paso %s', name, exc_info=True)
+        else:
+            result = {'ok': True}
+        result['ms'] = round((time.perf_counter() - start) * 1000, 1)
+        with _lock:
+            _state['steps'][name] = result
+
+    # Las conexiones a la BD de este hilo no las va a reutilizar nadie
+    connections.close_all()
+    with _lock:
+        _state.update(running=False, finished=True, finished_at=time.monotonic())
+        _state['failures'] = 0 if _is_ready() else _state['failures'] + 1
+    result = status()
+    logger.info('Calentamiento terminado', extra={'ready': result['ready']})
+    return result
+
+
+def start():
+    """
+    Lanza run() en un hilo en segundo plano: una vez por proceso, o de nuevo
+    si el último terminó sin estar listo y ya pasó el tiempo de espera.
+    """
+    with _lock:
+        if _state['pid'] == os.getpid():
+            if _state['running'] or not _state['finished'] or _is_ready():
+                return
+            delay = min(RETRY_MAX, RETRY_BASE * 2 ** (_state['failures'] - 1))
+            if time.monotonic() - _state['finished_at'] < delay:
+                return
+            logger.info('Calentamiento: reintento %s', _state['failures'])
+        else:
+            _state['failures'] = 0  # Proceso nuevo (fork): se empieza de cero
+        _state.update(pid=os.getpid(), running=True, finished=False, steps={})
+    threading.Thread(target=run, name='platzi-warmup', daemon=True).start()
+
+
+def enabled():
+    """El calentamiento automático está activado en este proceso."""
+    return os.environ.get('PLATZI_WARMUP') == '1'
+
+
+def _is_ready():
+    if not _state['finished'] or _state['pid'] != os.getpid():
+        return False
+    return all(_state['steps'].get(name, {}).get('ok') for name in REQUIRED_STEPS)
+
+
+def is_ready():
+    with _lock:
+        return _is_ready()
+
+
+def status():
+    with _lock:
+        return {
+            'ready': _is_ready(),
+            'running': _state['running'] and _state['pid'] == os.getpid(),
+            'steps': {name: dict(result) for name, result in _state['steps'].items()},
+        }